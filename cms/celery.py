@@ -49,4 +49,5 @@ class Router(AlternateEnvironmentRouter):
         """
         return {
             'lms.djangoapps.grades.tasks.compute_all_grades_for_course': settings.POLICY_CHANGE_GRADES_ROUTING_KEY,
+            'lms.djangoapps.grades.tasks.update_scorable_block_index': settings.POLICY_CHANGE_GRADES_ROUTING_KEY,
         }
@@ -12,7 +12,11 @@ from pytz import UTC
 
 from contentstore.courseware_index import CoursewareSearchIndexer, LibrarySearchIndexer
 from contentstore.proctoring import register_special_exams
-from lms.djangoapps.grades.api import task_compute_all_grades_for_course
+from lms.djangoapps.grades.api import (
+    is_incremental_subsection_regrade_enabled,
+    task_compute_all_grades_for_course,
+    task_update_scorable_block_index
+)
 from openedx.core.djangoapps.credit.signals import on_course_publish
 from openedx.core.lib.gating import api as gating_api
 from track.event_transaction_utils import get_event_transaction_id, get_event_transaction_type
@@ -58,6 +62,12 @@ def listen_for_course_publish(sender, course_key, **kwargs):  # pylint: disable=
     # to perform any 'on_publish' workflow
     on_course_publish(course_key)
 
+    # then update the index of the subsections containing each scorable
+    # block and the course grade inputs, used by the grades subsystem to
+    # recalculate grades
+    if is_incremental_subsection_regrade_enabled():
+        task_update_scorable_block_index.delay(six.text_type(course_key))
+
     # Finally call into the course search subsystem
     # to kick off an indexing action
     if CoursewareSearchIndexer.indexing_is_enabled():
@@ -4,9 +4,18 @@ Tests core caching facilities.
 
 
 from django.test import TestCase
+from django.test.utils import override_settings
 from opaque_keys.edx.locator import AssetLocator, CourseLocator
 
-from openedx.core.djangoapps.contentserver.caching import del_cached_content, get_cached_content, set_cached_content
+from openedx.core.djangoapps.contentserver.caching import (
+    AssetMetadata,
+    del_cached_content,
+    get_cached_content,
+    get_cached_metadata,
+    get_local_metadata_cache,
+    set_cached_content,
+    set_cached_metadata
+)
 
 
 class Content(object):
@@ -44,3 +53,25 @@ class CachingTestCase(TestCase):
                          'should not be stored in cache with unicodeLocation')
         self.assertEqual(None, get_cached_content(self.nonUnicodeLocation),
                          'should not be stored in cache with nonUnicodeLocation')
+
+    @override_settings(CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE=10)
+    def test_metadata(self):
+        metadata = AssetMetadata(self.unicodeLocation, 'image/jpeg', 10, False, 'abc', None)
+        set_cached_metadata(metadata)
+        self.assertEqual('abc', get_cached_metadata(self.nonUnicodeLocation).content_digest)
+        self.assertIsNone(get_cached_content(self.unicodeLocation), 'metadata should be cached separately')
+
+        del_cached_content(self.unicodeLocation)
+        self.assertIsNone(get_cached_metadata(self.unicodeLocation))
+
+    @override_settings(CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE=1)
+    def test_local_metadata_cache_eviction(self):
+        local_cache = get_local_metadata_cache()
+        local_cache.set('first', 1)
+        local_cache.set('second', 2)
+        self.assertIsNone(local_cache.get('first'))
+        self.assertEqual(2, local_cache.get('second'))
+
+    def test_local_metadata_cache_disabled(self):
+        with override_settings(CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE=0):
+            self.assertIsNone(get_local_metadata_cache())
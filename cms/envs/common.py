@@ -146,6 +146,10 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Backend storage options
     PRUNING_ACTIVE=False,
+
+    # Whether to log the timing profile of each block structure
+    # transformation, and keep the profiles for the rest of the request.
+    PROFILE_TRANSFORMS=False,
 )
 
 ############################ FEATURE CONFIGURATION #############################
@@ -388,6 +392,22 @@ FEATURES = {
     # .. toggle_warnings: None
     'ENABLE_ORA_USER_STATE_UPLOAD_DATA': False,
 
+    # .. toggle_name: ENABLE_INCREMENTAL_SUBSECTION_REGRADE
+    # .. toggle_implementation: DjangoSetting
+    # .. toggle_default: False
+    # .. toggle_description: Set to True to recalculate a learner's grades after a score change using the index of
+    #      the subsections containing each scorable block and the course grade inputs that are persisted on course
+    #      publish, instead of transforming the whole course structure for the learner. Must be set in both the LMS
+    #      and Studio, which builds the index.
+    # .. toggle_category: grades
+    # .. toggle_use_cases: incremental_release
+    # .. toggle_creation_date: 2026-10-18
+    # .. toggle_expiration_date: None
+    # .. toggle_tickets: None
+    # .. toggle_status: supported
+    # .. toggle_warnings: None
+    'ENABLE_INCREMENTAL_SUBSECTION_REGRADE': False,
+
     # .. toggle_name: DEPRECATE_OLD_COURSE_KEYS_IN_STUDIO
     # .. toggle_implementation: DjangoSetting
     # .. toggle_default: True
@@ -800,6 +820,26 @@ CONTENTSTORE = {
     'DOC_STORE_CONFIG': DOC_STORE_CONFIG
 }
 
+# Hands downloads of course assets that are mirrored to local disk off to the
+# web server, instead of streaming them from the contentstore.
+CONTENTSERVER_SENDFILE = {
+    # 'X-Accel-Redirect' (nginx) or 'X-Sendfile' (Apache, lighttpd); None disables it.
+    'HEADER': None,
+    # Local directory in which assets are mirrored, each in a file named by its content digest.
+    'ROOT': '',
+    # With X-Accel-Redirect, the internal web server location that serves ROOT.
+    'URL_PREFIX': '/contentserver-mirror/',
+}
+
+# Number of course assets whose metadata is cached in each process, in front of
+# the course_assets cache. Set to 0 to disable the process-local tier.
+CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE = 1000
+
+# How long, in seconds, CourseOverviews are cached in the default cache, and
+# how many are cached in each process in front of it. Set to 0 to disable.
+COURSE_OVERVIEW_CACHE_TIMEOUT = 60 * 60
+COURSE_OVERVIEW_LOCAL_CACHE_SIZE = 1000
+
 MODULESTORE_BRANCH = 'draft-preferred'
 
 MODULESTORE = {
@@ -895,6 +935,17 @@ CODE_JAIL = {
         # Needs to be non-zero so that jailed code can use it as their temp directory.(1MiB in bytes)
         'FSIZE': 1048576,
     },
+
+    # Warm sandbox workers, which skip interpreter startup and imports for
+    # each execution (see capa.safe_exec.worker_pool). Disabled if size is 0.
+    'worker_pool': {
+        # How many workers each process keeps?
+        'size': 0,
+        # How many executions before a worker is replaced?
+        'max_executions': 100,
+        # Memory use (in bytes) beyond which a worker is replaced.
+        'max_memory': 268435456,
+    },
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -1402,6 +1453,9 @@ INSTALLED_APPS = [
     'openedx.core.djangoapps.content.course_overviews.apps.CourseOverviewsConfig',
     'openedx.core.djangoapps.content.block_structure.apps.BlockStructureConfig',
 
+    # Invalidates the cached course blocks of users whose course roles are edited in Studio
+    'lms.djangoapps.course_blocks.apps.CourseBlocksConfig',
+
     # edx-milestones service
     'milestones',
 
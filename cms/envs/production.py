@@ -374,6 +374,12 @@ XBLOCK_FIELD_DATA_WRAPPERS = ENV_TOKENS.get(
 )
 
 CONTENTSTORE = AUTH_TOKENS['CONTENTSTORE']
+CONTENTSERVER_SENDFILE = ENV_TOKENS.get('CONTENTSERVER_SENDFILE', CONTENTSERVER_SENDFILE)
+CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE = ENV_TOKENS.get(
+    'CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE', CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE
+)
+COURSE_OVERVIEW_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_OVERVIEW_CACHE_TIMEOUT', COURSE_OVERVIEW_CACHE_TIMEOUT)
+COURSE_OVERVIEW_LOCAL_CACHE_SIZE = ENV_TOKENS.get('COURSE_OVERVIEW_LOCAL_CACHE_SIZE', COURSE_OVERVIEW_LOCAL_CACHE_SIZE)
 DOC_STORE_CONFIG = AUTH_TOKENS['DOC_STORE_CONFIG']
 
 ############################### BLOCKSTORE #####################################
@@ -92,6 +92,13 @@ STATIC_URL = "/static/"
 
 BLOCK_STRUCTURES_SETTINGS['PRUNING_ACTIVE'] = True
 
+# Tests clear the django caches between them, which the process-local tier can't follow.
+CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE = 0
+
+# Tests count the queries of CourseOverview lookups, so don't cache overviews.
+COURSE_OVERVIEW_CACHE_TIMEOUT = 0
+COURSE_OVERVIEW_LOCAL_CACHE_SIZE = 0
+
 # Update module store settings per defaults for tests
 update_module_store_settings(
     MODULESTORE,
@@ -16,7 +16,7 @@ from django.core.management.base import BaseCommand, CommandError
 from opaque_keys.edx.keys import CourseKey
 from six import text_type
 
-from student.models import anonymous_id_for_user
+from student.models import anonymous_ids_for_users
 
 
 class Command(BaseCommand):
@@ -53,11 +53,13 @@ class Command(BaseCommand):
                     "Per-Student anonymized user ID",
                     "Per-course anonymized user id"
                 ))
+                student_ids = anonymous_ids_for_users(students, None)
+                course_ids = anonymous_ids_for_users(students, course_key)
                 for student in students:
                     csv_writer.writerow((
                         student.id,
-                        anonymous_id_for_user(student, None),
-                        anonymous_id_for_user(student, course_key)
+                        student_ids[student.id],
+                        course_ids[student.id]
                     ))
         except IOError:
             raise CommandError("Error writing to file: %s" % output_filename)
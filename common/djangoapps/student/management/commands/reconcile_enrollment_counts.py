@@ -0,0 +1,58 @@
+"""
+Recompute the materialized enrollment counts of courses from their enrollments.
+"""
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from student.models import CourseEnrollment, CourseEnrollmentCount
+
+logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+class Command(BaseCommand):
+    """
+    Management command to recompute the CourseEnrollmentCounts of courses.
+
+    Run it for all courses before turning on the
+    student.materialized_enrollment_counts waffle switch, and then
+    occasionally to correct counts of enrollments changed without going
+    through the CourseEnrollment model.
+
+    Example usage:
+        $ ./manage.py lms reconcile_enrollment_counts
+        $ ./manage.py lms reconcile_enrollment_counts --course course-v1:edX+DemoX+Demo_Course
+    """
+    help = 'Recompute the materialized enrollment counts of courses from their enrollments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course',
+                            dest='course_ids',
+                            action='append',
+                            default=[],
+                            help='Course to reconcile the counts of. May be repeated; defaults to all courses.')
+
+    def handle(self, *args, **options):
+        if options['course_ids']:
+            try:
+                course_keys = [CourseKey.from_string(course_id) for course_id in options['course_ids']]
+            except InvalidKeyError as error:
+                raise CommandError(u'Invalid course key: {}'.format(error))
+        else:
+            course_keys = sorted(
+                set(CourseEnrollment.objects.values_list('course_id', flat=True).distinct()) |
+                set(CourseEnrollmentCount.objects.values_list('course_id', flat=True).distinct()),
+                key=str,
+            )
+
+        changed_courses = 0
+        for course_key in course_keys:
+            changed = CourseEnrollmentCount.reconcile(course_key)
+            if changed:
+                changed_courses += 1
+                logger.info(u'Corrected %d enrollment counts of course %s', changed, course_key)
+
+        logger.info(u'Reconciled the enrollment counts of %d courses, %d of which were off',
+                    len(course_keys), changed_courses)
@@ -0,0 +1,41 @@
+"""Tests for the reconcile_enrollment_counts management command"""
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from course_modes.models import CourseMode
+from student.models import CourseEnrollment, CourseEnrollmentCount
+from student.tests.factories import UserFactory
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+
+class ReconcileEnrollmentCountsTests(SharedModuleStoreTestCase):
+    """Test the reconcile_enrollment_counts command."""
+    def setUp(self):
+        super(ReconcileEnrollmentCountsTests, self).setUp()
+        self.courses = [CourseFactory.create() for __ in range(2)]
+        for course in self.courses:
+            CourseEnrollment.enroll(UserFactory.create(), course.id, mode=CourseMode.AUDIT)
+        # Enrollments that existed before the counts were maintained.
+        CourseEnrollmentCount.objects.all().delete()
+
+    def get_counts(self, course_key):
+        return {
+            (count.mode, count.is_active): count.count
+            for count in CourseEnrollmentCount.objects.filter(course_id=course_key)
+        }
+
+    def test_all_courses(self):
+        call_command('reconcile_enrollment_counts')
+        for course in self.courses:
+            self.assertEqual(self.get_counts(course.id), {(CourseMode.AUDIT, True): 1})
+
+    def test_single_course(self):
+        call_command('reconcile_enrollment_counts', '--course', str(self.courses[0].id))
+        self.assertEqual(self.get_counts(self.courses[0].id), {(CourseMode.AUDIT, True): 1})
+        self.assertEqual(self.get_counts(self.courses[1].id), {})
+
+    def test_invalid_course(self):
+        with self.assertRaises(CommandError):
+            call_command('reconcile_enrollment_counts', '--course', 'not-a-course')
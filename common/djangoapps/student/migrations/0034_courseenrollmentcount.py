@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import opaque_keys.edx.django.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student', '0033_userprofile_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseEnrollmentCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_id', opaque_keys.edx.django.models.CourseKeyField(max_length=255)),
+                ('mode', models.CharField(max_length=100)),
+                ('is_active', models.BooleanField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='courseenrollmentcount',
+            unique_together=set([('course_id', 'mode', 'is_active')]),
+        ),
+    ]
@@ -32,8 +32,8 @@ from django.contrib.sites.models import Site
 from django.core.cache import cache
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from django.core.validators import FileExtensionValidator, RegexValidator
-from django.db import IntegrityError, models
-from django.db.models import Count, Index, Q
+from django.db import DatabaseError, IntegrityError, models, transaction
+from django.db.models import Count, F, Index, Q, Sum
 from django.db.models.signals import post_save, pre_save
 from django.db.utils import ProgrammingError
 from django.dispatch import receiver
@@ -62,7 +62,8 @@ from lms.djangoapps.certificates.models import GeneratedCertificate
 from lms.djangoapps.courseware.models import (
     CourseDynamicUpgradeDeadlineConfiguration,
     DynamicUpgradeDeadlineConfiguration,
-    OrgDynamicUpgradeDeadlineConfiguration
+    OrgDynamicUpgradeDeadlineConfiguration,
+    chunks
 )
 from lms.djangoapps.verify_student.models import SoftwareSecurePhotoVerification
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
@@ -72,8 +73,10 @@ from openedx.core.djangoapps.enrollments.api import (
     set_enrollment_attributes
 )
 from openedx.core.djangoapps.site_configuration import helpers as configuration_helpers
+from openedx.core.djangoapps.waffle_utils import WaffleSwitch
 from openedx.core.djangoapps.xmodule_django.models import NoneToEmptyManager
 from openedx.core.djangolib.model_mixins import DeletableByUserValue
+from student import STUDENT_WAFFLE_NAMESPACE
 from student.signals import ENROLL_STATUS_CHANGE, ENROLLMENT_TRACK_UPDATED, UNENROLL_DONE
 from track import contexts, segment
 from util.milestones_helpers import is_entrance_exams_enabled
@@ -84,6 +87,11 @@ log = logging.getLogger(__name__)
 AUDIT_LOG = logging.getLogger("audit")
 SessionStore = import_module(settings.SESSION_ENGINE).SessionStore  # pylint: disable=invalid-name
 
+# Read enrollment counts from CourseEnrollmentCount rather than counting
+# CourseEnrollments. Only turn this on once the reconcile_enrollment_counts
+# management command has initialized the counts of existing enrollments.
+ENROLLMENT_COUNTS_SWITCH = WaffleSwitch(STUDENT_WAFFLE_NAMESPACE, 'materialized_enrollment_counts')
+
 # enroll status changed events - signaled to email_marketing.  See email_marketing.tasks for more info
 
 
@@ -127,6 +135,10 @@ TRANSITION_STATES = (
 )
 
 
+# How many anonymous user ids anonymous_ids_for_users saves at once.
+ANONYMOUS_ID_BATCH_SIZE = 1000
+
+
 class AnonymousUserId(models.Model):
     """
     This table contains user, course_Id and anonymous_user_id
@@ -166,13 +178,7 @@ def anonymous_id_for_user(user, course_id, save=True):
     if cached_id is not None:
         return cached_id
 
-    # include the secret key as a salt, and to make the ids unique across different LMS installs.
-    hasher = hashlib.md5()
-    hasher.update(settings.SECRET_KEY.encode('utf8'))
-    hasher.update(text_type(user.id).encode('utf8'))
-    if course_id:
-        hasher.update(text_type(course_id).encode('utf-8'))
-    digest = hasher.hexdigest()
+    digest = _compute_anonymous_id(user.id, course_id)
 
     if not hasattr(user, '_anonymous_id'):
         user._anonymous_id = {}  # pylint: disable=protected-access
@@ -196,6 +202,65 @@ def anonymous_id_for_user(user, course_id, save=True):
     return digest
 
 
+def anonymous_ids_for_users(users, course_id, save=True):
+    """
+    Return a dict mapping the ids of the given users to their unique ids for
+    the course, as returned by `anonymous_id_for_user`.
+
+    `AnonymousUser`s are left out.
+
+    This is meant for many users at once: saving the ids only takes a lookup
+    and a bulk insert of the ids not saved yet, per batch of
+    ANONYMOUS_ID_BATCH_SIZE users.
+
+    Keyword arguments:
+    save -- Whether the ids should be saved in AnonymousUserId objects.
+    """
+    anonymous_ids = {}
+    for user in users:
+        if user.is_anonymous:
+            continue
+
+        digest = getattr(user, '_anonymous_id', {}).get(course_id)
+        if digest is None:
+            digest = _compute_anonymous_id(user.id, course_id)
+            if not hasattr(user, '_anonymous_id'):
+                user._anonymous_id = {}  # pylint: disable=protected-access
+            user._anonymous_id[course_id] = digest  # pylint: disable=protected-access
+
+        anonymous_ids[user.id] = digest
+
+    if save:
+        for batch in chunks(six.iteritems(anonymous_ids), ANONYMOUS_ID_BATCH_SIZE):
+            saved_ids = set(AnonymousUserId.objects.filter(
+                anonymous_user_id__in=[digest for __, digest in batch]
+            ).values_list('anonymous_user_id', flat=True))
+            # Other threads may save some of the ids in the meantime, which is fine.
+            AnonymousUserId.objects.bulk_create(
+                [
+                    AnonymousUserId(user_id=user_id, course_id=course_id, anonymous_user_id=digest)
+                    for user_id, digest in batch
+                    if digest not in saved_ids
+                ],
+                ignore_conflicts=True,
+            )
+
+    return anonymous_ids
+
+
+def _compute_anonymous_id(user_id, course_id):
+    """
+    Return the unique id of the (user, course) pair.
+    """
+    # include the secret key as a salt, and to make the ids unique across different LMS installs.
+    hasher = hashlib.md5()
+    hasher.update(settings.SECRET_KEY.encode('utf8'))
+    hasher.update(text_type(user_id).encode('utf8'))
+    if course_id:
+        hasher.update(text_type(course_id).encode('utf-8'))
+    return hasher.hexdigest()
+
+
 def user_by_anonymous_id(uid):
     """
     Return user by anonymous_user_id using AnonymousUserId lookup table.
@@ -1025,6 +1090,8 @@ class CourseEnrollmentManager(models.Manager):
 
         'course_id' is the course_id to return enrollments
         """
+        if ENROLLMENT_COUNTS_SWITCH.is_enabled():
+            return CourseEnrollmentCount.num_enrolled_in(course_id)
 
         enrollment_number = super(CourseEnrollmentManager, self).get_queryset().filter(
             course_id=course_id,
@@ -1051,6 +1118,21 @@ class CourseEnrollmentManager(models.Manager):
         if getattr(course_id, 'ccx', None):
             course_locator = course_id.to_course_locator()
 
+        if ENROLLMENT_COUNTS_SWITCH.is_enabled():
+            # Only count the few enrollments of course team members, rather
+            # than all the enrollments but theirs.
+            team_members = CourseAccessRole.objects.filter(
+                org=course_locator.org,
+                course_id=course_locator,
+                role__in=(CourseStaffRole.ROLE, CourseInstructorRole.ROLE, CourseCcxCoachRole.ROLE),
+            ).values('user_id')
+            enrolled_team_members = super(CourseEnrollmentManager, self).get_queryset().filter(
+                course_id=course_id,
+                is_active=1,
+                user__in=team_members,
+            ).count()
+            return CourseEnrollmentCount.num_enrolled_in(course_id) - enrolled_team_members
+
         staff = CourseStaffRole(course_locator).users_with_role()
         admins = CourseInstructorRole(course_locator).users_with_role()
         coaches = CourseCcxCoachRole(course_locator).users_with_role()
@@ -1097,6 +1179,9 @@ class CourseEnrollmentManager(models.Manager):
         Returns a dictionary that stores the total enrollment count for a course, as well as the
         enrollment count for each individual mode.
         """
+        if ENROLLMENT_COUNTS_SWITCH.is_enabled():
+            return CourseEnrollmentCount.enrollment_counts(course_id)
+
         # Unfortunately, Django's "group by"-style queries look super-awkward
         query = use_read_replica_if_available(
             super(CourseEnrollmentManager, self).get_queryset().filter(course_id=course_id, is_active=True).values(
@@ -1194,12 +1279,38 @@ class CourseEnrollment(models.Model):
         ).format(self.user, self.course_id, self.created, self.is_active)
 
     def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
-        super(CourseEnrollment, self).save(force_insert=force_insert, force_update=force_update, using=using,
-                                           update_fields=update_fields)
+        with transaction.atomic(using=using):
+            previous_state = self._get_saved_state(using, update_fields)
+            super(CourseEnrollment, self).save(force_insert=force_insert, force_update=force_update, using=using,
+                                               update_fields=update_fields)
+            current_state = (self.course_id, self.mode, self.is_active)
+            if previous_state != current_state:
+                deltas = {current_state: 1}
+                if previous_state is not None:
+                    deltas[previous_state] = -1
+                CourseEnrollmentCount.add_many(deltas, using=using)
 
         # Delete the cached status hash, forcing the value to be recalculated the next time it is needed.
         cache.delete(self.enrollment_status_hash_cache_key(self.user))
 
+    def _get_saved_state(self, using, update_fields):
+        """
+        Returns the (course_id, mode, is_active) of this enrollment as saved
+        in the database, locking its row until the end of the transaction, or
+        None if it isn't saved yet.
+
+        Saves not updating any of those fields skip the query, and return
+        the current state.
+        """
+        current_state = (self.course_id, self.mode, self.is_active)
+        if update_fields is not None and not {'course', 'course_id', 'mode', 'is_active'} & set(update_fields):
+            return current_state
+        if self.pk is None:
+            return None
+        return CourseEnrollment.objects.using(using).select_for_update().filter(pk=self.pk).values_list(
+            'course_id', 'mode', 'is_active'
+        ).first()
+
     @classmethod
     def get_or_create_enrollment(cls, user, course_key):
         """
@@ -2085,6 +2196,128 @@ class CourseEnrollment(models.Model):
         cache[(user_id, course_key)] = enrollment_state
 
 
+@python_2_unicode_compatible
+class CourseEnrollmentCount(models.Model):
+    """
+    The number of CourseEnrollments of a course, mode and activation status.
+
+    Counts are maintained in the same transaction as the CourseEnrollment
+    saves and deletes they count. Enrollments changed without going through
+    the model (e.g. by QuerySet.update), or whose counts couldn't be updated,
+    aren't counted until the reconcile_enrollment_counts management command
+    is run.
+
+    .. no_pii:
+    """
+    course_id = CourseKeyField(max_length=255)
+    mode = models.CharField(max_length=100)
+    is_active = models.BooleanField()
+    count = models.IntegerField(default=0)
+
+    class Meta(object):
+        unique_together = (('course_id', 'mode', 'is_active'),)
+
+    def __str__(self):
+        return u"[CourseEnrollmentCount] {}: {} ({}); active: ({})".format(
+            self.course_id, self.count, self.mode, self.is_active
+        )
+
+    @classmethod
+    def add(cls, course_id, mode, is_active, delta, using=None):
+        """
+        Adds delta to the count of enrollments of the given course, mode and
+        activation status.
+        """
+        counts = cls.objects.using(using).filter(course_id=course_id, mode=mode, is_active=is_active)
+        if counts.update(count=F('count') + delta):
+            return
+        try:
+            with transaction.atomic(using=using):
+                cls.objects.using(using).create(course_id=course_id, mode=mode, is_active=is_active, count=delta)
+        except IntegrityError:
+            # Another transaction created the row in the meantime.
+            counts.update(count=F('count') + delta)
+
+    @classmethod
+    def add_many(cls, deltas, using=None):
+        """
+        Adds the deltas, a dict mapping (course_id, mode, is_active) tuples to
+        the delta of their count, in the current transaction.
+
+        Counts are updated in a fixed order, so that concurrent updates of the
+        same counts don't lock them in opposite orders. Failing to update them
+        doesn't fail the enrollment: the failure is logged, and left for the
+        reconcile_enrollment_counts management command.
+        """
+        try:
+            with transaction.atomic(using=using):
+                for state in sorted(deltas, key=lambda state: (text_type(state[0]), state[1], state[2])):
+                    cls.add(*state, delta=deltas[state], using=using)
+        except DatabaseError:
+            log.exception(u'Could not update the enrollment counts %s.', deltas)
+
+    @classmethod
+    def num_enrolled_in(cls, course_id):
+        """
+        Returns the number of active enrollments in the course.
+        """
+        return cls.objects.filter(course_id=course_id, is_active=True).aggregate(
+            total=Sum('count')
+        )['total'] or 0
+
+    @classmethod
+    def enrollment_counts(cls, course_id):
+        """
+        Returns a dictionary of the number of active enrollments in the
+        course in each mode, and in total, like
+        CourseEnrollmentManager.enrollment_counts.
+        """
+        enroll_dict = defaultdict(int)
+        for mode, count in cls.objects.filter(course_id=course_id, is_active=True, count__gt=0).values_list(
+            'mode', 'count'
+        ):
+            enroll_dict[mode] = count
+        enroll_dict['total'] = sum(enroll_dict.values())
+        return enroll_dict
+
+    @classmethod
+    def reconcile(cls, course_id):
+        """
+        Recomputes the counts of the course from its CourseEnrollments.
+
+        Returns the number of counts that were changed.
+        """
+        with transaction.atomic():
+            # Lock the existing counts first. Enrollments update the counts in
+            # their own transaction, so any enrollment counted below has
+            # already added its delta, and any enrollment still in progress
+            # waits to add its delta to the new counts.
+            counts = {
+                (count.mode, count.is_active): count
+                for count in cls.objects.select_for_update().filter(course_id=course_id)
+            }
+            actual_counts = CourseEnrollment.objects.filter(course_id=course_id).values_list(
+                'mode', 'is_active'
+            ).order_by().annotate(Count('id'))
+
+            changed = 0
+            for mode, is_active, actual_count in actual_counts:
+                count = counts.pop((mode, is_active), None)
+                if count is None:
+                    cls.objects.create(course_id=course_id, mode=mode, is_active=is_active, count=actual_count)
+                    changed += 1
+                elif count.count != actual_count:
+                    count.count = actual_count
+                    count.save(update_fields=['count'])
+                    changed += 1
+            for count in counts.values():
+                if count.count:
+                    count.count = 0
+                    count.save(update_fields=['count'])
+                    changed += 1
+        return changed
+
+
 @python_2_unicode_compatible
 class FBEEnrollmentExclusion(models.Model):
     """
@@ -2115,6 +2348,14 @@ def invalidate_enrollment_mode_cache(sender, instance, **kwargs):  # pylint: dis
     cache.delete(cache_key)
 
 
+@receiver(models.signals.post_delete, sender=CourseEnrollment)
+def decrement_enrollment_count(sender, instance, using=None, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remove a deleted CourseEnrollment from the enrollment counts.
+    """
+    CourseEnrollmentCount.add_many({(instance.course_id, instance.mode, instance.is_active): -1}, using=using)
+
+
 @receiver(models.signals.post_save, sender=CourseEnrollment)
 def update_expiry_email_date(sender, instance, **kwargs):  # pylint: disable=unused-argument
     """
@@ -6,10 +6,13 @@ import factory
 import pytz
 from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
+from django.db import DatabaseError
 from django.db.models import signals
 from django.db.models.functions import Lower
 from django.test import TestCase
+from mock import patch
 from opaque_keys.edx.keys import CourseKey
+from waffle.testutils import override_switch
 
 from course_modes.models import CourseMode
 from course_modes.tests.factories import CourseModeFactory
@@ -23,10 +26,12 @@ from student.models import (
     AccountRecovery,
     CourseEnrollment,
     CourseEnrollmentAllowed,
+    CourseEnrollmentCount,
     ManualEnrollmentAudit,
     PendingEmailChange,
     PendingNameChange
 )
+from student.roles import CourseStaffRole
 from student.tests.factories import AccountRecoveryFactory, CourseEnrollmentFactory, UserFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
@@ -243,6 +248,103 @@ class CourseEnrollmentTests(SharedModuleStoreTestCase):
         self.assertEqual(enrollment_refetched.all()[0], enrollment)
 
 
+@override_switch('student.materialized_enrollment_counts', True)
+class CourseEnrollmentCountTests(SharedModuleStoreTestCase):
+    """
+    Tests for the maintained CourseEnrollmentCounts.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(CourseEnrollmentCountTests, cls).setUpClass()
+        cls.course = CourseFactory()
+
+    def setUp(self):
+        super(CourseEnrollmentCountTests, self).setUp()
+        self.users = [UserFactory() for __ in range(3)]
+
+    def assert_counts(self, expected_counts):
+        """
+        Asserts that the materialized counts are the expected ones, and
+        those computed from the enrollments.
+        """
+        counts = CourseEnrollmentCount.objects.filter(course_id=self.course.id, count__gt=0)
+        self.assertEqual(
+            {(count.mode, count.is_active): count.count for count in counts},
+            expected_counts,
+        )
+        self.assertEqual(CourseEnrollmentCount.reconcile(self.course.id), 0)
+
+    def test_enroll_and_unenroll(self):
+        CourseEnrollment.enroll(self.users[0], self.course.id, mode=CourseMode.AUDIT)
+        CourseEnrollment.enroll(self.users[1], self.course.id, mode=CourseMode.AUDIT)
+        self.assert_counts({(CourseMode.AUDIT, True): 2})
+
+        CourseEnrollment.unenroll(self.users[0], self.course.id)
+        self.assert_counts({(CourseMode.AUDIT, True): 1, (CourseMode.AUDIT, False): 1})
+
+    def test_update_enrollment(self):
+        enrollment = CourseEnrollment.enroll(self.users[0], self.course.id, mode=CourseMode.AUDIT)
+        enrollment.update_enrollment(mode=CourseMode.VERIFIED)
+        self.assert_counts({(CourseMode.VERIFIED, True): 1})
+
+        # Saving a stale copy of the enrollment counts its saved state.
+        stale_enrollment = CourseEnrollment.objects.get(id=enrollment.id)
+        enrollment.update_enrollment(is_active=False)
+        stale_enrollment.update_enrollment(mode=CourseMode.AUDIT)
+        self.assert_counts({(CourseMode.AUDIT, True): 1})
+
+    def test_mode_changes_update_counts_in_order(self):
+        enrollments = [
+            CourseEnrollment.enroll(self.users[0], self.course.id, mode=CourseMode.AUDIT),
+            CourseEnrollment.enroll(self.users[1], self.course.id, mode=CourseMode.VERIFIED),
+        ]
+        with patch.object(CourseEnrollmentCount, 'add', wraps=CourseEnrollmentCount.add) as mock_add:
+            enrollments[0].update_enrollment(mode=CourseMode.VERIFIED)
+            enrollments[1].update_enrollment(mode=CourseMode.AUDIT)
+        self.assertEqual(
+            [call[0][1] for call in mock_add.call_args_list],
+            [CourseMode.AUDIT, CourseMode.VERIFIED, CourseMode.AUDIT, CourseMode.VERIFIED],
+        )
+        self.assert_counts({(CourseMode.AUDIT, True): 1, (CourseMode.VERIFIED, True): 1})
+
+    def test_count_failure_doesnt_fail_enrollment(self):
+        with patch.object(CourseEnrollmentCount, 'add', side_effect=DatabaseError):
+            CourseEnrollment.enroll(self.users[0], self.course.id, mode=CourseMode.AUDIT)
+        self.assertTrue(CourseEnrollment.is_enrolled(self.users[0], self.course.id))
+        self.assertEqual(CourseEnrollmentCount.reconcile(self.course.id), 1)
+        self.assert_counts({(CourseMode.AUDIT, True): 1})
+
+    def test_delete(self):
+        enrollment = CourseEnrollment.enroll(self.users[0], self.course.id)
+        enrollment.delete()
+        self.assert_counts({})
+
+    def test_reconcile(self):
+        CourseEnrollment.enroll(self.users[0], self.course.id, mode=CourseMode.AUDIT)
+        CourseEnrollment.objects.filter(user=self.users[0]).update(mode=CourseMode.VERIFIED)
+        self.assertEqual(CourseEnrollmentCount.reconcile(self.course.id), 2)
+        self.assert_counts({(CourseMode.VERIFIED, True): 1})
+
+    def test_enrollment_counts(self):
+        CourseEnrollment.enroll(self.users[0], self.course.id, mode=CourseMode.AUDIT)
+        CourseEnrollment.enroll(self.users[1], self.course.id, mode=CourseMode.VERIFIED)
+        CourseEnrollment.enroll(self.users[2], self.course.id, mode=CourseMode.VERIFIED)
+        CourseEnrollment.unenroll(self.users[2], self.course.id)
+
+        counts = CourseEnrollment.objects.enrollment_counts(self.course.id)
+        self.assertEqual(counts, {CourseMode.AUDIT: 1, CourseMode.VERIFIED: 1, 'total': 2})
+        self.assertEqual(CourseEnrollment.objects.num_enrolled_in(self.course.id), 2)
+
+    def test_num_enrolled_in_exclude_admins(self):
+        for user in self.users:
+            CourseEnrollment.enroll(user, self.course.id)
+        CourseStaffRole(self.course.id).add_users(self.users[0])
+
+        self.assertEqual(CourseEnrollment.objects.num_enrolled_in_exclude_admins(self.course.id), 2)
+        with override_switch('student.materialized_enrollment_counts', False):
+            self.assertEqual(CourseEnrollment.objects.num_enrolled_in_exclude_admins(self.course.id), 2)
+
+
 class PendingNameChangeTests(SharedModuleStoreTestCase):
     """
     Tests the deletion of PendingNameChange records
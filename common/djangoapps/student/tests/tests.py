@@ -42,7 +42,9 @@ from student.models import (
     CourseEnrollment,
     LinkedInAddToProfileConfiguration,
     UserAttribute,
+    AnonymousUserId,
     anonymous_id_for_user,
+    anonymous_ids_for_users,
     unique_id_for_user,
     user_by_anonymous_id
 )
@@ -995,6 +997,32 @@ class AnonymousLookupTable(ModuleStoreTestCase):
             self.assertEqual(self.user, user_by_anonymous_id(anonymous_id))
             self.assertEqual(self.user, user_by_anonymous_id(new_anonymous_id))
 
+    def test_bulk_ids_match_single_ids(self):
+        users = [self.user, UserFactory.create(), AnonymousUser()]
+        with self.assertNumQueries(0):
+            anonymous_ids = anonymous_ids_for_users(users, self.course.id, save=False)
+        self.assertEqual(anonymous_ids, {
+            user.id: anonymous_id_for_user(User.objects.get(id=user.id), self.course.id, save=False)
+            for user in users[:2]
+        })
+
+    def test_bulk_save(self):
+        other_user = UserFactory.create()
+        existing_id = anonymous_id_for_user(self.user, self.course.id)
+        users = [User.objects.get(id=self.user.id), other_user]
+
+        # One lookup of the saved ids, and one insert of the others.
+        with self.assertNumQueries(2):
+            anonymous_ids = anonymous_ids_for_users(users, self.course.id)
+        self.assertEqual(anonymous_ids[self.user.id], existing_id)
+        self.assertEqual(other_user, user_by_anonymous_id(anonymous_ids[other_user.id]))
+
+        # Saving ids again doesn't insert anything.
+        users = [User.objects.get(id=user.id) for user in users]
+        with self.assertNumQueries(1):
+            anonymous_ids_for_users(users, self.course.id)
+        self.assertEqual(AnonymousUserId.objects.count(), 2)
+
 
 @skip_unless_lms
 @patch('openedx.core.djangoapps.programs.utils.get_programs')
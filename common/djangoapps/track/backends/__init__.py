@@ -25,3 +25,8 @@ class BaseBackend(six.with_metaclass(abc.ABCMeta, object)):
     def send(self, event):
         """Send event to tracker."""
         pass
+
+    def send_batch(self, events):
+        """Send several events to tracker, in order."""
+        for event in events:
+            self.send(event)
@@ -33,6 +33,28 @@ class LoggerBackend(BaseBackend):
         self.event_logger = logging.getLogger(name)
 
     def send(self, event):
+        self.event_logger.info(self._serialize(event))
+
+    def send_batch(self, events):
+        """
+        Log the events, serializing them all before logging any.
+
+        Each event still gets its own log record: handlers such as syslog
+        expect one event per record, and would mangle or truncate a record
+        holding several.
+        """
+        event_strs = []
+        for event in events:
+            try:
+                event_strs.append(self._serialize(event))
+            except UnicodeDecodeError:
+                # Already logged, and there is no request to fail.
+                pass
+        for event_str in event_strs:
+            self.event_logger.info(event_str)
+
+    def _serialize(self, event):
+        """Return the event as a JSON string, truncated to TRACK_MAX_EVENT characters."""
         try:
             event_str = json.dumps(event, cls=DateTimeJSONEncoder)
         except UnicodeDecodeError:
@@ -44,6 +66,4 @@ class LoggerBackend(BaseBackend):
         # TODO: remove trucation of the serialized event, either at a
         # higher level during the emittion of the event, or by
         # providing warnings when the events exceed certain size.
-        event_str = event_str[:settings.TRACK_MAX_EVENT]
-
-        self.event_logger.info(event_str)
+        return event_str[:settings.TRACK_MAX_EVENT]
@@ -98,3 +98,12 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+    def send_batch(self, events):
+        """Insert the events in to the Mongo collection at once"""
+        try:
+            # Copy the events, since pymongo adds an _id to the inserted documents.
+            self.collection.insert_many([dict(event) for event in events], ordered=False)
+        except (PyMongoError, BSONError):
+            msg = 'Error inserting to MongoDB event tracker backend'
+            log.exception(msg)
@@ -0,0 +1,223 @@
+"""
+Event tracker backend that hands events over to another backend from a
+background thread, so that slow backends don't add latency to requests.
+
+Example configuration::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.queued.QueuedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {...},
+              },
+              'max_queue_size': 10000,
+              'batch_size': 100,
+              'overflow': 'drop',
+          }
+      }
+  }
+
+"""
+
+
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.utils.module_loading import import_string
+from six.moves import queue
+
+from track.backends import BaseBackend
+
+log = logging.getLogger(__name__)
+
+# What to do with an event when the queue is full.
+OVERFLOW_DROP = 'drop'
+OVERFLOW_BLOCK = 'block'
+
+# Log about dropped events at most this often, in seconds.
+DROPPED_EVENTS_LOG_INTERVAL = 60
+
+_SHUTDOWN = object()
+
+
+class QueuedBackend(BaseBackend):
+    """
+    Event tracker backend that queues events for another backend.
+
+    Events are queued in memory, and sent in batches by a background thread,
+    using the backend's `send_batch` method if it has one. When the queue is
+    full, events are dropped or, with the 'block' overflow policy, `send`
+    waits up to `block_timeout` seconds for room before dropping the event.
+    Queued events are flushed when the process exits.
+
+    """
+
+    def __init__(
+        self,
+        backend,
+        max_queue_size=10000,
+        batch_size=100,
+        flush_interval=1.0,
+        overflow=OVERFLOW_DROP,
+        block_timeout=0.1,
+        shutdown_timeout=5.0,
+        **kwargs
+    ):
+        """
+        :Parameters:
+          - `backend`: the configuration of the backend to send the
+            events to, with 'ENGINE' and 'OPTIONS' keys.
+          - `max_queue_size`: how many events may be queued.
+          - `batch_size`: how many events may be sent at once.
+          - `flush_interval`: how long, in seconds, the background thread
+            waits for events before checking whether it's to stop.
+          - `overflow`: 'drop' or 'block', the policy when the queue is full.
+          - `block_timeout`: how long, in seconds, `send` blocks with the
+            'block' policy.
+          - `shutdown_timeout`: how long, in seconds, to wait for queued
+            events to be sent when the process exits.
+
+        """
+        super(QueuedBackend, self).__init__(**kwargs)
+
+        if overflow not in (OVERFLOW_DROP, OVERFLOW_BLOCK):
+            raise ValueError('Invalid overflow policy %s' % overflow)
+
+        self.backend = import_string(backend['ENGINE'])(**backend.get('OPTIONS', {}))
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.shutdown_timeout = shutdown_timeout
+
+        self.dropped_events = 0
+        self._dropped_events_logged_at = 0
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        atexit.register(self.close)
+
+    def send(self, event):
+        """Queue the event, or drop it if the queue is full."""
+        event_queue = self._get_queue()
+        try:
+            if self.overflow == OVERFLOW_BLOCK:
+                event_queue.put(event, timeout=self.block_timeout)
+            else:
+                event_queue.put_nowait(event)
+        except queue.Full:
+            self._drop()
+
+    def flush(self, timeout=None):
+        """
+        Wait until the events queued so far are sent, or the timeout expires.
+
+        Returns whether all the events were sent.
+
+        """
+        with self._lock:
+            event_queue = self._queue if self._pid == os.getpid() else None
+        if event_queue is None:
+            return True
+
+        deadline = time.time() + timeout if timeout is not None else None
+        with event_queue.all_tasks_done:
+            while event_queue.unfinished_tasks:
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return False
+                event_queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self):
+        """Send the queued events, and stop the background thread."""
+        with self._lock:
+            if self._pid != os.getpid() or self._thread is None:
+                return
+            event_queue, thread = self._queue, self._thread
+            self._queue = self._thread = self._pid = None
+
+        try:
+            event_queue.put(_SHUTDOWN, timeout=self.shutdown_timeout)
+        except queue.Full:
+            log.warning('Could not flush the queued tracking events on shutdown')
+            return
+        thread.join(self.shutdown_timeout)
+
+    def _get_queue(self):
+        """
+        Return the queue of the current process, starting its background
+        thread if need be.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return self._queue
+
+        # Threads don't survive forks, so each process needs its own.
+        with self._lock:
+            if self._pid != pid:
+                self._queue = queue.Queue(self.max_queue_size)
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name='tracking-{}'.format(type(self.backend).__name__),
+                )
+                self._thread.daemon = True
+                self._thread.start()
+                self._pid = pid
+            return self._queue
+
+    def _run(self, event_queue):
+        """Send the queued events in batches, until shut down."""
+        while True:
+            try:
+                events = [event_queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            while len(events) < self.batch_size and events[-1] is not _SHUTDOWN:
+                try:
+                    events.append(event_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            shutdown = events[-1] is _SHUTDOWN
+            if shutdown:
+                events.pop()
+            try:
+                if events:
+                    self._send_batch(events)
+            finally:
+                for __ in range(len(events) + shutdown):
+                    event_queue.task_done()
+            if shutdown:
+                return
+
+    def _send_batch(self, events):
+        """Send the events to the backend, logging any error."""
+        try:
+            if hasattr(self.backend, 'send_batch'):
+                self.backend.send_batch(events)
+            else:
+                for event in events:
+                    self.backend.send(event)
+        except Exception:  # pylint: disable=broad-except
+            log.exception('Error sending %d events to tracking backend %s', len(events), self.backend)
+
+    def _drop(self):
+        """Count a dropped event, and log about it once in a while."""
+        with self._lock:
+            self.dropped_events += 1
+            now = time.time()
+            if now - self._dropped_events_logged_at < DROPPED_EVENTS_LOG_INTERVAL:
+                return
+            self._dropped_events_logged_at = now
+            dropped_events = self.dropped_events
+        log.warning(
+            'Tracking event queue for %s is full; %d events dropped so far', self.backend, dropped_events,
+        )
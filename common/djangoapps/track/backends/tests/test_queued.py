@@ -0,0 +1,103 @@
+"""Tests for the queued event tracker backend."""
+
+
+import threading
+
+from django.test import TestCase
+from mock import patch
+
+from track.backends import BaseBackend
+from track.backends.queued import QueuedBackend
+
+
+class RecordingBackend(BaseBackend):
+    """Backend recording the batches of events it's sent."""
+
+    batches = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def __init__(self, block=False, **kwargs):
+        super(RecordingBackend, self).__init__(**kwargs)
+        self.block = block
+
+    def send(self, event):
+        self.send_batch([event])
+
+    def send_batch(self, events):
+        if self.block:
+            self.started.set()
+            self.release.wait(5)
+        self.batches.append(list(events))
+
+
+class TestQueuedBackend(TestCase):
+    """Tests for QueuedBackend."""
+
+    def setUp(self):
+        super(TestQueuedBackend, self).setUp()
+        RecordingBackend.batches = []
+        RecordingBackend.started = threading.Event()
+        RecordingBackend.release = threading.Event()
+
+    def create_backend(self, block=False, **kwargs):
+        backend = QueuedBackend(
+            backend={
+                'ENGINE': 'track.backends.tests.test_queued.RecordingBackend',
+                'OPTIONS': {'block': block},
+            },
+            **kwargs
+        )
+        self.addCleanup(backend.close)
+        self.addCleanup(RecordingBackend.release.set)
+        return backend
+
+    def test_events_sent(self):
+        backend = self.create_backend()
+        for i in range(3):
+            backend.send({'test': i})
+        self.assertTrue(backend.flush(5))
+        self.assertEqual(sum(RecordingBackend.batches, []), [{'test': 0}, {'test': 1}, {'test': 2}])
+
+    def test_events_batched(self):
+        backend = self.create_backend(block=True, batch_size=2)
+        backend.send({'test': 0})
+        RecordingBackend.started.wait(5)
+        for i in range(1, 4):
+            backend.send({'test': i})
+        RecordingBackend.release.set()
+
+        self.assertTrue(backend.flush(5))
+        self.assertEqual(RecordingBackend.batches, [[{'test': 0}], [{'test': 1}, {'test': 2}], [{'test': 3}]])
+
+    def test_events_dropped_when_full(self):
+        backend = self.create_backend(block=True, max_queue_size=1)
+        backend.send({'test': 0})
+        RecordingBackend.started.wait(5)
+        with patch('track.backends.queued.log') as mock_log:
+            for i in range(1, 4):
+                backend.send({'test': i})
+        self.assertEqual(backend.dropped_events, 2)
+        mock_log.warning.assert_called_once()
+
+        RecordingBackend.release.set()
+        self.assertTrue(backend.flush(5))
+        self.assertEqual(sum(RecordingBackend.batches, []), [{'test': 0}, {'test': 1}])
+
+    def test_block_overflow(self):
+        backend = self.create_backend(block=True, max_queue_size=1, overflow='block', block_timeout=0.01)
+        backend.send({'test': 0})
+        RecordingBackend.started.wait(5)
+        backend.send({'test': 1})
+        backend.send({'test': 2})
+        self.assertEqual(backend.dropped_events, 1)
+
+    def test_invalid_overflow(self):
+        with self.assertRaises(ValueError):
+            self.create_backend(overflow='wait')
+
+    def test_flushed_on_close(self):
+        backend = self.create_backend()
+        backend.send({'test': 0})
+        backend.close()
+        self.assertEqual(RecordingBackend.batches, [[{'test': 0}]])
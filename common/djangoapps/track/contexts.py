@@ -3,6 +3,7 @@
 
 import logging
 
+from django.utils.lru_cache import lru_cache
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey, LearningContextKey
 from six import text_type
@@ -20,9 +21,19 @@ def course_context_from_url(url):
     url = url or ''
 
     match = COURSE_REGEX.match(url)
+    course_id_string = match.group('course_id') if match else None
+    return dict(_course_context_from_course_id_string(course_id_string))
+
+
+@lru_cache(maxsize=1024)
+def _course_context_from_course_id_string(course_id_string):
+    """
+    Returns the course_context of the course with the given id, which is
+    only parsed once per id, or the empty course_context if it's None or
+    invalid. Callers must not modify the returned context.
+    """
     course_id = None
-    if match:
-        course_id_string = match.group('course_id')
+    if course_id_string is not None:
         try:
             course_id = CourseKey.from_string(course_id_string)
         except InvalidKeyError:
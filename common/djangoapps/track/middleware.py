@@ -16,6 +16,7 @@ import sys
 import six
 from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.lru_cache import lru_cache
 from eventtracking import tracker
 from ipware.ip import get_ip
 
@@ -109,13 +110,8 @@ class TrackMiddleware(MiddlewareMixin):
         """Don't track requests to the specified URL patterns"""
         path = request.META['PATH_INFO']
 
-        ignored_url_patterns = getattr(settings, 'TRACKING_IGNORE_URL_PATTERNS', [])
-        for pattern in ignored_url_patterns:
-            # Note we are explicitly relying on python's internal caching of
-            # compiled regular expressions here.
-            if re.match(pattern, path):
-                return False
-        return True
+        ignored_url_patterns = _compile_url_patterns(tuple(getattr(settings, 'TRACKING_IGNORE_URL_PATTERNS', [])))
+        return not any(pattern.match(path) for pattern in ignored_url_patterns)
 
     def enter_request_context(self, request):
         """
@@ -220,3 +216,11 @@ class TrackMiddleware(MiddlewareMixin):
             pass
 
         return response
+
+
+@lru_cache(maxsize=8)
+def _compile_url_patterns(url_patterns):
+    """
+    Returns the given regular expressions, compiled.
+    """
+    return [re.compile(pattern) for pattern in url_patterns]
@@ -15,6 +15,11 @@ CONTEXT_FIELDS_TO_INCLUDE = [
     'accept_language'
 ]
 
+# These fields are present elsewhere in the event once the context fields
+# are included, and client_id is only used for Segment web analytics and
+# does not concern researchers.
+CONTEXT_FIELDS_TO_REMOVE = frozenset(CONTEXT_FIELDS_TO_INCLUDE + ['client_id'])
+
 
 class LegacyFieldMappingProcessor(object):
     """Ensures all required fields are included in emitted events"""
@@ -64,11 +69,7 @@ def remove_shim_context(event):
     """
     if 'context' in event:
         context = event['context']
-        # These fields are present elsewhere in the event at this point
-        context_fields_to_remove = set(CONTEXT_FIELDS_TO_INCLUDE)
-        # This field is only used for Segment web analytics and does not concern researchers
-        context_fields_to_remove.add('client_id')
-        for field in context_fields_to_remove:
+        for field in CONTEXT_FIELDS_TO_REMOVE:
             if field in context:
                 del context[field]
 
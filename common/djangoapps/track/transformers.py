@@ -36,6 +36,9 @@ class DottedPathMapping(object):
     def __init__(self, registry=None):
         self._match_registry = {}
         self._prefix_registry = {}
+        # The prefixes, longest matches first, sorted once per registration
+        # rather than on every lookup.
+        self._sorted_prefixes = []
         self.update(registry or {})
 
     def __contains__(self, key):
@@ -49,8 +52,7 @@ class DottedPathMapping(object):
         if key in self._match_registry:
             return self._match_registry[key]
         if isinstance(key, six.string_types):
-            # Reverse-sort the keys to find the longest matching prefix.
-            for prefix in sorted(self._prefix_registry, reverse=True):
+            for prefix in self._sorted_prefixes:
                 if key.startswith(prefix):
                     return self._prefix_registry[prefix]
         raise KeyError('Key {} not found in {}'.format(key, type(self)))
@@ -58,15 +60,24 @@ class DottedPathMapping(object):
     def __setitem__(self, key, value):
         if key.endswith('.'):
             self._prefix_registry[key] = value
+            self._sort_prefixes()
         else:
             self._match_registry[key] = value
 
     def __delitem__(self, key):
         if key.endswith('.'):
             del self._prefix_registry[key]
+            self._sort_prefixes()
         else:
             del self._match_registry[key]
 
+    def _sort_prefixes(self):
+        """
+        Reverse-sorts the prefixes, so that the first matching prefix is the
+        longest one.
+        """
+        self._sorted_prefixes = sorted(self._prefix_registry, reverse=True)
+
     def get(self, key, default=None):
         """
         Return `self[key]` if it exists, otherwise, return `None` or `default`
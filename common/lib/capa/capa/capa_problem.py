@@ -14,9 +14,11 @@ This is used by capa_module.
 """
 
 
+import hashlib
 import logging
 import os.path
 import re
+import threading
 from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
@@ -74,12 +76,83 @@ html_problem_semantics = [
     "openendedrubric",
 ]
 
+# How many parsed problems each process keeps (see ProblemTemplate)
+MAX_CACHED_PROBLEM_TEMPLATES = 256
+
 log = logging.getLogger(__name__)
 
 #-----------------------------------------------------------------------------
 # main class for this module
 
 
+class ProblemTemplate(object):
+    """
+    The parsed XML tree of a problem, with IDs assigned to its responses and
+    entries, which doesn't depend on the learner or the seed.
+
+    Templates are kept in a process-wide LRU cache keyed by the problem's
+    XML and id, so that instantiating a problem for many learners (e.g. when
+    rescoring) only parses its XML once, and then copies the tree for each
+    learner. Problems including other files aren't cached, since the
+    included files may change.
+    """
+    _cache = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, tree, responses):
+        self._tree = tree
+        elements = {element: index for index, element in enumerate(tree.iter())}
+        self._responses = [
+            (elements[response], [elements[entry] for entry in inputfields])
+            for response, inputfields in responses
+        ]
+
+    @classmethod
+    def get(cls, problem, problem_text):
+        """
+        Returns the template of the given LoncapaProblem, with XML
+        problem_text, parsing it if it isn't cached.
+        """
+        key = hashlib.sha1(
+            u'{}\n{}'.format(problem.problem_id, problem_text).encode('utf-8')
+        ).hexdigest()
+        with cls._lock:
+            template = cls._cache.pop(key, None)
+            if template is not None:
+                cls._cache[key] = template
+                return template
+
+        responses, cacheable = problem._parse(problem_text)  # pylint: disable=protected-access
+        template = cls(problem.tree, responses)
+        if cacheable and MAX_CACHED_PROBLEM_TEMPLATES:
+            with cls._lock:
+                cls._cache[key] = template
+                while len(cls._cache) > MAX_CACHED_PROBLEM_TEMPLATES:
+                    cls._cache.popitem(last=False)
+        return template
+
+    @classmethod
+    def clear_cache(cls):
+        """
+        Empties the cache of templates.
+        """
+        with cls._lock:
+            cls._cache.clear()
+
+    def copy(self):
+        """
+        Returns a copy of the template's tree, and the (response,
+        inputfields) pairs of the copy, for a LoncapaProblem to transform.
+        """
+        tree = deepcopy(self._tree)
+        elements = list(tree.iter())
+        responses = [
+            (elements[response], [elements[entry] for entry in inputfields])
+            for response, inputfields in self._responses
+        ]
+        return tree, responses
+
+
 class LoncapaSystem(object):
     """
     An encapsulation of resources needed from the outside.
@@ -184,16 +257,10 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        if isinstance(problem_text, six.text_type):
-            # etree chokes on Unicode XML with an encoding declaration
-            problem_text = problem_text.encode('utf-8')
-        self.tree = etree.XML(problem_text)
-
-        self.make_xml_compatible(self.tree)
-
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # parse problem XML file into an element tree, or copy the tree
+        # already parsed for this problem
+        template = ProblemTemplate.get(self, problem_text)
+        self.tree, responses = template.copy()
 
         # construct script processor context (eg for customresponse problems)
         if minimal_init:
@@ -205,7 +272,7 @@ class LoncapaProblem(object):
         # transformations.  This also creates the dict (self.responders) of Response
         # instances for each question in the problem. The dict has keys = xml subtree of
         # Response, values = Response instance
-        self.problem_data = self._preprocess_problem(self.tree, minimal_init)
+        self.problem_data = self._preprocess_problem(self.tree, minimal_init, responses)
 
         if not minimal_init:
             if not self.student_answers:  # True when student_answers is an empty dict
@@ -787,6 +854,28 @@ class LoncapaProblem(object):
 
     # ======= Private Methods Below ========
 
+    def _parse(self, problem_text):
+        """
+        Parse the problem XML into self.tree, and assign IDs to all its
+        responses and entries.
+
+        Returns the (response, inputfields) pairs of the problem, and whether
+        the problem's tree depends on nothing but problem_text and the
+        problem's id.
+        """
+        if isinstance(problem_text, six.text_type):
+            # etree chokes on Unicode XML with an encoding declaration
+            problem_text = problem_text.encode('utf-8')
+        self.tree = etree.XML(problem_text)
+
+        self.make_xml_compatible(self.tree)
+
+        # handle any <include file="foo"> tags
+        has_includes = self.tree.find('.//include') is not None
+        self._process_includes()
+
+        return self._assign_ids(self.tree), not has_includes
+
     def _process_includes(self):
         """
         Handle any <include file="foo"> tags by reading in the specified file and inserting it
@@ -1050,20 +1139,16 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree, minimal_init):  # private
+    def _assign_ids(self, tree):  # private
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
         In-place transformation
 
-        Also create capa Response instances for each responsetype and save as self.responders
-
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        Returns a list of (response, inputfields) pairs, in document order.
         """
         response_id = 1
-        problem_data = {}
-        self.responders = {}
+        responses = []
         for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
             responsetype_id = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
@@ -1084,6 +1169,27 @@ class LoncapaProblem(object):
                 entry.attrib['id'] = "%s_%i_%i" % (self.problem_id, response_id, answer_id)
                 answer_id = answer_id + 1
 
+            responses.append((response, inputfields))
+        return responses
+
+    def _preprocess_problem(self, tree, minimal_init, responses=None):  # private
+        """
+        Assign IDs to all the responses, unless `responses` are given by
+        _assign_ids already
+        Annoted correctness and value
+        In-place transformation
+
+        Also create capa Response instances for each responsetype and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        """
+        if responses is None:
+            responses = self._assign_ids(tree)
+
+        problem_data = {}
+        self.responders = {}
+        for response, inputfields in responses:
+            responsetype_id = response.get('id')
             self.response_a11y_data(response, inputfields, responsetype_id, problem_data)
 
             # instantiate capa Response
@@ -0,0 +1,169 @@
+"""
+A cache of safe_exec results, to pass as safe_exec's `cache`.
+
+Results are kept compressed in a small in-process LRU, in front of a shared
+cache (e.g. memcached) with .get(key) and .set(key, value) methods. Results
+too large for the shared cache aren't cached at all, so that the in-process
+LRU stays bounded in bytes as well as in entries.
+
+Hits, misses and execution times are counted for each problem (safe_exec's
+slug), and optionally reported to a metrics callback.
+"""
+
+
+import json
+import threading
+import zlib
+from collections import OrderedDict
+
+# Compressed results bigger than this aren't cached (memcached's default item
+# size limit is 1MiB).
+DEFAULT_MAX_ENTRY_SIZE = 512 * 1024
+
+# How many problems' counters are kept.
+MAX_STATS_ENTRIES = 1000
+
+
+class SafeExecStats(object):
+    """
+    Counters of the executions of a problem's code.
+    """
+    __slots__ = ('hits', 'misses', 'exec_time')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.exec_time = 0.0
+
+    @property
+    def hit_rate(self):
+        """
+        Returns the fraction of executions answered from the cache.
+        """
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+
+class SafeExecResultCache(object):
+    """
+    A two-level cache of safe_exec results.
+    """
+    def __init__(
+        self,
+        cache,
+        local_size=0,
+        max_entry_size=DEFAULT_MAX_ENTRY_SIZE,
+        timeout=None,
+        report_metric=None,
+    ):
+        """
+        Arguments:
+            cache: the shared cache, with .get(key) and .set(key, value, timeout).
+            local_size (int): how many results to keep in-process, if any.
+            max_entry_size (int): the maximum size, in bytes, of a compressed
+                result to cache.
+            timeout (int): the timeout of results in the shared cache, or None
+                for the cache's default.
+            report_metric (callable): if given, called with a metric name and
+                value on every execution.
+        """
+        self.cache = cache
+        self.local_size = local_size
+        self.max_entry_size = max_entry_size
+        self.timeout = timeout
+        self.report_metric = report_metric
+        self._local = OrderedDict()
+        self._stats = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached (error message, globals) result for key, or None.
+        """
+        data = self._get_local(key)
+        if data is None:
+            data = self.cache.get(key)
+            if data is None:
+                return None
+            self._set_local(key, data)
+        return _decompress(data)
+
+    def set(self, key, value):
+        """
+        Caches the (error message, globals) result for key, unless it's
+        larger than max_entry_size once compressed.
+        """
+        data = _compress(value)
+        if len(data) > self.max_entry_size:
+            return
+        self._set_local(key, data)
+        if self.timeout is None:
+            self.cache.set(key, data)
+        else:
+            self.cache.set(key, data, self.timeout)
+
+    def record(self, slug, hit, exec_time):
+        """
+        Counts an execution of the code of the problem identified by slug,
+        which was answered from the cache if hit, else took exec_time seconds.
+        """
+        with self._lock:
+            stats = self._stats.pop(slug, None) or SafeExecStats()
+            self._stats[slug] = stats
+            while len(self._stats) > MAX_STATS_ENTRIES:
+                self._stats.popitem(last=False)
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+                stats.exec_time += exec_time
+
+        if self.report_metric:
+            self.report_metric(u'safe_exec.cache.hits' if hit else u'safe_exec.cache.misses', 1)
+            if not hit:
+                self.report_metric(u'safe_exec.exec_time', exec_time)
+
+    def get_stats(self, slug):
+        """
+        Returns the SafeExecStats of the problem identified by slug.
+        """
+        with self._lock:
+            return self._stats.get(slug) or SafeExecStats()
+
+    def _get_local(self, key):
+        """
+        Returns the compressed result cached in-process for key, or None.
+        """
+        if not self.local_size:
+            return None
+        with self._lock:
+            data = self._local.pop(key, None)
+            if data is not None:
+                self._local[key] = data
+            return data
+
+    def _set_local(self, key, data):
+        """
+        Caches the compressed result in-process for key.
+        """
+        if not self.local_size:
+            return
+        with self._lock:
+            self._local.pop(key, None)
+            self._local[key] = data
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+
+def _compress(value):
+    """
+    Returns the compressed serialization of a JSON-safe result.
+    """
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'))
+
+
+def _decompress(data):
+    """
+    Returns the result serialized in data, as a fresh copy.
+    """
+    return tuple(json.loads(zlib.decompress(data).decode('utf-8')))
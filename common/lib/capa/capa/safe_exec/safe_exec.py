@@ -2,6 +2,7 @@
 
 
 import hashlib
+import time
 
 from codejail.safe_exec import SafeExecException, json_safe
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
@@ -10,6 +11,7 @@ import six
 from six import text_type
 
 from . import lazymod
+from .worker_pool import get_worker_pool
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -55,6 +57,9 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# Modules imported ahead of time by the warm sandbox workers, if any.
+WORKER_PRELOAD = ["random2", "six"] + [modname for __, modname in ASSUMED_IMPORTS]
+
 
 def update_hash(hasher, obj):
     """
@@ -79,6 +84,63 @@ def update_hash(hasher, obj):
         hasher.update(six.b(repr(obj)))
 
 
+class _NotPlainJson(Exception):
+    """Raised by _update_plain_json_hash for objects JSON wouldn't round-trip as is."""
+    pass
+
+
+def _update_plain_json_hash(hasher, obj):
+    """
+    Update a `hashlib` hasher like `update_hash` does with the result of
+    round-tripping `obj` through JSON, for objects made of JSON types only.
+
+    Raises _NotPlainJson for any other object.
+    """
+    if isinstance(obj, (tuple, list)):
+        # JSON makes lists of tuples.
+        hasher.update(six.b(str(list)))
+        for e in obj:
+            _update_plain_json_hash(hasher, e)
+    elif isinstance(obj, dict):
+        hasher.update(six.b(str(dict)))
+        for k in sorted(obj):
+            if not isinstance(k, six.text_type):
+                raise _NotPlainJson()
+            update_hash(hasher, k)
+            _update_plain_json_hash(hasher, obj[k])
+    elif obj is None or isinstance(obj, (bool, float, six.text_type) + six.integer_types):
+        update_hash(hasher, obj)
+    else:
+        raise _NotPlainJson()
+
+
+def update_globals_hash(hasher, globals_dict):
+    """
+    Update a `hashlib` hasher with the globals that codejail passes to jailed
+    code, that is `json_safe(globals_dict)`.
+
+    Unlike `update_hash(hasher, json_safe(globals_dict))`, values made of JSON
+    types only, which globals almost always are, are hashed without being
+    serialized.
+
+    """
+    for key in sorted(globals_dict):
+        value = globals_dict[key]
+        if key == "__builtins__":
+            continue
+        value_hasher = hashlib.md5()
+        try:
+            _update_plain_json_hash(value_hasher, value)
+        except _NotPlainJson:
+            safe_value = json_safe({key: value})
+            if key not in safe_value:
+                continue
+            value_hasher = hashlib.md5()
+            update_hash(value_hasher, safe_value[key])
+        update_hash(hasher, key)
+        hasher.update(value_hasher.digest())
+
+
 def safe_exec(
     code,
     globals_dict,
@@ -107,7 +169,8 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    and the random seed.  If it also has a .record(slug, hit, exec_time) method
+    (see `SafeExecResultCache`), it's called to count every execution.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -116,14 +179,16 @@ def safe_exec(
 
     """
     # Check the cache for a previous result.
+    record = getattr(cache, 'record', None)
     if cache:
-        safe_globals = json_safe(globals_dict)
         md5er = hashlib.md5()
         md5er.update(repr(code).encode('utf-8'))
-        update_hash(md5er, safe_globals)
+        update_globals_hash(md5er, globals_dict)
         key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
         cached = cache.get(key)
         if cached is not None:
+            if record:
+                record(slug, True, 0)
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
             emsg, cleaned_results = cached
@@ -139,9 +204,11 @@ def safe_exec(
     if unsafely:
         exec_fn = codejail_not_safe_exec
     else:
-        exec_fn = codejail_safe_exec
+        worker_pool = get_worker_pool(WORKER_PRELOAD)
+        exec_fn = worker_pool.safe_exec if worker_pool else codejail_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
+    start_time = time.time()
     try:
         exec_fn(
             code_prolog + LAZY_IMPORTS + code, globals_dict,
@@ -153,6 +220,8 @@ def safe_exec(
         emsg = text_type(e)
     else:
         emsg = None
+    if record:
+        record(slug, False, time.time() - start_time)
 
     # Put the result back in the cache.  This is complicated by the fact that
     # the globals dict might not be entirely serializable.
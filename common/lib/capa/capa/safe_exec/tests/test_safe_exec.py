@@ -15,7 +15,8 @@ from codejail.safe_exec import SafeExecException
 from six import text_type, unichr
 from six.moves import range
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import SafeExecResultCache, safe_exec, update_hash
+from capa.safe_exec.safe_exec import update_globals_hash
 
 
 class TestSafeExec(unittest.TestCase):
@@ -239,6 +240,86 @@ class TestUpdateHash(unittest.TestCase):
         self.assertEqual(h1, h2)
 
 
+class TestUpdateGlobalsHash(unittest.TestCase):
+    """Test that safe_exec.update_globals_hash hashes what json_safe would keep."""
+
+    def hash_globals(self, globals_dict):
+        """Return the md5 hash that `update_globals_hash` makes us."""
+        md5er = hashlib.md5()
+        update_globals_hash(md5er, globals_dict)
+        return md5er.hexdigest()
+
+    def test_json_types(self):
+        h1 = self.hash_globals({'a': 1, 'b': [1.5, u'x', None, True], 'c': {u'd': (1, 2)}})
+        h2 = self.hash_globals({'c': {u'd': [1, 2]}, 'b': [1.5, u'x', None, True], 'a': 1})
+        self.assertEqual(h1, h2)
+        self.assertNotEqual(h1, self.hash_globals({'a': 1, 'b': [1.5, u'x', None, False], 'c': {u'd': [1, 2]}}))
+
+    def test_unsafe_values_skipped(self):
+        h1 = self.hash_globals({'a': 1})
+        self.assertEqual(h1, self.hash_globals({'a': 1, 'f': object(), '__builtins__': {}}))
+        self.assertEqual(h1, self.hash_globals({'a': 1, 'f': [object()]}))
+
+    def test_values_normalized_by_json(self):
+        self.assertEqual(self.hash_globals({'a': {1: 2}}), self.hash_globals({'a': {u'1': 2}}))
+        self.assertNotEqual(self.hash_globals({'a': {1: 2}}), self.hash_globals({'a': {u'1': 3}}))
+
+
+class TestSafeExecResultCache(unittest.TestCase):
+    """Test the two-level cache of safe_exec results."""
+
+    def setUp(self):
+        super(TestSafeExecResultCache, self).setUp()
+        self.shared = {}
+        self.cache = SafeExecResultCache(DictCache(self.shared), local_size=2, max_entry_size=1000)
+
+    def test_cache_miss_then_hit(self):
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=self.cache, slug='problem')
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=self.cache, slug='problem')
+        self.assertEqual(g['a'], 3)
+
+        stats = self.cache.get_stats('problem')
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+        self.assertEqual(stats.hit_rate, 0.5)
+
+    def test_shared_cache(self):
+        self.cache.set('key', (None, {'a': 3}))
+        other_cache = SafeExecResultCache(DictCache(self.shared), local_size=2)
+        self.assertEqual(other_cache.get('key'), (None, {'a': 3}))
+
+    def test_local_cache(self):
+        self.cache.set('key', (None, {'a': 3}))
+        self.shared.clear()
+        self.assertEqual(self.cache.get('key'), (None, {'a': 3}))
+
+    def test_local_cache_bounded(self):
+        for key in ('a', 'b', 'c'):
+            self.cache.set(key, (None, {}))
+        self.shared.clear()
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.get('c'), (None, {}))
+
+    def test_large_results_not_cached(self):
+        value = (None, {'a': u''.join(unichr(i) for i in range(2000))})
+        self.cache.set('key', value)
+        self.assertEqual(self.shared, {})
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_results_copied(self):
+        self.cache.set('key', (None, {'a': [1]}))
+        self.cache.get('key')[1]['a'].append(2)
+        self.assertEqual(self.cache.get('key'), (None, {'a': [1]}))
+
+    def test_metrics(self):
+        metrics = []
+        cache = SafeExecResultCache(DictCache({}), report_metric=lambda name, value: metrics.append(name))
+        safe_exec("a = 1", {}, cache=cache)
+        safe_exec("a = 1", {}, cache=cache)
+        self.assertEqual(metrics, ['safe_exec.cache.misses', 'safe_exec.exec_time', 'safe_exec.cache.hits'])
+
+
 class TestRealProblems(unittest.TestCase):
     def test_802x(self):
         code = textwrap.dedent("""\
@@ -0,0 +1,135 @@
+"""Test the pool of warm codejail sandbox workers."""
+
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import pytest
+from codejail.jail_code import is_configured
+from codejail.safe_exec import SafeExecException
+from six import text_type
+
+from capa.safe_exec.safe_exec import WORKER_PRELOAD
+from capa.safe_exec.worker_pool import WorkerPool, _get_files
+
+
+class TestGetFiles(unittest.TestCase):
+    def setUp(self):
+        super(TestGetFiles, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def test_extra_files(self):
+        files = _get_files(None, [("python_lib.zip", b"zip"), ("extra.txt", u"text")])
+        self.assertEqual(files, [("python_lib.zip", b"zip"), ("extra.txt", b"text")])
+
+    def test_python_path_in_extra_files(self):
+        files = _get_files(["python_lib.zip"], [("python_lib.zip", b"zip")])
+        self.assertEqual(files, [("python_lib.zip", b"zip")])
+
+    def test_python_path_directory(self):
+        pydir = os.path.join(self.tmpdir, "lib")
+        os.makedirs(os.path.join(pydir, "pkg"))
+        with open(os.path.join(pydir, "pkg", "mod.py"), "wb") as f:
+            f.write(b"x = 1")
+        files = _get_files([pydir], None)
+        self.assertEqual(files, [(os.path.join("lib", "pkg", "mod.py"), b"x = 1")])
+
+    def test_missing_python_path(self):
+        self.assertIsNone(_get_files([os.path.join(self.tmpdir, "missing")], None))
+
+
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        super(TestWorkerPool, self).setUp()
+        # Workers run in the sandbox, so they need CodeJail configured for python.
+        if not is_configured("python"):
+            pytest.skip()
+        self.pool = WorkerPool(1, WORKER_PRELOAD, max_executions=2)
+        self.addCleanup(self.pool.close)
+
+    def test_execution(self):
+        g = {'x': 17}
+        self.pool.safe_exec("import math\ny = x + int(math.sqrt(4))", g)
+        self.assertEqual(g['y'], 19)
+
+    def test_executions_are_isolated(self):
+        self.pool.safe_exec("import os\nos.environ['LEAK'] = '1'\nleaked = 1", {})
+        g = {}
+        self.pool.safe_exec("import os\nleaked = os.environ.get('LEAK')", g)
+        self.assertIsNone(g['leaked'])
+
+    def test_exception(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", text_type(cm.exception))
+
+    def test_cant_do_something_forbidden(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("import os; files = os.listdir('/')", {})
+        self.assertIn("Permission denied", text_type(cm.exception))
+
+    def test_cant_start_processes(self):
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec("import os; os.fork()", {})
+
+    def test_cant_reach_worker_pipes(self):
+        g = {}
+        self.pool.safe_exec(
+            "import os\n"
+            "request_size = len(os.read(0, 1024))\n"
+            "open_fds = []\n"
+            "for fd in range(64):\n"
+            "    try:\n"
+            "        os.fstat(fd)\n"
+            "        open_fds.append(fd)\n"
+            "    except OSError:\n"
+            "        pass\n",
+            g,
+        )
+        # Only stdin, stdout and stderr, all of them /dev/null, and the result pipe.
+        self.assertEqual(g['request_size'], 0)
+        self.assertEqual(len(g['open_fds']), 4)
+
+    def test_killed_child_result_ignored(self):
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec(
+                "import json, os\n"
+                "for fd in range(3, 64):\n"
+                "    try:\n"
+                "        os.write(fd, json.dumps({'status': 0, 'globals': {'forged': 1}}).encode('utf-8'))\n"
+                "    except OSError:\n"
+                "        pass\n"
+                "while True:\n"
+                "    pass\n",
+                {},
+            )
+
+    def test_worker_replaced(self):
+        for i in range(5):
+            g = {'i': i}
+            self.pool.safe_exec("j = i * 2", g)
+            self.assertEqual(g['j'], i * 2)
+
+    def test_worker_replaced_in_background(self):
+        # pylint: disable=protected-access
+        worker = self.pool._idle[0]
+        for __ in range(2):
+            self.pool.safe_exec("y = 1", {})
+        deadline = time.time() + 30
+        while not self.pool._idle and time.time() < deadline:
+            time.sleep(0.1)
+        self.assertEqual(len(self.pool._idle), 1)
+        self.assertIsNot(self.pool._idle[0], worker)
+        self.assertTrue(self.pool._idle[0]._ready)
+        self.assertIsNotNone(worker._process.returncode)
+
+    def test_falls_back_when_busy(self):
+        worker = self.pool._acquire()  # pylint: disable=protected-access
+        self.addCleanup(worker.close)
+        g = {}
+        self.pool.safe_exec("y = 1", g)
+        self.assertEqual(g['y'], 1)
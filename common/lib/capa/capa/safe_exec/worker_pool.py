@@ -0,0 +1,593 @@
+"""
+A pool of warm codejail sandbox workers for capa's safe_exec.
+
+Starting a sandboxed Python process and importing the modules that problems
+use (numpy, scipy, ...) costs much more than running a typical problem's
+code. Each worker of the pool is a long-lived Python process, started in the
+sandbox exactly like codejail starts jailed code (same interpreter, same user,
+so the same AppArmor confinement), which imports those modules once.
+
+The worker never runs problem code itself. For each execution it reads the
+request, then forks a child, which:
+
+    * closes the worker's request and answer pipes, keeping only a pipe
+      created for this execution alone,
+    * runs in a fresh temporary directory, with codejail's resource limits
+      and no way to start further processes,
+    * executes the code and writes the resulting globals back, just like
+      codejail's jailed code does,
+    * exits.
+
+So every execution still starts from a pristine interpreter that has seen
+no other execution's data, while skipping interpreter startup and imports.
+The child can neither read later requests nor answer in the worker's name:
+the worker relays the child's result only once it has reaped the child,
+tagged with the nonce of the request. The worker kills children that
+exceed the REALTIME limit, and reports the peak memory use of each child,
+which includes the pages it shares with the worker.
+
+Workers are replaced, in the background, after a number of executions or
+once the memory use of a child exceeds a ceiling. Each worker runs in its
+own process group, so that stopping it also stops the sandboxed processes
+behind its sudo wrapper. The pool is configured by the 'worker_pool' entry of the
+CODE_JAIL setting, and is disabled unless its size is set and codejail is
+configured to run Python.
+"""
+
+
+import base64
+import binascii
+import json
+import logging
+import os
+import select
+import signal
+import struct
+import subprocess
+import threading
+import time
+
+import six
+from codejail import jail_code
+from codejail.safe_exec import SafeExecException, json_safe
+from codejail.safe_exec import safe_exec as codejail_safe_exec
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_EXECUTIONS = 100
+DEFAULT_MAX_MEMORY = 256 * 1024 * 1024
+
+# Seconds to wait for a new worker to import its modules.
+STARTUP_TIMEOUT = 30
+
+# Seconds allowed for exchanging messages with a worker, on top of the
+# REALTIME limit of the execution.
+MESSAGE_TIMEOUT = 5
+
+_HEADER = struct.Struct('>I')
+
+# The code run by each worker, in the sandbox. It must run on any version of
+# Python that the sandbox may use.
+WORKER_CODE = r'''
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import struct
+import sys
+import tempfile
+import time
+import traceback
+from base64 import b64decode
+
+PRELOAD = %(preload)r
+LIMITS = %(limits)r
+
+for module_name in PRELOAD:
+    try:
+        __import__(module_name)
+    except Exception:
+        pass
+
+HEADER = struct.Struct('>I')
+STDOUT_FD = os.dup(1)
+
+
+def read_exactly(length):
+    data = b''
+    while len(data) < length:
+        chunk = os.read(0, length - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def write_message(message):
+    data = json.dumps(message).encode('utf-8')
+    data = HEADER.pack(len(data)) + data
+    while data:
+        data = data[os.write(STDOUT_FD, data):]
+
+
+def read_message():
+    header = read_exactly(HEADER.size)
+    if header is None:
+        return None
+    data = read_exactly(HEADER.unpack(header)[0])
+    if data is None:
+        return None
+    return json.loads(data.decode('utf-8'))
+
+
+class DevNull(object):
+    def write(self, *args, **kwargs):
+        pass
+
+    def flush(self, *args, **kwargs):
+        pass
+
+
+def set_limits():
+    if LIMITS.get('CPU'):
+        resource.setrlimit(resource.RLIMIT_CPU, (LIMITS['CPU'], LIMITS['CPU']))
+    if LIMITS.get('VMEM'):
+        resource.setrlimit(resource.RLIMIT_AS, (LIMITS['VMEM'], LIMITS['VMEM']))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (LIMITS.get('FSIZE') or 0, LIMITS.get('FSIZE') or 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+
+def isolate(result_fd):
+    # Leave the child nothing of the worker's but the pipe of this execution:
+    # no way to read later requests, nor to answer in the worker's name.
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    max_fd = resource.getrlimit(resource.RLIMIT_NOFILE)[1]
+    if max_fd == resource.RLIM_INFINITY or max_fd > 65536:
+        max_fd = 65536
+    os.closerange(3, result_fd)
+    os.closerange(result_fd + 1, max_fd)
+
+
+def execute(request, tmpdir, result_fd):
+    isolate(result_fd)
+    for name, content in request['files']:
+        path = os.path.join(tmpdir, name)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(b64decode(content))
+    os.chdir(tmpdir)
+    os.environ['TMPDIR'] = tmpdir
+    sys.path.insert(0, tmpdir)
+    for pydir in request['python_path']:
+        sys.path.append(pydir)
+    set_limits()
+    sys.stdout = DevNull()
+
+    def write_result(result):
+        data = json.dumps(result).encode('utf-8')
+        while data:
+            data = data[os.write(result_fd, data):]
+
+    pid = os.getpid()
+    g_dict = request['globals']
+    try:
+        exec(request['code'], g_dict)
+    except BaseException:
+        if os.getpid() != pid:
+            os._exit(1)
+        write_result({'status': 1, 'stderr': traceback.format_exc()})
+        return 1
+    if os.getpid() != pid:
+        # Only the child may answer, should the code manage to fork.
+        os._exit(1)
+
+    ok_types = (type(None), int, float, bytes, str, list, tuple, dict)
+    if sys.version_info < (3,):
+        ok_types += (long, unicode)
+    bad_keys = ('__builtins__',)
+
+    def jsonable(v):
+        if not isinstance(v, ok_types):
+            return False
+        try:
+            json.dumps(v)
+        except Exception:
+            return False
+        return True
+
+    g_dict = dict((k, v) for k, v in g_dict.items() if jsonable(v) and k not in bad_keys)
+    write_result({'status': 0, 'globals': g_dict})
+    return 0
+
+
+def supervise(pid, result_fd):
+    # Collects what the child writes, and reaps it, killing it at the
+    # REALTIME limit. The child may close its pipe and carry on, so reading
+    # up to EOF doesn't mean the child has exited.
+    deadline = time.time() + LIMITS['REALTIME'] if LIMITS.get('REALTIME') else None
+    chunks = []
+    eof = False
+    while True:
+        child_pid, status, usage = os.wait4(pid, os.WNOHANG)
+        if child_pid:
+            break
+        if deadline is not None and time.time() > deadline:
+            os.kill(pid, signal.SIGKILL)
+            child_pid, status, usage = os.wait4(pid, 0)
+            break
+        if eof:
+            time.sleep(0.005)
+        elif select.select([result_fd], [], [], 0.005)[0]:
+            chunk = os.read(result_fd, 65536)
+            if chunk:
+                chunks.append(chunk)
+            else:
+                eof = True
+    # The child is gone, so the rest of its output, if any, is buffered.
+    while not eof:
+        chunk = os.read(result_fd, 65536)
+        if chunk:
+            chunks.append(chunk)
+        else:
+            eof = True
+    os.close(result_fd)
+    return status, usage, b''.join(chunks)
+
+
+def run():
+    os.dup2(os.open(os.devnull, os.O_WRONLY), 1)
+    write_message({'ready': True})
+    while True:
+        request = read_message()
+        if request is None:
+            return
+        tmpdir = tempfile.mkdtemp(prefix='codejail-')
+        result_read_fd, result_write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                os.close(result_read_fd)
+                status = execute(request, tmpdir, result_write_fd)
+            finally:
+                os._exit(status)
+
+        os.close(result_write_fd)
+        status, usage, result = supervise(pid, result_read_fd)
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        if not os.WIFEXITED(status):
+            # Whatever a killed child wrote doesn't count.
+            result = None
+
+        write_message({
+            'nonce': request['nonce'],
+            'exit_status': status,
+            'maxrss': usage.ru_maxrss * 1024,
+            'result': result.decode('utf-8', 'replace') if result else None,
+        })
+
+run()
+'''
+
+
+class WorkerError(Exception):
+    """
+    Raised when a worker fails to answer as expected, in which case the
+    worker is discarded.
+    """
+    pass
+
+
+class SandboxWorker(object):
+    """
+    A warm sandbox worker process.
+    """
+    def __init__(self, preload):
+        self.executions = 0
+        self.maxrss = 0
+        self._ready = False
+        self._process = subprocess.Popen(
+            self._get_command(preload),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env={},
+            close_fds=True,
+            start_new_session=True,
+        )
+
+    @staticmethod
+    def _get_command(preload):
+        """
+        Returns the command line starting a worker, built like codejail
+        builds the command line of jailed code.
+        """
+        command = []
+        python = jail_code.COMMANDS['python']
+        if python['user']:
+            command.extend(['sudo', '-u', python['user']])
+        command.extend(python['cmdline_start'])
+        limits = {name: jail_code.LIMITS.get(name) for name in ('CPU', 'VMEM', 'FSIZE', 'REALTIME')}
+        command.extend(['-c', WORKER_CODE % {'preload': list(preload), 'limits': limits}])
+        return command
+
+    def wait_until_ready(self):
+        """
+        Waits for the worker to import its modules, or raises WorkerError if
+        it doesn't in time.
+        """
+        if not self._ready:
+            self._read_message(time.time() + STARTUP_TIMEOUT)
+            self._ready = True
+
+    def execute(self, code, globals_dict, python_path, files):
+        """
+        Executes code with the given globals in a fresh child of the worker,
+        and returns the execution's result message.
+        """
+        self.wait_until_ready()
+
+        self.executions += 1
+        nonce = binascii.hexlify(os.urandom(16)).decode('ascii')
+        request = json.dumps({
+            'nonce': nonce,
+            'code': code,
+            'globals': json_safe(globals_dict),
+            'python_path': python_path,
+            'files': [(name, base64.b64encode(content).decode('ascii')) for name, content in files],
+        }).encode('utf-8')
+        try:
+            self._process.stdin.write(_HEADER.pack(len(request)) + request)
+            self._process.stdin.flush()
+        except (IOError, OSError) as exception:
+            raise WorkerError(u'Could not send the execution to the worker: {}'.format(exception))
+
+        deadline = time.time() + (jail_code.LIMITS.get('REALTIME') or 0) + MESSAGE_TIMEOUT
+        message = self._read_message(deadline)
+        if message.get('nonce') != nonce:
+            raise WorkerError(u'The worker answered another execution.')
+        self.maxrss = message['maxrss']
+        return _parse_result(message['result'], message['exit_status'])
+
+    def is_exhausted(self, max_executions, max_memory):
+        """
+        Returns whether the worker is to be replaced, given the peak memory
+        use of its last child.
+        """
+        return self.executions >= max_executions or self.maxrss > max_memory
+
+    def close(self):
+        """
+        Stops the worker, its sudo wrapper and any child it is running.
+        """
+        try:
+            self._process.stdin.close()
+        except (IOError, OSError):
+            pass
+        # The wrapper leads the process group, which lives on until its last
+        # process exits, so its id can't have been reused yet.
+        try:
+            os.killpg(self._process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self._process.wait()
+
+    def _read_message(self, deadline):
+        """
+        Returns the next message sent by the worker, or raises WorkerError
+        if none is received before the deadline.
+        """
+        header = self._read_exactly(_HEADER.size, deadline)
+        return json.loads(self._read_exactly(_HEADER.unpack(header)[0], deadline).decode('utf-8'))
+
+    def _read_exactly(self, length, deadline):
+        """
+        Reads length bytes from the worker, before the deadline.
+        """
+        fd = self._process.stdout.fileno()
+        data = b''
+        while len(data) < length:
+            timeout = deadline - time.time()
+            if timeout <= 0 or not select.select([fd], [], [], timeout)[0]:
+                raise WorkerError(u'Timed out waiting for the worker.')
+            chunk = os.read(fd, length - len(data))
+            if not chunk:
+                raise WorkerError(u'The worker exited unexpectedly.')
+            data += chunk
+        return data
+
+
+class WorkerPool(object):
+    """
+    A thread-safe pool of warm sandbox workers.
+    """
+    def __init__(self, size, preload, max_executions=DEFAULT_MAX_EXECUTIONS, max_memory=DEFAULT_MAX_MEMORY):
+        self.size = size
+        self.preload = preload
+        self.max_executions = max_executions
+        self.max_memory = max_memory
+        self._lock = threading.Lock()
+        self._closed = False
+        self._idle = [SandboxWorker(preload) for __ in range(size)]
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Executes code like codejail.safe_exec.safe_exec, in a warm worker if
+        one is idle, else with codejail.
+        """
+        files = _get_files(python_path, extra_files)
+        worker = self._acquire() if files is not None else None
+        if worker is None:
+            return codejail_safe_exec(
+                code, globals_dict, python_path=python_path, extra_files=extra_files, slug=slug,
+            )
+
+        try:
+            result = worker.execute(code, globals_dict, [os.path.basename(pydir) for pydir in python_path or ()], files)
+        except WorkerError as exception:
+            log.warning(u'Discarding codejail worker for %s: %s', slug, exception)
+            self._replace(worker)
+            raise SafeExecException(u"Couldn't execute jailed code: {}".format(exception))
+        self._release(worker)
+
+        if result['status'] != 0:
+            raise SafeExecException((
+                u"Couldn't execute jailed code: stdout: {stdout!r}, "
+                u"stderr: {stderr!r} with status code: {status}"
+            ).format(stdout=b'', stderr=result['stderr'].encode('utf-8'), status=result['status']))
+        globals_dict.update(result['globals'])
+
+    def close(self):
+        """
+        Stops all idle workers, and any worker still warming up once it is
+        ready.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.close()
+
+    def _acquire(self):
+        """
+        Returns an idle worker, or None.
+        """
+        with self._lock:
+            return self._idle.pop() if self._idle else None
+
+    def _release(self, worker):
+        """
+        Returns the worker to the pool, or replaces it if it's exhausted.
+        """
+        if worker.is_exhausted(self.max_executions, self.max_memory):
+            self._replace(worker)
+        else:
+            with self._lock:
+                self._idle.append(worker)
+
+    def _replace(self, worker):
+        """
+        Stops the worker, and warms a new one in its place, in the
+        background so that the current execution doesn't wait for either.
+        Executions fall back to codejail until the new worker is ready.
+        """
+        thread = threading.Thread(target=self._warm_replacement, args=(worker,), name='codejail-worker-pool')
+        thread.daemon = True
+        thread.start()
+
+    def _warm_replacement(self, worker):
+        """
+        Stops the worker, then starts a new one and adds it to the idle
+        workers once it has imported its modules.
+        """
+        worker.close()
+        try:
+            new_worker = SandboxWorker(self.preload)
+        except (IOError, OSError):
+            log.exception(u'Could not start a codejail worker.')
+            return
+        try:
+            new_worker.wait_until_ready()
+        except WorkerError as exception:
+            log.warning(u'Discarding codejail worker that failed to start: %s', exception)
+            new_worker.close()
+            return
+        with self._lock:
+            if not self._closed:
+                self._idle.append(new_worker)
+                return
+        new_worker.close()
+
+
+def _parse_result(result, exit_status):
+    """
+    Returns the result message written by the child of an execution, or a
+    failed result if the child, which ran the jailed code, wrote no valid
+    one (say, because it was killed for exceeding a limit).
+    """
+    try:
+        result = json.loads(result) if result is not None else None
+    except ValueError:
+        result = None
+    if isinstance(result, dict):
+        if result.get('status') == 0 and isinstance(result.get('globals'), dict):
+            return result
+        if result.get('status') not in (0, None) and isinstance(result.get('stderr'), six.string_types):
+            return result
+    return {'status': exit_status or 1, 'stderr': u''}
+
+
+def _get_files(python_path, extra_files):
+    """
+    Returns the (name, content) pairs of the files to create for an
+    execution, like codejail creates them: the extra_files, and copies of
+    the python_path entries that aren't among them.
+
+    Returns None if a python_path entry can't be copied.
+    """
+    files = list(extra_files or ())
+    names = set(name for name, __ in files)
+    for pydir in python_path or ():
+        name = os.path.basename(pydir)
+        if name in names:
+            continue
+        if os.path.isfile(pydir):
+            with open(pydir, 'rb') as f:
+                files.append((name, f.read()))
+        elif os.path.isdir(pydir):
+            for dirpath, __, filenames in os.walk(pydir):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    with open(path, 'rb') as f:
+                        files.append((os.path.join(name, os.path.relpath(path, pydir)), f.read()))
+        else:
+            return None
+    return [(name, content if isinstance(content, bytes) else content.encode('utf-8')) for name, content in files]
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_worker_pool(preload):
+    """
+    Returns the process's worker pool, creating it on first use, or None if
+    the pool is disabled.
+    """
+    global _POOL  # pylint: disable=global-statement
+    if _POOL is not None:
+        return _POOL
+    if not jail_code.is_configured('python'):
+        return None
+
+    config = _get_config()
+    if not config.get('size'):
+        return None
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = WorkerPool(
+                config['size'],
+                preload,
+                max_executions=config.get('max_executions', DEFAULT_MAX_EXECUTIONS),
+                max_memory=config.get('max_memory', DEFAULT_MAX_MEMORY),
+            )
+    return _POOL
+
+
+def _get_config():
+    """
+    Returns the 'worker_pool' entry of the CODE_JAIL setting, if Django is
+    configured.
+    """
+    try:
+        from django.conf import settings
+        if not settings.configured:
+            return {}
+        return getattr(settings, 'CODE_JAIL', {}).get('worker_pool') or {}
+    except ImportError:
+        return {}
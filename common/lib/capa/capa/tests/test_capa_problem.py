@@ -12,6 +12,7 @@ from lxml import etree
 from markupsafe import Markup
 from mock import patch
 
+from capa.capa_problem import LoncapaProblem, ProblemTemplate
 from capa.responsetypes import LoncapaProblemError
 from capa.tests.helpers import new_loncapa_problem
 from openedx.core.djangolib.markup import HTML
@@ -789,3 +790,68 @@ class CAPAProblemReportHelpersTest(unittest.TestCase):
         # Ensure that the answer is a string so that the dict returned from this
         # function can eventualy be serialized to json without issues.
         self.assertIsInstance(problem.get_question_answers()['1_solution_1'], six.text_type)
+
+
+class ProblemTemplateTest(unittest.TestCase):
+    """
+    Tests for reusing the parsed XML of problems.
+    """
+    xml = textwrap.dedent("""
+        <problem>
+            <script type="loncapa/python">
+        answer = str(random.randint(0, 1000))
+            </script>
+            <stringresponse answer="$answer" type="ci">
+                <label>What is the number?</label>
+                <textline size="40"/>
+            </stringresponse>
+        </problem>
+    """)
+
+    def setUp(self):
+        super(ProblemTemplateTest, self).setUp()
+        ProblemTemplate.clear_cache()
+        self.addCleanup(ProblemTemplate.clear_cache)
+
+    def patch_parse(self):
+        """
+        Returns a context manager counting the times problem XML is parsed.
+        """
+        return patch.object(LoncapaProblem, '_parse', autospec=True, side_effect=LoncapaProblem._parse)
+
+    def test_parsed_once(self):
+        with self.patch_parse() as mock_parse:
+            new_loncapa_problem(self.xml, seed=1)
+            new_loncapa_problem(self.xml, seed=2)
+        self.assertEqual(mock_parse.call_count, 1)
+
+    def test_parsed_per_problem_id(self):
+        with self.patch_parse() as mock_parse:
+            new_loncapa_problem(self.xml, problem_id='1')
+            problem = new_loncapa_problem(self.xml, problem_id='2')
+        self.assertEqual(mock_parse.call_count, 2)
+        self.assertEqual(problem.get_answer_ids(), [['2_2_1']])
+
+    def test_includes_not_cached(self):
+        xml = '<problem><include file="test_files/include.xml"/></problem>'
+        with patch.object(LoncapaProblem, '_process_includes'), self.patch_parse() as mock_parse:
+            new_loncapa_problem(xml)
+            new_loncapa_problem(xml)
+        self.assertEqual(mock_parse.call_count, 2)
+
+    def test_seed_applied_to_copy(self):
+        problems = [new_loncapa_problem(self.xml, seed=seed) for seed in (1, 2, 1)]
+        answers = [problem.context['answer'] for problem in problems]
+        self.assertEqual(answers[0], answers[2])
+        self.assertNotEqual(answers[0], answers[1])
+        self.assertEqual(
+            [list(problem.responders.values())[0].correct_answer for problem in problems],
+            [[answer] for answer in answers],
+        )
+        self.assertIsNot(problems[0].tree, problems[2].tree)
+
+    def test_cached_problem_unchanged(self):
+        first = new_loncapa_problem(self.xml)
+        first_html = first.get_html()
+        first.tree.clear()
+        self.assertEqual(new_loncapa_problem(self.xml).get_html(), first_html)
@@ -13,8 +13,10 @@ from bson.son import SON
 from fs.osfs import OSFS
 from gridfs.errors import NoFile, FileExists
 from mongodb_proxy import autoretry_read
+from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import AssetKey
 
+from openedx.core.djangoapps.contentserver.caching import del_cached_content
 from xmodule.contentstore.content import XASSET_LOCATION_TAG
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore.django import ASSET_IGNORE_REGEX
@@ -90,7 +92,7 @@ class MongoContentStore(ContentStore):
         # The way to version files in gridFS is to not use the file id as the _id but just as the filename.
         # Then you can upload as many versions as you like and access by date or version. Because we use
         # the location as the _id, we must delete before adding (there's no replace method in gridFS)
-        self.delete(content_id)  # delete is a noop if the entry doesn't exist; so, don't waste time checking
+        self.fs.delete(content_id)  # delete is a noop if the entry doesn't exist; so, don't waste time checking
 
         thumbnail_location = content.thumbnail_location.to_deprecated_list_repr() if content.thumbnail_location else None
         with self.fs.new_file(_id=content_id, filename=six.text_type(content.location), content_type=content.content_type,
@@ -115,6 +117,7 @@ class MongoContentStore(ContentStore):
                 else:
                     fp.write(content.data)
 
+        del_cached_content(content.location)
         return content
 
     def delete(self, location_or_id):
@@ -122,9 +125,15 @@ class MongoContentStore(ContentStore):
         Delete an asset.
         """
         if isinstance(location_or_id, AssetKey):
+            location = location_or_id
             location_or_id, _ = self.asset_db_key(location_or_id)
+        else:
+            asset = self.fs_files.find_one({'_id': location_or_id}, {'filename': 1})
+            location = self._asset_key_from_filename(asset['filename']) if asset else None
         # Deletes of non-existent files are considered successful
         self.fs.delete(location_or_id)
+        if location is not None:
+            del_cached_content(location)
 
     @autoretry_read()
     def find(self, location, throw_on_not_found=True, as_stream=False):
@@ -247,6 +256,7 @@ class MongoContentStore(ContentStore):
             items = self.fs_files.find(query)
             for asset in items:
                 self.fs.delete(asset[prefix])
+                self._del_cached_asset(asset)
                 assets_to_delete += 1
 
             self.fs_files.remove(query)
@@ -383,6 +393,7 @@ class MongoContentStore(ContentStore):
         result = self.fs_files.update_one({'_id': asset_db_key}, {"$set": attr_dict}, upsert=False)
         if result.matched_count == 0:
             raise NotFoundError(asset_db_key)
+        del_cached_content(location)
 
     @autoretry_read()
     def get_attrs(self, location):
@@ -436,6 +447,7 @@ class MongoContentStore(ContentStore):
             except FileExists:
                 self.fs.delete(file_id=asset_id)
                 self.create_asset(source_content, asset_id, asset, asset_key)
+            del_cached_content(dest_course_key.make_asset_key(asset_key['category'], asset_key['name']))
 
     def create_asset(self, source_content, asset_id, asset, asset_key):
         """
@@ -469,6 +481,26 @@ class MongoContentStore(ContentStore):
         for asset in matching_assets:
             asset_key = self.make_id_son(asset)
             self.fs.delete(asset_key)
+            self._del_cached_asset(asset)
+
+    def _del_cached_asset(self, asset):
+        """
+        Removes the cached content and metadata of the given fs.files entry, so that the
+        contentserver doesn't keep serving it after it's deleted or replaced.
+        """
+        location = self._asset_key_from_filename(asset.get('filename'))
+        if location is not None:
+            del_cached_content(location)
+
+    @staticmethod
+    def _asset_key_from_filename(filename):
+        """
+        Returns the AssetKey stored as the filename of an fs.files entry, or None if it isn't one.
+        """
+        try:
+            return AssetKey.from_string(filename)
+        except (InvalidKeyError, TypeError):
+            return None
 
     # codifying the original order which pymongo used for the dicts coming out of location_to_dict
     # stability of order is more important than sanity of order as any changes to order make things
@@ -7,7 +7,9 @@ import datetime
 import logging
 import math
 import re
+import threading
 import zlib
+from collections import OrderedDict
 from contextlib import contextmanager
 from time import time
 
@@ -26,6 +28,7 @@ from xmodule.modulestore.split_mongo import BlockKey
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -204,13 +207,113 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class StructureLRUCache(object):
+    """
+    A thread-safe, process-local LRU cache of deserialized course structures.
+
+    Entries are weighed by the size of their pickled representation, and the
+    least recently used entries are evicted once the total weight exceeds
+    ``max_bytes``. Because structures are keyed by their immutable version id,
+    entries can never go stale.
+
+    The same structure object is handed out to every caller, so callers must
+    treat it as read-only (the split modulestore already copies a structure via
+    ``version_structure`` before modifying it).
+    """
+    def __init__(self, max_bytes=0):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the structure cached for ``key``, or None if it isn't cached.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            # Re-insert the entry so that it becomes the most recently used.
+            self._entries[key] = entry
+            return entry[0]
+
+    def set(self, key, structure, size):
+        """
+        Cache ``structure`` under ``key``, with a weight of ``size`` bytes.
+
+        Structures that are larger than the whole cache are not stored.
+        """
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (structure, size)
+            self.current_bytes += size
+            self._evict()
+
+    def resize(self, max_bytes):
+        """
+        Change the maximum size of the cache, evicting entries if necessary.
+        """
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """
+        Remove all entries from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self):
+        """
+        Evict least recently used entries until the cache fits in ``max_bytes``.
+
+        Must be called with ``self._lock`` held.
+        """
+        while self.current_bytes > self.max_bytes and self._entries:
+            __, (__, size) = self._entries.popitem(last=False)
+            self.current_bytes -= size
+
+
+_LOCAL_STRUCTURE_CACHE = StructureLRUCache()
+
+
+def get_local_structure_cache():
+    """
+    Return the process-local structure cache, or None if it is disabled.
+
+    The tier is sized by the ``COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES`` setting,
+    and is disabled if that setting is missing or 0.
+    """
+    max_bytes = getattr(settings, 'COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES', 0) if DJANGO_AVAILABLE else 0
+    if not max_bytes:
+        return None
+
+    if _LOCAL_STRUCTURE_CACHE.max_bytes != max_bytes:
+        _LOCAL_STRUCTURE_CACHE.resize(max_bytes)
+    return _LOCAL_STRUCTURE_CACHE
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
     The course structures are pickled and compressed when cached.
 
-    If the 'course_structure_cache' doesn't exist, then don't do anything for
-    for set and get.
+    Structures are additionally kept, already deserialized, in a bounded
+    process-local tier (see :class:`StructureLRUCache`) in front of the django
+    cache, so that hot structures aren't repeatedly decompressed and unpickled.
+
+    If neither the 'course_structure_cache' nor the process-local tier is
+    configured, then don't do anything for set and get.
     """
     def __init__(self):
         self.cache = None
@@ -219,9 +322,15 @@ class CourseStructureCache(object):
                 self.cache = get_cache('course_structure_cache')
             except InvalidCacheBackendError:
                 pass
+        self.local_cache = get_local_structure_cache()
 
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
+        if self.local_cache is not None:
+            structure = self.local_cache.get(key)
+            if structure is not None:
+                return structure
+
         if self.cache is None:
             return None
 
@@ -241,24 +350,34 @@ class CourseStructureCache(object):
                 tagger.measure('uncompressed_size', len(pickled_data))
 
                 if six.PY2:
-                    return pickle.loads(pickled_data)
+                    structure = pickle.loads(pickled_data)
                 else:
-                    return pickle.loads(pickled_data, encoding='latin-1')
+                    structure = pickle.loads(pickled_data, encoding='latin-1')
             except Exception:
                 # The cached data is corrupt in some way, get rid of it.
                 log.warning("CourseStructureCache: Bad data in cache for %s", course_context)
                 self.cache.delete(key)
                 return None
 
+        if self.local_cache is not None:
+            self.local_cache.set(key, structure, len(pickled_data))
+        return structure
+
     def set(self, key, structure, course_context=None):
         """Given a structure, will pickle, compress, and write to cache."""
-        if self.cache is None:
+        if self.cache is None and self.local_cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
             pickled_data = pickle.dumps(structure, 4)  # Protocol can't be incremented until cache is cleared
             tagger.measure('uncompressed_size', len(pickled_data))
 
+            if self.local_cache is not None:
+                self.local_cache.set(key, structure, len(pickled_data))
+
+            if self.cache is None:
+                return None
+
             # 1 = Fastest (slightly larger results)
             compressed_pickled_data = zlib.compress(pickled_data, 1)
             tagger.measure('compressed_size', len(compressed_pickled_data))
@@ -337,36 +337,81 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         :param xblock: the block to check
         :return: True if the draft and published versions differ
         """
-        def get_course(branch_name):
-            return self._lookup_course(xblock.location.course_key.for_branch(branch_name)).structure
-
-        def get_block(course_structure, block_key):
-            return self._get_block_from_structure(course_structure, block_key)
-
-        draft_course = get_course(ModuleStoreEnum.BranchName.draft)
-        published_course = get_course(ModuleStoreEnum.BranchName.published)
-
-        def has_changes_subtree(block_key):
-            draft_block = get_block(draft_course, block_key)
-            if draft_block is None:  # temporary fix for bad pointers TNL-1141
-                return True
-            published_block = get_block(published_course, block_key)
-            if published_block is None:
-                return True
-
-            # check if the draft has changed since the published was created
-            if self._get_version(draft_block) != self._get_version(published_block):
-                return True
-
-            # check the children in the draft
-            if 'children' in draft_block.fields:
-                return any(
-                    [has_changes_subtree(child_block_id) for child_block_id in draft_block.fields['children']]
+        course_key = xblock.location.course_key
+        draft_course = self._lookup_course(course_key.for_branch(ModuleStoreEnum.BranchName.draft)).structure
+        published_course = self._lookup_course(course_key.for_branch(ModuleStoreEnum.BranchName.published)).structure
+        block_key = BlockKey.from_usage_key(xblock.location)
+        return self._get_subtree_changes(course_key, draft_course, published_course, block_key).get(block_key, True)
+
+    def _get_subtree_changes(self, course_key, draft_structure, published_structure, block_key):
+        """
+        Return a dict mapping the keys of draft blocks, including block_key,
+        to whether their subtree differs between the draft and published
+        structures.
+
+        The changes of all the blocks of the structures are computed at once,
+        and cached for the request by the version ids of the structures, so
+        that checking every block of a course outline doesn't walk the same
+        subtrees over and over.  Structures being edited in a bulk operation
+        keep their version id, so only the subtree under block_key is
+        checked for those.
+        """
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        if self.request_cache is None or (bulk_write_record.active and bulk_write_record.dirty_branches):
+            return self._diff_structures(draft_structure, published_structure, [block_key])
+
+        cache_key = (draft_structure['_id'], published_structure['_id'])
+        subtree_changes_cache = self.request_cache.data.setdefault('subtree_changes_cache', {})
+        if cache_key not in subtree_changes_cache:
+            subtree_changes_cache[cache_key] = self._diff_structures(
+                draft_structure, published_structure, list(draft_structure['blocks'].keys())
+            )
+        return subtree_changes_cache[cache_key]
+
+    def _diff_structures(self, draft_structure, published_structure, root_keys):
+        """
+        Return a dict mapping the keys of the draft blocks under root_keys,
+        and of root_keys themselves, to whether their subtree differs
+        between the draft and published structures.
+
+        Blocks are visited once each, children before their parents.
+        """
+        changes = {}
+        visiting = set()
+        for root_key in root_keys:
+            stack = [root_key]
+            while stack:
+                block_key = stack[-1]
+                if block_key in changes:
+                    stack.pop()
+                    continue
+
+                draft_block = self._get_block_from_structure(draft_structure, block_key)
+                if draft_block is None:  # temporary fix for bad pointers TNL-1141
+                    changes[block_key] = True
+                    stack.pop()
+                    continue
+
+                children = draft_block.fields.get('children', [])
+                if block_key not in visiting:
+                    visiting.add(block_key)
+                    # Skip children that are also ancestors, should the structure have a cycle.
+                    stack.extend(
+                        child_key for child_key in children if child_key not in changes and child_key not in visiting
+                    )
+                    continue
+
+                stack.pop()
+                visiting.discard(block_key)
+                published_block = self._get_block_from_structure(published_structure, block_key)
+                changes[block_key] = (
+                    published_block is None or
+                    # check if the draft has changed since the published was created
+                    self._get_version(draft_block) != self._get_version(published_block) or
+                    # check the children in the draft
+                    any(changes.get(child_key, False) for child_key in children)
                 )
-
-            return False
-
-        return has_changes_subtree(BlockKey.from_usage_key(xblock.location))
+        return changes
 
     def publish(self, location, user_id, blacklist=None, **kwargs):
         """
@@ -920,6 +920,34 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
             # Check the parent for changes should return True and not throw an exception
             self.assertTrue(self.store.has_changes(parent))
 
+    def test_has_changes_compares_structures_once(self):
+        """
+        Tests that has_changes() compares the draft and published structures of a split course once for all its
+        blocks, until either structure changes.
+        """
+        locations = self.setup_has_changes(ModuleStoreEnum.Type.split)
+        split_store = self.store._get_modulestore_by_type(ModuleStoreEnum.Type.split)  # pylint: disable=protected-access
+        split_store.request_cache.data.pop('subtree_changes_cache', None)
+        items = {key: self.store.get_item(location) for key, location in six.iteritems(locations)}
+
+        with patch.object(split_store, '_diff_structures', wraps=split_store._diff_structures) as mock_diff:
+            for item in six.itervalues(items):
+                self.assertFalse(self.store.has_changes(item))
+            self.assertEqual(mock_diff.call_count, 1)
+
+            # Change the child
+            child = items['child']
+            child.display_name = 'Changed Display Name'
+            self.store.update_item(child, self.user_id)
+
+            # All ancestors should have changes, but not siblings
+            self.assertTrue(self._has_changes(locations['grandparent']))
+            self.assertTrue(self._has_changes(locations['parent']))
+            self.assertTrue(self._has_changes(locations['child']))
+            self.assertFalse(self._has_changes(locations['parent_sibling']))
+            self.assertFalse(self._has_changes(locations['child_sibling']))
+            self.assertEqual(mock_diff.call_count, 2)
+
     # Draft
     #   Find: find parents (definition.children query), get parent, get course (fill in run?),
     #         find parents of the parent (course), get inheritance items,
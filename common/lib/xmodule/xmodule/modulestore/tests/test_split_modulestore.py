@@ -15,6 +15,7 @@ import six
 from ccx_keys.locator import CCXBlockUsageLocator
 from contracts import contract
 from django.core.cache import InvalidCacheBackendError, caches
+from django.test.utils import override_settings
 from mock import patch
 from opaque_keys.edx.locator import BlockUsageLocator, CourseKey, CourseLocator, LocalId, VersionTree
 from path import Path as path
@@ -36,6 +37,7 @@ from xmodule.modulestore.exceptions import (
 )
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import _LOCAL_STRUCTURE_CACHE, StructureLRUCache
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.factories import check_mongo_calls
 from xmodule.modulestore.tests.mongo_connection import MONGO_HOST, MONGO_PORT_NUM
@@ -1013,6 +1015,41 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @override_settings(COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES=10 * 1024 * 1024)
+    def test_local_structure_cache(self):
+        _LOCAL_STRUCTURE_CACHE.clear()
+        self.addCleanup(_LOCAL_STRUCTURE_CACHE.clear)
+
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        # The django cache is a dummy cache, so this must come from the process-local tier
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+
+        # The process-local tier hands out the same, shared structure
+        self.assertIs(cached_structure, not_cached_structure)
+
+    @override_settings(COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES=10 * 1024 * 1024)
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_local_structure_cache_filled_from_django_cache(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        _LOCAL_STRUCTURE_CACHE.clear()
+        self.addCleanup(_LOCAL_STRUCTURE_CACHE.clear)
+
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        # Simulate a fresh process, which only has the django cache warm
+        _LOCAL_STRUCTURE_CACHE.clear()
+        with check_mongo_calls(0):
+            first_structure = self._get_structure(self.new_course)
+        with check_mongo_calls(0):
+            second_structure = self._get_structure(self.new_course)
+
+        self.assertEqual(first_structure, not_cached_structure)
+        self.assertIs(first_structure, second_structure)
+
     def _get_structure(self, course):
         """
         Helper function to get a structure from a course.
@@ -1022,6 +1059,52 @@ class TestCourseStructureCache(SplitModuleTest):
         )
 
 
+class TestStructureLRUCache(unittest.TestCase):
+    """Tests for the process-local StructureLRUCache"""
+
+    def test_get_missing(self):
+        cache = StructureLRUCache(100)
+        self.assertIsNone(cache.get('missing'))
+
+    def test_evicts_by_size(self):
+        cache = StructureLRUCache(100)
+        cache.set('a', {'id': 'a'}, 40)
+        cache.set('b', {'id': 'b'}, 40)
+        # Touch 'a' so that 'b' is the least recently used entry
+        self.assertEqual(cache.get('a'), {'id': 'a'})
+
+        cache.set('c', {'id': 'c'}, 40)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), {'id': 'a'})
+        self.assertEqual(cache.get('c'), {'id': 'c'})
+        self.assertEqual(cache.current_bytes, 80)
+
+    def test_oversized_entry_not_stored(self):
+        cache = StructureLRUCache(100)
+        cache.set('a', {'id': 'a'}, 40)
+        cache.set('big', {'id': 'big'}, 101)
+        self.assertIsNone(cache.get('big'))
+        self.assertEqual(cache.get('a'), {'id': 'a'})
+        self.assertEqual(cache.current_bytes, 40)
+
+    def test_replace_entry(self):
+        cache = StructureLRUCache(100)
+        cache.set('a', {'id': 'a'}, 40)
+        cache.set('a', {'id': 'a2'}, 30)
+        self.assertEqual(cache.get('a'), {'id': 'a2'})
+        self.assertEqual(cache.current_bytes, 30)
+        self.assertEqual(len(cache), 1)
+
+    def test_resize(self):
+        cache = StructureLRUCache(100)
+        cache.set('a', {'id': 'a'}, 40)
+        cache.set('b', {'id': 'b'}, 40)
+        cache.resize(50)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), {'id': 'b'})
+        self.assertEqual(cache.current_bytes, 40)
+
+
 class SplitModuleItemTests(SplitModuleTest):
     '''
     Item read tests including inheritance
@@ -88,6 +88,19 @@ class FakeGridFsItem(object):
         return chunk
 
 
+class FakeGridFsChunkedItem(FakeGridFsItem):
+    """
+    This class also provides reading a GridFS item chunk by chunk
+    """
+    chunk_size = 256
+
+    def readchunk(self):
+        """
+        Read the rest of the chunk at position cursor and move the cursor
+        """
+        return self.read(self.chunk_size - self.cursor % self.chunk_size)
+
+
 class MockImage(Mock):
     """
     This class pretends to be PIL.Image for purposes of thumbnails testing.
@@ -216,6 +229,28 @@ class ContentTest(unittest.TestCase):
 
         self.assertEqual(total_length, last_byte - first_byte + 1)
 
+    @ddt.data(FakeGridFsItem, FakeGridFsChunkedItem)
+    def test_static_content_stream_stream_data_in_range_bytes(self, item_class):
+        """
+        Test StaticContentStream stream_data_in_range function,
+        asserts that we get exactly the requested bytes, whether or not
+        the stream is read chunk by chunk
+        """
+        data = SAMPLE_STRING
+        item = item_class(data)
+        static_content_stream = StaticContentStream('loc', 'name', 'type', item, length=item.length)
+
+        self.assertEqual(''.join(static_content_stream.stream_data()), data)
+        self.assertEqual(''.join(static_content_stream.stream_data_in_range(100, 1500)), data[100:1501])
+
+    def test_static_content_stream_data_in_range(self):
+        """
+        Test StaticContent stream_data_in_range function,
+        asserts that we get exactly the requested bytes
+        """
+        static_content = StaticContent('loc', 'name', 'type', SAMPLE_STRING)
+        self.assertEqual(''.join(static_content.stream_data_in_range(100, 1500)), SAMPLE_STRING[100:1501])
+
     def test_static_content_write_js(self):
         """
         Test that only one filename starts with 000.
@@ -1,12 +1,19 @@
 
 
 import re
+import threading
 
 import six
+from capa.safe_exec import SafeExecResultCache
 from django.conf import settings
+from django.core.cache import cache
+from edx_django_utils import monitoring as monitoring_utils
 
 DEFAULT_PYTHON_LIB_FILENAME = 'python_lib.zip'
 
+_SAFE_EXEC_CACHE = None
+_SAFE_EXEC_CACHE_LOCK = threading.Lock()
+
 
 def can_execute_unsafe_code(course_id):
     """
@@ -42,3 +49,23 @@ def get_python_lib_zip(contentstore, course_id):
         return zip_lib.data
     else:
         return None
+
+
+def get_safe_exec_cache():
+    """
+    Return the process's cache of sandboxed code execution results.
+
+    Results are kept in-process (up to SAFE_EXEC_CACHE_LOCAL_SIZE of them) in
+    front of the default cache, and executions are reported as custom
+    monitoring metrics.
+    """
+    global _SAFE_EXEC_CACHE  # pylint: disable=global-statement
+    with _SAFE_EXEC_CACHE_LOCK:
+        if _SAFE_EXEC_CACHE is None:
+            _SAFE_EXEC_CACHE = SafeExecResultCache(
+                cache,
+                local_size=getattr(settings, 'SAFE_EXEC_CACHE_LOCAL_SIZE', 0),
+                max_entry_size=getattr(settings, 'SAFE_EXEC_CACHE_MAX_ENTRY_SIZE', 512 * 1024),
+                report_metric=monitoring_utils.accumulate,
+            )
+        return _SAFE_EXEC_CACHE
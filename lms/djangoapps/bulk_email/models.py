@@ -4,6 +4,9 @@ Models for bulk email
 
 
 import logging
+import re
+import string
+from functools import partial
 
 import markupsafe
 import six
@@ -433,6 +436,169 @@ class CourseEmailTemplate(models.Model):
                 context[key] = markupsafe.escape(value)
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def compile_plaintext(self, plaintext, context, recipient_keys):
+        """
+        Create a plain text message to render for many recipients.
+
+        Like `render_plaintext`, except that the context values named in
+        `recipient_keys` are left out of `context`, and are instead passed
+        for each recipient to the `render` method of the returned
+        CompiledEmailTemplate.
+        """
+        return CompiledEmailTemplate(self.plain_template, plaintext, context, recipient_keys)
+
+    def compile_htmltext(self, htmltext, context, recipient_keys):
+        """
+        Create an HTML text message to render for many recipients.
+
+        Like `render_htmltext`, except that the context values named in
+        `recipient_keys` are left out of `context`, and are instead passed
+        for each recipient to the `render` method of the returned
+        CompiledEmailTemplate.
+        """
+        return CompiledEmailTemplate(self.html_template, htmltext, context, recipient_keys, escape_values=True)
+
+
+def _format_field(field, context):
+    """
+    Format a single replacement field of a template with the given context.
+    """
+    return field.format(**context)
+
+
+class CompiledEmailTemplate(object):
+    """
+    An email message rendered once for all the recipients of an email, with
+    slots for the values that differ between recipients.
+
+    Rendering it for a recipient gives the same message as rendering the
+    template with the CourseEmailTemplate, but only the replacement fields
+    naming recipient values, the message body if it has %%-encoded keywords,
+    and the lines containing them are formatted and wrapped for each
+    recipient.
+    """
+    def __init__(self, format_string, message_body, context, recipient_keys, escape_values=False):
+        self.recipient_keys = frozenset(recipient_keys)
+        self.escape_values = escape_values
+        self.context = self._escape(context)
+
+        parts = self._merge_strings(self._compile_fields(format_string))
+        parts = self._merge_strings(self._insert_body(parts, message_body))
+        self.lines = self._compile_lines(parts)
+
+    def render(self, recipient_context):
+        """
+        Return the message for the recipient with the given context values.
+        """
+        context = dict(self.context)
+        context.update(self._escape(recipient_context))
+        return u'\n'.join(
+            line if isinstance(line, six.text_type) else wrap_message(u''.join(
+                part if isinstance(part, six.text_type) else part(context) for part in line
+            ))
+            for line in self.lines
+        )
+
+    def _escape(self, context):
+        """
+        Return a copy of the context, with string values HTML-escaped if need be.
+        """
+        if not self.escape_values:
+            return dict(context)
+        return {
+            key: markupsafe.escape(value) if isinstance(value, six.string_types) else value
+            for key, value in six.iteritems(context)
+        }
+
+    def _compile_fields(self, format_string):
+        """
+        Return the parts of the formatted template, formatting the replacement
+        fields that don't depend on recipient values, and leaving the others
+        as slots: functions taking the full context.
+        """
+        parts = []
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(format_string):
+            parts.append(six.text_type(literal))
+            if field_name is None:
+                continue
+            field = u'{' + field_name
+            if conversion:
+                field += u'!' + conversion
+            if format_spec:
+                field += u':' + format_spec
+            field += u'}'
+            root_name = re.match(r'[^.[]*', field_name).group()
+            # Nested fields in the format spec might name recipient values too.
+            if root_name in self.recipient_keys or u'{' in (format_spec or u''):
+                parts.append(partial(_format_field, field))
+            else:
+                parts.append(_format_field(field, self.context))
+        return parts
+
+    def _insert_body(self, parts, message_body):
+        """
+        Return the parts, with the message body in place of the first body tag.
+        """
+        # The body tag in the template will have been "formatted", so we need
+        # to do the same to the tag being searched for.
+        message_body_tag = COURSE_EMAIL_MESSAGE_BODY_TAG.format()
+        for index, part in enumerate(parts):
+            if isinstance(part, six.text_type) and message_body_tag in part:
+                before, after = part.split(message_body_tag, 1)
+                break
+        else:
+            return parts
+
+        if u'%%' in message_body:
+            body = partial(CompiledEmailTemplate._substitute_keywords, message_body)
+        else:
+            body = six.text_type(message_body)
+        return parts[:index] + [before, body, after] + parts[index + 1:]
+
+    @staticmethod
+    def _substitute_keywords(message_body, context):
+        """
+        Substitute all %%-encoded keywords in the message body.
+        """
+        if 'user_id' in context and 'course_id' in context:
+            return substitute_keywords_with_data(message_body, context)
+        return message_body
+
+    @staticmethod
+    def _merge_strings(parts):
+        """
+        Return the parts, with consecutive strings joined and empty strings dropped.
+        """
+        merged = []
+        for part in parts:
+            if not isinstance(part, six.text_type):
+                merged.append(part)
+            elif part and merged and isinstance(merged[-1], six.text_type):
+                merged[-1] += part
+            elif part:
+                merged.append(part)
+        return merged
+
+    @staticmethod
+    def _compile_lines(parts):
+        """
+        Split the parts into lines, wrapping the lines that have no slots.
+
+        Lines with slots are lists of parts, to be wrapped once rendered.
+        """
+        lines = [[]]
+        for part in parts:
+            if not isinstance(part, six.text_type):
+                lines[-1].append(part)
+                continue
+            pieces = part.split(u'\n')
+            lines[-1].append(pieces[0])
+            lines.extend([piece] for piece in pieces[1:])
+        return [
+            wrap_message(u''.join(line)) if all(isinstance(part, six.text_type) for part in line) else line
+            for line in lines
+        ]
+
 
 @python_2_unicode_compatible
 class CourseAuthorization(models.Model):
@@ -11,6 +11,7 @@ import random
 import re
 import time
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from smtplib import SMTPConnectError, SMTPDataError, SMTPException, SMTPServerDisconnected
 from time import sleep
@@ -98,6 +99,56 @@ BULK_EMAIL_FAILURE_ERRORS = (
     SMTPException,
 )
 
+# Values of the email context that differ between the recipients of an email.
+RECIPIENT_CONTEXT_KEYS = ('name', 'email', 'user_id', 'unsubscribe_link')
+
+# Increase of the sending rate, in emails per second, of a task retried for
+# rate-related reasons for every email it sends successfully.
+SENDS_PER_SECOND_INCREASE = 0.1
+
+
+class SendRateLimiter(object):
+    """
+    Paces the sending of the emails of a task.
+
+    A task sends emails as fast as it can, up to BULK_EMAIL_MAX_SENDS_PER_SECOND.
+    A task retried because emails were being sent too quickly starts out
+    sending one email every BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS seconds,
+    multiplied by the number of such retries so far, and speeds back up as it
+    sends emails successfully: up to BULK_EMAIL_MAX_SENDS_PER_SECOND if it is
+    set, else up to one email every BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS
+    seconds.
+    """
+    def __init__(self, retried_nomax):
+        self.max_rate = float(settings.BULK_EMAIL_MAX_SENDS_PER_SECOND) or None
+        delay = settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS
+        self.throttled = retried_nomax > 0 and delay > 0
+        if self.throttled:
+            if not self.max_rate:
+                self.max_rate = 1.0 / delay
+            self.rate = min(1.0 / delay / retried_nomax, self.max_rate)
+        else:
+            self.rate = self.max_rate
+        self._next_send_time = 0
+
+    def wait(self, num_emails):
+        """
+        Sleep until the given number of emails may be sent.
+        """
+        if not self.rate:
+            return
+        now = time.time()
+        if self._next_send_time > now:
+            sleep(self._next_send_time - now)
+        self._next_send_time = max(now, self._next_send_time) + num_emails / self.rate
+
+    def succeeded(self, num_emails):
+        """
+        Record that the given number of emails were sent successfully.
+        """
+        if self.throttled:
+            self.rate = min(self.rate + num_emails * SENDS_PER_SECOND_INCREASE, self.max_rate)
+
 
 def _get_course_email_context(course):
     """
@@ -429,6 +480,31 @@ def _get_source_address(course_id, course_title, course_language, truncate=True)
     return from_addr
 
 
+def _send_message(email_msg):
+    """
+    Send an email over its connection.
+
+    Returns the exception raised sending the email, or None if it was sent.
+    """
+    try:
+        email_msg.connection.send_messages([email_msg])
+    except Exception as exc:  # pylint: disable=broad-except
+        return exc
+    return None
+
+
+def _send_messages(executor, email_msgs):
+    """
+    Send emails, each over its own connection, concurrently if an executor is given.
+
+    Returns a list of the exceptions raised sending the emails, with None for
+    the emails that were sent.
+    """
+    if executor is None:
+        return [_send_message(email_msg) for email_msg in email_msgs]
+    return list(executor.map(_send_message, email_msgs))
+
+
 def _send_course_email(entry_id, email_id, to_list, global_email_context, subtask_status):
     """
     Performs the email sending task.
@@ -505,150 +581,190 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     # use the CourseEmailTemplate that was associated with the CourseEmail
     course_email_template = course_email.get_template()
 
+    pool_size = max(settings.BULK_EMAIL_CONNECTION_POOL_SIZE, 1)
+    connections = []
+    executor = None
     try:
-        connection = get_connection()
-        connection.open()
-
-        # Define context values to use in all course emails:
-        email_context = {'name': '', 'email': ''}
-        email_context.update(global_email_context)
+        for __ in range(pool_size):
+            connection = get_connection()
+            connections.append(connection)
+            connection.open()
+        if pool_size > 1:
+            executor = ThreadPoolExecutor(max_workers=pool_size)
+
+        # Render the parts of the email that are the same for all recipients once.
+        email_context = dict(global_email_context, course_id=course_email.course_id)
+        plaintext_template = course_email_template.compile_plaintext(
+            course_email.text_message, email_context, RECIPIENT_CONTEXT_KEYS
+        )
+        html_template = course_email_template.compile_htmltext(
+            course_email.html_message, email_context, RECIPIENT_CONTEXT_KEYS
+        )
+        rate_limiter = SendRateLimiter(subtask_status.retried_nomax)
 
         start_time = time.time()
         while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
+            # Build emails for the users at the end of the list, one per connection.
+            # At the end of processing these users, they will be popped off of the to_list.
             # That way, the to_list will always contain the recipients remaining to be emailed.
             # This is convenient for retries, which will need to send to those who haven't
             # yet been emailed, but not send to those who have already been sent to.
-            recipient_num += 1
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            if _has_non_ascii_characters(email):
-                to_list.pop()
-                total_recipients_failed += 1
-                log.info(
-                    u"BulkEmail ==> Email address %s contains non-ascii characters. Skipping sending "
-                    u"email to %s, EmailId: %s ",
-                    email,
-                    current_recipient['profile__name'],
-                    email_id
+            batch = []
+            while len(batch) < len(connections) and len(batch) < len(to_list):
+                current_recipient = to_list[-1 - len(batch)]
+                email = current_recipient['email']
+                if _has_non_ascii_characters(email):
+                    if batch:
+                        # Skip this user once the users after them on the list have been processed.
+                        break
+                    recipient_num += 1
+                    to_list.pop()
+                    total_recipients_failed += 1
+                    log.info(
+                        u"BulkEmail ==> Email address %s contains non-ascii characters. Skipping sending "
+                        u"email to %s, EmailId: %s ",
+                        email,
+                        current_recipient['profile__name'],
+                        email_id
+                    )
+                    subtask_status.increment(failed=1)
+                    continue
+
+                recipient_num += 1
+                recipient_context = {
+                    'email': email,
+                    'name': current_recipient['profile__name'],
+                    'user_id': current_recipient['pk'],
+                    'unsubscribe_link': get_unsubscribed_link(current_recipient['username'],
+                                                              text_type(course_email.course_id)),
+                }
+
+                # Construct message content using templates and context:
+                plaintext_msg = plaintext_template.render(recipient_context)
+                html_msg = html_template.render(recipient_context)
+
+                # Create email:
+                email_msg = EmailMultiAlternatives(
+                    course_email.subject,
+                    plaintext_msg,
+                    from_addr,
+                    [email],
+                    connection=connections[len(batch)]
                 )
-                subtask_status.increment(failed=1)
-                continue
+                email_msg.attach_alternative(html_msg, 'text/html')
+                batch.append((current_recipient, recipient_num, email_msg))
 
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-            email_context['user_id'] = current_recipient['pk']
-            email_context['course_id'] = course_email.course_id
-            email_context['unsubscribe_link'] = get_unsubscribed_link(current_recipient['username'],
-                                                                      text_type(course_email.course_id))
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                course_email.subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
+            if not batch:
+                continue
 
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
-                sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
+            # Throttle if need be.  If a task has been retried for rate-limiting reasons,
+            # then it slows down, and speeds back up as emails get sent.
+            rate_limiter.wait(len(batch))
 
-            try:
+            for current_recipient, current_recipient_num, __ in batch:
                 log.info(
                     u"BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
                     Recipient name: %s, Email address: %s",
                     parent_task_id,
                     task_id,
                     email_id,
-                    recipient_num,
+                    current_recipient_num,
                     total_recipients,
                     current_recipient['profile__name'],
-                    email
-                )
-                connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                total_recipients_failed += 1
-                log.error(
-                    u"BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
+                    current_recipient['email']
                 )
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
+            send_errors = _send_messages(executor, [email_msg for __, __, email_msg in batch])
+
+            # Users whose email is to be retried stay on the list, and the first error
+            # that requires a retry is raised once the other users have been processed.
+            retry_exc = None
+            retry_recipients = []
+            for (current_recipient, current_recipient_num, __), exc in zip(batch, send_errors):
+                email = current_recipient['email']
+                if isinstance(exc, SMTPDataError):
+                    # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates
+                    # hard failure.
+                    total_recipients_failed += 1
+                    log.error(
+                        u"BulkEmail ==> Status: Failed(SMTPDataError), Task: %s, SubTask: %s, EmailId: %s, \
+                        Recipient num: %s/%s, Email address: %s",
+                        parent_task_id,
+                        task_id,
+                        email_id,
+                        current_recipient_num,
+                        total_recipients,
+                        email
+                    )
+                    if exc.smtp_code >= 400 and exc.smtp_code < 500:
+                        # This will cause the outer handler to catch the exception and retry the entire task.
+                        retry_exc = retry_exc or exc
+                        retry_recipients.append(current_recipient)
+                        continue
+                    else:
+                        # This will fall through and not retry the message.
+                        log.warning(
+                            u'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
+                            Email not delivered to %s due to error %s',
+                            parent_task_id,
+                            task_id,
+                            email_id,
+                            current_recipient_num,
+                            total_recipients,
+                            email,
+                            exc.smtp_error
+                        )
+                        subtask_status.increment(failed=1)
+
+                elif isinstance(exc, SINGLE_EMAIL_FAILURE_ERRORS):
                     # This will fall through and not retry the message.
-                    log.warning(
-                        u'BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Recipient num: %s/%s, \
-                        Email not delivered to %s due to error %s',
+                    total_recipients_failed += 1
+                    log.error(
+                        u"BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
+                        EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
                         parent_task_id,
                         task_id,
                         email_id,
-                        recipient_num,
+                        current_recipient_num,
                         total_recipients,
                         email,
-                        exc.smtp_error
+                        exc
                     )
                     subtask_status.increment(failed=1)
 
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                total_recipients_failed += 1
-                log.error(
-                    u"BulkEmail ==> Status: Failed(SINGLE_EMAIL_FAILURE_ERRORS), Task: %s, SubTask: %s, \
-                    EmailId: %s, Recipient num: %s/%s, Email address: %s, Exception: %s",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email,
-                    exc
-                )
-                subtask_status.increment(failed=1)
+                elif exc is not None:
+                    # This will cause the outer handlers to catch the exception.
+                    retry_exc = retry_exc or exc
+                    retry_recipients.append(current_recipient)
+                    continue
 
-            else:
-                total_recipients_successful += 1
-                log.info(
-                    u"BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
-                    Recipient num: %s/%s, Email address: %s,",
-                    parent_task_id,
-                    task_id,
-                    email_id,
-                    recipient_num,
-                    total_recipients,
-                    email
-                )
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info(u'Email with id %s sent to %s', email_id, email)
                 else:
-                    log.debug(u'Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
+                    total_recipients_successful += 1
+                    log.info(
+                        u"BulkEmail ==> Status: Success, Task: %s, SubTask: %s, EmailId: %s, \
+                        Recipient num: %s/%s, Email address: %s,",
+                        parent_task_id,
+                        task_id,
+                        email_id,
+                        current_recipient_num,
+                        total_recipients,
+                        email
+                    )
+                    if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+                        log.info(u'Email with id %s sent to %s', email_id, email)
+                    else:
+                        log.debug(u'Email with id %s sent to %s', email_id, email)
+                    subtask_status.increment(succeeded=1)
+
+                recipients_info[email] += 1
 
-            # Pop the user that was emailed off the end of the list only once they have
+            # Pop the users that were emailed off the end of the list only once they have
             # successfully been processed.  (That way, if there were a failure that
             # needed to be retried, the user is still on the list.)
-            recipients_info[email] += 1
-            to_list.pop()
+            del to_list[-len(batch):]
+            to_list.extend(reversed(retry_recipients))
+            if retry_exc is not None:
+                raise retry_exc
+            rate_limiter.succeeded(len(batch))
 
         log.info(
             u"BulkEmail ==> Task: %s, SubTask: %s, EmailId: %s, Total Successful Recipients: %s/%s, \
@@ -726,7 +842,10 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        if executor is not None:
+            executor.shutdown()
+        for connection in connections:
+            connection.close()
 
 
 def _get_current_task():
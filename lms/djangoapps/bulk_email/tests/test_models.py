@@ -269,6 +269,39 @@ class CourseEmailTemplateTest(TestCase):
         self.assertIn(context['course_title'], message)
         self.assertIn(context['name'], message)
 
+    def _assert_compiled_matches_rendered(self, compile_method, render_method, context):
+        """
+        Check that a compiled template renders the same messages as the template.
+        """
+        message_body = u"Dear %%USER_FULLNAME%%,\nthanks for enrolling in %%COURSE_DISPLAY_NAME%%."
+        recipient_keys = ('name', 'email', 'user_id', 'unsubscribe_link')
+        compiled = compile_method(
+            message_body,
+            {key: value for key, value in context.items() if key not in recipient_keys},
+            recipient_keys,
+        )
+        for user_id, name in ((1, u"<script>alert('Profile Name!');</alert>"), (2, u"Robot \u00e9")):
+            recipient_context = {
+                'name': name,
+                'email': u'robot{}@test.com'.format(user_id),
+                'user_id': user_id,
+                'unsubscribe_link': u'/bulk_email/email/optout/{}'.format(user_id),
+            }
+            self.assertEqual(
+                compiled.render(recipient_context),
+                render_method(message_body, dict(context, **recipient_context)),
+            )
+
+    def test_compiled_plaintext(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._add_xss_fields(self._get_sample_plain_context())
+        self._assert_compiled_matches_rendered(template.compile_plaintext, template.render_plaintext, context)
+
+    def test_compiled_htmltext(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._add_xss_fields(self._get_sample_html_context())
+        self._assert_compiled_matches_rendered(template.compile_htmltext, template.render_htmltext, context)
+
 
 class CourseAuthorizationTest(TestCase):
     """Test the CourseAuthorization model."""
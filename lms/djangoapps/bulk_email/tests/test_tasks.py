@@ -28,12 +28,14 @@ from boto.ses.exceptions import (
 from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
 from mock import Mock, patch
 from opaque_keys.edx.locator import CourseLocator
 from six.moves import range
 
 from bulk_email.models import SEND_TO_LEARNERS, SEND_TO_MYSELF, SEND_TO_STAFF, CourseEmail, Optout
-from bulk_email.tasks import _get_course_email_context
+from bulk_email.tasks import SendRateLimiter, _get_course_email_context
 from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.subtasks import SubtaskStatus, update_subtask_status
 from lms.djangoapps.instructor_task.tasks import send_bulk_course_email
@@ -268,6 +270,37 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
         # Test that celery handles permanent SMTPDataErrors by failing and not retrying.
         self._test_email_address_failures(SESAddressBlacklistedError(554, "Email address is blacklisted"))
 
+    @override_settings(BULK_EMAIL_CONNECTION_POOL_SIZE=3)
+    def test_successful_over_connection_pool(self):
+        num_emails = 10
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle([None])
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+        self.assertEqual(get_conn.call_count, 3)
+        self.assertEqual(get_conn.return_value.send_messages.call_count, num_emails)
+
+    @override_settings(BULK_EMAIL_CONNECTION_POOL_SIZE=3)
+    def test_smtp_blacklisted_user_over_connection_pool(self):
+        self._test_email_address_failures(SMTPDataError(554, "Email address is blacklisted"))
+
+    @override_settings(BULK_EMAIL_CONNECTION_POOL_SIZE=2)
+    def test_retry_after_throttling_over_connection_pool(self):
+        num_emails = 4
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            # Every other email is throttled, so that each pair of emails sent concurrently has one
+            # email that's sent, and one that's retried.
+            get_conn.return_value.send_messages.side_effect = cycle(
+                [SMTPDataError(455, "Throttling: Sending rate exceeded"), None]
+            )
+            self._test_run_with_task(
+                send_bulk_course_email, 'emailed', num_emails, num_emails, retried_nomax=num_emails
+            )
+        self.assertEqual(get_conn.return_value.send_messages.call_count, 2 * num_emails)
+
     def test_ses_illegal_address(self):
         # Test that celery handles permanent SMTPDataErrors by failing and not retrying.
         self._test_email_address_failures(SESIllegalAddressError(554, "Email address is illegal"))
@@ -473,3 +506,44 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
         self.assertIn('account_settings_url', result)
         self.assertIn('email_settings_url', result)
         self.assertIn('platform_name', result)
+
+
+class SendRateLimiterTest(TestCase):
+    """Tests the pacing of the emails of a task."""
+
+    @override_settings(BULK_EMAIL_MAX_SENDS_PER_SECOND=0)
+    def test_unlimited(self):
+        rate_limiter = SendRateLimiter(retried_nomax=0)
+        with patch('bulk_email.tasks.sleep') as mock_sleep:
+            rate_limiter.wait(1)
+            rate_limiter.wait(1)
+        self.assertFalse(mock_sleep.called)
+
+    @override_settings(BULK_EMAIL_MAX_SENDS_PER_SECOND=10)
+    def test_max_rate(self):
+        rate_limiter = SendRateLimiter(retried_nomax=0)
+        with patch('time.time', return_value=1000), patch('bulk_email.tasks.sleep') as mock_sleep:
+            rate_limiter.wait(2)
+            self.assertFalse(mock_sleep.called)
+            rate_limiter.wait(1)
+        self.assertEqual(mock_sleep.call_count, 1)
+        self.assertAlmostEqual(mock_sleep.call_args[0][0], 0.2)
+
+    @override_settings(BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS=0.02, BULK_EMAIL_MAX_SENDS_PER_SECOND=40)
+    def test_throttled(self):
+        self.assertEqual(SendRateLimiter(retried_nomax=1).rate, 40)
+        rate_limiter = SendRateLimiter(retried_nomax=5)
+        self.assertEqual(rate_limiter.rate, 10)
+        rate_limiter.succeeded(100)
+        self.assertEqual(rate_limiter.rate, 20)
+        rate_limiter.succeeded(1000)
+        self.assertEqual(rate_limiter.rate, 40)
+
+    @override_settings(BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS=0.5, BULK_EMAIL_MAX_SENDS_PER_SECOND=0)
+    def test_throttled_without_max_rate(self):
+        rate_limiter = SendRateLimiter(retried_nomax=4)
+        self.assertEqual(rate_limiter.rate, 0.5)
+        rate_limiter.succeeded(10)
+        self.assertAlmostEqual(rate_limiter.rate, 1.5)
+        rate_limiter.succeeded(1000)
+        self.assertEqual(rate_limiter.rate, 2)
@@ -68,7 +68,8 @@ def get_blocks(
         hide_access_denials = True
 
     # create ordered list of transformers, adding BlocksAPITransformer at end.
-    transformers = BlockStructureTransformers()
+    # The user's access transformers are added by get_course_blocks.
+    transformers = []
     if requested_fields is None:
         requested_fields = []
     include_completion = 'completion' in requested_fields
@@ -76,7 +77,6 @@ def get_blocks(
     include_gated_sections = 'show_gated_sections' in requested_fields
 
     if user is not None:
-        transformers += course_blocks_api.get_course_block_access_transformers(user)
         transformers += [
             MilestonesAndSpecialExamsTransformer(
                 include_special_exams=include_special_exams,
@@ -105,8 +105,20 @@ def get_blocks(
         transformers += [BlockCompletionTransformer()]
 
     # transform
-    blocks = course_blocks_api.get_course_blocks(
-        user, usage_key, transformers, allow_start_dates_in_future=allow_start_dates_in_future)
+    if user is not None:
+        blocks = course_blocks_api.get_course_blocks(
+            user,
+            usage_key,
+            allow_start_dates_in_future=allow_start_dates_in_future,
+            extra_transformers=transformers,
+        )
+    else:
+        blocks = course_blocks_api.get_course_blocks(
+            user,
+            usage_key,
+            BlockStructureTransformers(transformers),
+            allow_start_dates_in_future=allow_start_dates_in_future,
+        )
 
     # filter blocks by types
     if block_types_filter:
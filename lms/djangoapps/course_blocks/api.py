@@ -12,6 +12,7 @@ from openedx.core.djangoapps.content.block_structure.api import get_block_struct
 from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
 from openedx.features.content_type_gating.block_transformers import ContentTypeGateTransformer
 
+from . import user_cache
 from .transformers import library_content, load_override_data, start_date, user_partitions, visibility
 from .usage_info import CourseUsageInfo
 
@@ -60,6 +61,7 @@ def get_course_blocks(
         collected_block_structure=None,
         allow_start_dates_in_future=False,
         include_completion=False,
+        extra_transformers=None,
 ):
     """
     A higher order function implemented on top of the
@@ -82,6 +84,10 @@ def get_course_blocks(
             BlockStructureManager.get_collected.  Can be optionally
             provided if already available, for optimization.
 
+        extra_transformers ([BlockStructureTransformer]) - Transformers
+            to apply after get_course_block_access_transformers(), if no
+            transformers are given.
+
     Returns:
         BlockStructureBlockData - A transformed block structure,
             starting at starting_block_usage_key, that has undergone the
@@ -91,14 +97,66 @@ def get_course_blocks(
             exactly equivalent to the blocks that the given user has
             access.
     """
+    usage_info = CourseUsageInfo(starting_block_usage_key.course_key, user, allow_start_dates_in_future)
     if not transformers:
-        transformers = BlockStructureTransformers(get_course_block_access_transformers(user))
-    if include_completion:
+        extra_transformers = list(extra_transformers or [])
+        if include_completion:
+            extra_transformers.append(BlockCompletionTransformer())
+        if user_cache.is_enabled(user):
+            return _get_course_blocks_from_user_cache(
+                usage_info,
+                starting_block_usage_key,
+                collected_block_structure,
+                extra_transformers,
+            )
+        transformers = BlockStructureTransformers(get_course_block_access_transformers(user) + extra_transformers)
+    elif include_completion:
         transformers += [BlockCompletionTransformer()]
-    transformers.usage_info = CourseUsageInfo(starting_block_usage_key.course_key, user, allow_start_dates_in_future)
+    transformers.usage_info = usage_info
 
     return get_block_structure_manager(starting_block_usage_key.course_key).get_transformed(
         transformers,
         starting_block_usage_key,
         collected_block_structure,
     )
+
+
+def _get_course_blocks_from_user_cache(
+        usage_info,
+        starting_block_usage_key,
+        collected_block_structure,
+        extra_transformers,
+):
+    """
+    Returns the block structure transformed by the access transformers for
+    the user of the given usage_info, from the user cache if available,
+    after applying the given extra_transformers.
+
+    The extra transformers run after all access transformers, including
+    those that don't filter blocks, which is equivalent to running them
+    all together since none of the access transformers depend on blocks
+    removed by a later filter.
+    """
+    manager = get_block_structure_manager(starting_block_usage_key.course_key)
+    if collected_block_structure is None:
+        collected_block_structure = manager.get_collected()
+
+    cache_key = user_cache.get_cache_key(
+        usage_info.user,
+        starting_block_usage_key,
+        collected_block_structure,
+        usage_info.allow_start_dates_in_future,
+    )
+    block_structure = user_cache.get(cache_key, starting_block_usage_key) if cache_key else None
+    if block_structure is None:
+        block_structure = manager.get_transformed(
+            BlockStructureTransformers(get_course_block_access_transformers(usage_info.user), usage_info),
+            starting_block_usage_key,
+            collected_block_structure,
+        )
+        if cache_key:
+            user_cache.set(cache_key, block_structure)
+
+    if extra_transformers:
+        BlockStructureTransformers(extra_transformers, usage_info).transform(block_structure)
+    return block_structure
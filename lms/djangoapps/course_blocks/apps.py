@@ -0,0 +1,17 @@
+"""
+Django AppConfig module for the course_blocks app
+"""
+
+
+from django.apps import AppConfig
+
+
+class CourseBlocksConfig(AppConfig):
+    """
+    Django AppConfig class for the course_blocks app
+    """
+    name = 'lms.djangoapps.course_blocks'
+
+    def ready(self):
+        # Import signals to wire up the signal handlers contained within
+        from . import signals  # pylint: disable=unused-import
@@ -0,0 +1,96 @@
+"""
+Signal handlers for invalidating the cache of transformed course blocks.
+"""
+
+
+import json
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from edx_when.models import UserDate
+
+from lms.djangoapps.courseware.models import StudentFieldOverride, StudentModule
+from openedx.core.djangoapps.course_groups.models import CohortMembership, CourseUserGroupPartitionGroup
+from student.models import CourseAccessRole, CourseEnrollment
+from util.model_utils import USER_FIELD_CHANGED
+
+from . import user_cache
+
+
+@receiver(post_save, sender=CourseEnrollment)
+@receiver(post_save, sender=CohortMembership)
+@receiver(post_delete, sender=CohortMembership)
+@receiver(post_save, sender=CourseAccessRole)
+@receiver(post_delete, sender=CourseAccessRole)
+def invalidate_user_on_course_state_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the user's transformed course blocks when the user's
+    enrollment, cohort or course roles change.
+    """
+    if instance.course_id:
+        user_cache.invalidate_user(instance.course_id, instance.user_id)
+
+
+@receiver(post_save, sender=StudentFieldOverride)
+@receiver(post_delete, sender=StudentFieldOverride)
+def invalidate_user_on_field_override_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the user's transformed course blocks when a field of a
+    block is overridden for the user.
+    """
+    user_cache.invalidate_user(instance.course_id, instance.student_id)
+
+
+@receiver(post_save, sender=UserDate)
+@receiver(post_delete, sender=UserDate)
+def invalidate_user_on_date_override_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the user's transformed course blocks when a date of a
+    block is overridden for the user.
+    """
+    user_cache.invalidate_user(instance.content_date.course_id, instance.user_id)
+
+
+@receiver(post_save, sender=StudentModule)
+def invalidate_user_on_library_content_selection(  # pylint: disable=unused-argument
+    sender, instance, update_fields=None, **kwargs
+):
+    """
+    Invalidates the user's transformed course blocks when the blocks
+    selected for the user from a content library change.
+
+    Other saves of the user's state can't change which blocks are visible
+    to the user, so they are ignored without any cache access.
+    """
+    if instance.module_type != 'library_content':
+        return
+    if update_fields is not None and 'state' not in update_fields:
+        return
+    try:
+        selected = json.loads(instance.state or '{}').get('selected')
+    except ValueError:
+        selected = None
+    user_cache.invalidate_user_on_selection_change(
+        instance.course_id, instance.student_id, instance.module_state_key, selected,
+    )
+
+
+@receiver(USER_FIELD_CHANGED)
+def invalidate_user_on_staff_status_change(sender, user, table, setting, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the user's transformed course blocks in all courses when
+    the user becomes, or stops being, global staff.
+    """
+    if table == User._meta.db_table and setting == 'is_staff':
+        user_cache.invalidate_user_in_all_courses(user.id)
+
+
+@receiver(post_save, sender=CourseUserGroupPartitionGroup)
+@receiver(post_delete, sender=CourseUserGroupPartitionGroup)
+def invalidate_course_on_cohort_partition_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidates the transformed course blocks of all users in the course
+    when a cohort is linked to a different content group.
+    """
+    user_cache.invalidate_course(instance.course_user_group.course_id)
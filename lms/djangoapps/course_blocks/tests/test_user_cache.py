@@ -0,0 +1,152 @@
+"""
+Tests for the cache of transformed course blocks in user_cache.py
+"""
+
+
+import json
+
+import ddt
+from django.test.utils import override_settings
+from mock import patch
+
+from lms.djangoapps.course_api.blocks.transformers.block_counts import BlockCountsTransformer
+from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
+from openedx.core.djangoapps.course_groups.cohorts import add_user_to_cohort
+from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
+from student.models import CourseEnrollment
+from student.roles import CourseStaffRole
+from student.tests.factories import UserFactory
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import ItemFactory, SampleCourseFactory
+
+from .. import api, user_cache
+
+
+@ddt.ddt
+@override_settings(COURSE_BLOCKS_USER_CACHE_TIMEOUT=300)
+class TestUserCache(ModuleStoreTestCase):
+    """
+    Tests for caching the course blocks transformed for a user.
+    """
+    ENABLED_SIGNALS = ['course_published']
+
+    def setUp(self):
+        super(TestUserCache, self).setUp()
+        with self.store.default_store(ModuleStoreEnum.Type.split):
+            self.course = SampleCourseFactory.create()
+        self.user = UserFactory.create()
+        CourseEnrollment.enroll(self.user, self.course.id)
+
+    def get_course_blocks(self, **kwargs):
+        """
+        Returns the course blocks for the test user, and the number of
+        times the access transformers were created.
+        """
+        with patch.object(
+            api, 'get_course_block_access_transformers', wraps=api.get_course_block_access_transformers,
+        ) as mock_get_transformers:
+            block_structure = api.get_course_blocks(self.user, self.course.location, **kwargs)
+        return block_structure, mock_get_transformers.call_count
+
+    def test_cached(self):
+        block_structure, call_count = self.get_course_blocks()
+        assert call_count == 1
+
+        cached_block_structure, call_count = self.get_course_blocks()
+        assert call_count == 0
+        assert set(cached_block_structure) == set(block_structure)
+        assert cached_block_structure.root_block_usage_key == self.course.location
+
+    @override_settings(COURSE_BLOCKS_USER_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.get_course_blocks()
+        __, call_count = self.get_course_blocks()
+        assert call_count == 1
+
+    def test_options_cached_separately(self):
+        self.get_course_blocks()
+        __, call_count = self.get_course_blocks(allow_start_dates_in_future=True)
+        assert call_count == 1
+
+    def test_extra_transformers(self):
+        self.get_course_blocks()
+        block_structure, call_count = self.get_course_blocks(
+            extra_transformers=[BlockCountsTransformer(['html'])],
+        )
+        assert call_count == 0
+        assert block_structure.get_transformer_block_field(
+            self.course.location, BlockCountsTransformer, 'html',
+        ) > 0
+
+    def test_invalidated_on_enrollment_change(self):
+        self.get_course_blocks()
+        CourseEnrollment.unenroll(self.user, self.course.id)
+        __, call_count = self.get_course_blocks()
+        assert call_count == 1
+
+    def test_invalidated_on_cohort_change(self):
+        cohort = CohortFactory(course_id=self.course.id)
+        self.get_course_blocks()
+        add_user_to_cohort(cohort, self.user.username)
+        __, call_count = self.get_course_blocks()
+        assert call_count == 1
+
+    def test_invalidated_for_user_only(self):
+        other_user = UserFactory.create()
+        self.get_course_blocks()
+        user_cache.invalidate_user(self.course.id, other_user.id)
+        __, call_count = self.get_course_blocks()
+        assert call_count == 0
+
+        user_cache.invalidate_course(self.course.id)
+        __, call_count = self.get_course_blocks()
+        assert call_count == 1
+
+    def test_invalidated_on_publish(self):
+        self.get_course_blocks()
+        ItemFactory.create(parent=self.course, category='chapter')
+        __, call_count = self.get_course_blocks()
+        assert call_count == 1
+
+    def test_invalidated_on_course_role_change(self):
+        self.get_course_blocks()
+        CourseStaffRole(self.course.id).add_users(self.user)
+        __, call_count = self.get_course_blocks()
+        assert call_count == 1
+
+        CourseStaffRole(self.course.id).remove_users(self.user)
+        __, call_count = self.get_course_blocks()
+        assert call_count == 1
+
+    def test_invalidated_on_staff_status_change(self):
+        self.get_course_blocks()
+        self.user.is_staff = True
+        self.user.save()
+        __, call_count = self.get_course_blocks()
+        assert call_count == 1
+
+        self.user.first_name = 'Changed'
+        self.user.save()
+        __, call_count = self.get_course_blocks()
+        assert call_count == 0
+
+    def test_invalidated_on_library_content_selection_change(self):
+        usage_key = self.course.id.make_usage_key('library_content', 'test_library_content')
+        module = StudentModuleFactory.create(
+            student=self.user,
+            course_id=self.course.id,
+            module_type='library_content',
+            module_state_key=usage_key,
+            state=json.dumps({'selected': [['html', 'first']]}),
+        )
+        self.get_course_blocks()
+        module.state = json.dumps({'selected': [['html', 'first']], 'has_viewed': True})
+        module.save()
+        __, call_count = self.get_course_blocks()
+        assert call_count == 0
+
+        module.state = json.dumps({'selected': [['html', 'second']]})
+        module.save()
+        __, call_count = self.get_course_blocks()
+        assert call_count == 1
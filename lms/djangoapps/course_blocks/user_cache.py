@@ -0,0 +1,187 @@
+"""
+Cache of course block structures transformed for a particular user by the
+course block access transformers.
+
+The access transformers (start dates, visibility, user partitions, content
+type gating and date overrides) only depend on the course content and on
+the user's state in the course, so their result is cached for a short
+time and reused by subsequent calls to get_course_blocks for the same
+learner.
+
+Each entry is keyed by:
+
+    * the version of the collected course structure,
+    * the starting block and the options of the transformation,
+    * the user's masquerade settings for the course, if any,
+    * a generation token of the course and of the user in the course,
+    * a generation token of the user in all courses.
+
+The generation tokens are replaced, thereby invalidating the user's
+entries, whenever the user's partition memberships, enrollment, course
+roles, global staff status, overrides or library content selections
+change (see signals.py). The signal handlers are installed in Studio as
+well, where course roles are also edited.
+
+The cache is disabled unless COURSE_BLOCKS_USER_CACHE_TIMEOUT is set.
+"""
+
+
+import json
+from hashlib import sha1
+from logging import getLogger
+from uuid import uuid4
+
+import six
+from django.conf import settings
+
+from lms.djangoapps.courseware.masquerade import get_course_masquerade
+from openedx.core.djangoapps.content.block_structure import columnar
+from openedx.core.djangoapps.content.block_structure.api import get_cache
+
+log = getLogger(__name__)
+
+_CACHE_KEY_PREFIX = u'course_blocks.user_cache'
+
+# Generation tokens outlive the entries they key; when a token is evicted,
+# a new one is simply generated, which invalidates the entries keyed by it.
+_GENERATION_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def get_timeout():
+    """
+    Returns the number of seconds for which transformed block structures
+    are cached, or 0 if the cache is disabled.
+    """
+    return getattr(settings, 'COURSE_BLOCKS_USER_CACHE_TIMEOUT', 0)
+
+
+def is_enabled(user):
+    """
+    Returns whether transformed block structures may be cached for the
+    given user.
+    """
+    return bool(get_timeout()) and user is not None and user.is_authenticated
+
+
+def get_cache_key(user, starting_block_usage_key, collected_block_structure, allow_start_dates_in_future):
+    """
+    Returns the key of the cached block structure for the given user and
+    transformation, or None if the result of the transformation isn't
+    to be cached.
+    """
+    course_key = starting_block_usage_key.course_key
+    course_version = collected_block_structure.get_xblock_field(
+        collected_block_structure.root_block_usage_key, 'course_version',
+    )
+    if not course_version:
+        return None
+
+    masquerade = get_course_masquerade(user, course_key)
+    real_user = getattr(user, 'real_user', user)
+    fingerprint = [
+        six.text_type(course_version),
+        six.text_type(starting_block_usage_key),
+        six.text_type(allow_start_dates_in_future),
+        six.text_type(real_user.id),
+        six.text_type(sorted(six.iteritems(masquerade.__dict__)) if masquerade else None),
+    ]
+    fingerprint.extend(_get_generations(course_key, user.id))
+    return u'{}.{}.{}'.format(
+        _CACHE_KEY_PREFIX,
+        user.id,
+        sha1(u'|'.join(fingerprint).encode('utf-8')).hexdigest(),
+    )
+
+
+def get(cache_key, starting_block_usage_key):
+    """
+    Returns the cached block structure for the given cache_key, or None.
+    """
+    serialized_data = get_cache().get(cache_key)
+    if serialized_data is None:
+        return None
+    try:
+        return columnar.deserialize(serialized_data, starting_block_usage_key)
+    except columnar.ColumnarFormatError:
+        log.info(u'CourseBlocks: Ignoring cached transformed structure in an outdated format; %s.', cache_key)
+        return None
+
+
+def set(cache_key, block_structure):  # pylint: disable=redefined-builtin
+    """
+    Caches the given transformed block structure under the given cache_key.
+    """
+    get_cache().set(cache_key, columnar.serialize(block_structure), get_timeout())
+
+
+def invalidate_user(course_key, user_id):
+    """
+    Invalidates the cached block structures of the given user in the
+    given course.
+    """
+    get_cache().delete(_generation_key(course_key, user_id))
+
+
+def invalidate_user_in_all_courses(user_id):
+    """
+    Invalidates the cached block structures of the given user in all
+    courses.
+    """
+    get_cache().delete(_user_generation_key(user_id))
+
+
+def invalidate_user_on_selection_change(course_key, user_id, usage_key, selected):
+    """
+    Invalidates the cached block structures of the given user in the given
+    course if the blocks selected for the user by the given library content
+    block differ from those it last selected.
+    """
+    cache = get_cache()
+    selection_key = u'{}.selection.{}.{}.{}'.format(_CACHE_KEY_PREFIX, course_key, user_id, usage_key)
+    selection = sha1(json.dumps(selected, sort_keys=True).encode('utf-8')).hexdigest()
+    if cache.get(selection_key) != selection:
+        cache.set(selection_key, selection, _GENERATION_TIMEOUT)
+        invalidate_user(course_key, user_id)
+
+
+def invalidate_course(course_key):
+    """
+    Invalidates the cached block structures of all users in the given
+    course.
+    """
+    get_cache().delete(_generation_key(course_key))
+
+
+def _generation_key(course_key, user_id=None):
+    """
+    Returns the cache key of the generation token of the given course or,
+    if a user_id is given, of the given user in the course.
+    """
+    key = u'{}.generation.{}'.format(_CACHE_KEY_PREFIX, course_key)
+    if user_id is not None:
+        key = u'{}.{}'.format(key, user_id)
+    return key
+
+
+def _user_generation_key(user_id):
+    """
+    Returns the cache key of the generation token of the given user in
+    all courses.
+    """
+    return u'{}.generation.user.{}'.format(_CACHE_KEY_PREFIX, user_id)
+
+
+def _get_generations(course_key, user_id):
+    """
+    Returns the generation tokens of the given course, of the given user
+    in the course and of the user in all courses, generating any that are
+    missing.
+    """
+    cache = get_cache()
+    keys = [_generation_key(course_key), _generation_key(course_key, user_id), _user_generation_key(user_id)]
+    generations = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in generations}
+    if missing:
+        cache.set_many(missing, _GENERATION_TIMEOUT)
+        generations.update(missing)
+    return [generations[key] for key in keys]
@@ -12,7 +12,6 @@ from completion import waffle as completion_waffle
 from completion.models import BlockCompletion
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.cache import cache
 from django.db import transaction
 from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.middleware.csrf import CsrfViewMiddleware
@@ -97,7 +96,7 @@ from xmodule.exceptions import NotFoundError, ProcessingError
 from xmodule.lti_module import LTIModule
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
-from xmodule.util.sandboxing import can_execute_unsafe_code, get_python_lib_zip
+from xmodule.util.sandboxing import can_execute_unsafe_code, get_python_lib_zip, get_safe_exec_cache
 from xmodule.x_module import XModuleDescriptor
 
 log = logging.getLogger(__name__)
@@ -800,7 +799,7 @@ def get_module_system_for_user(
         publish=publish,
         anonymous_student_id=anonymous_student_id,
         course_id=course_id,
-        cache=cache,
+        cache=get_safe_exec_cache(),
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
@@ -9,7 +9,9 @@ import ddt
 import mock
 import six
 from django.test import RequestFactory, TestCase
+from django.test.utils import override_settings
 from django.urls import reverse
+from django.utils import translation
 from edx_django_utils.cache import RequestCache
 from mock import Mock, patch
 from opaque_keys.edx.keys import CourseKey
@@ -31,6 +33,7 @@ from openedx.core.djangoapps.course_groups.cohorts import set_course_cohorted
 from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory, config_course_cohorts
 from openedx.core.djangoapps.django_comment_common.comment_client.utils import (
     CommentClientMaintenanceError,
+    perform_concurrently,
     perform_request
 )
 from openedx.core.djangoapps.django_comment_common.models import (
@@ -314,6 +317,13 @@ class CachedDiscussionIdMapTestCase(ModuleStoreTestCase):
     def test_get_discussion_id_map_from_cache(self):
         self.verify_discussion_metadata()
 
+    def test_get_discussion_id_map_loads_mapping_once(self):
+        with patch.object(
+            DiscussionsIdMapping, 'get_mapping', wraps=DiscussionsIdMapping.get_mapping
+        ) as mock_get_mapping:
+            self.verify_discussion_metadata()
+        self.assertEqual(mock_get_mapping.call_count, 1)
+
     def test_get_discussion_id_map_without_cache(self):
         DiscussionsIdMapping.objects.all().delete()
         self.verify_discussion_metadata()
@@ -1827,6 +1837,57 @@ class ClientConfigurationTestCase(TestCase):
         result = perform_request('GET', 'http://www.google.com')
         self.assertEqual(result, {})
 
+    @override_settings(COMMENTS_SERVICE_POOL_SIZE=5)
+    @patch('requests.Session.request')
+    def test_pooled_session(self, mock_request):
+        """Ensures that requests reuse the connections of the process' session when pooling is enabled."""
+        config = ForumsConfig.current()
+        config.enabled = True
+        config.save()
+
+        response = Mock()
+        response.status_code = 200
+        response.json = lambda: {}
+        mock_request.return_value = response
+
+        for __ in range(2):
+            self.assertEqual(perform_request('GET', 'http://www.google.com'), {})
+        self.assertEqual(mock_request.call_count, 2)
+
+    @override_settings(COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS=2)
+    @patch('requests.request')
+    def test_perform_concurrently(self, mock_request):
+        """Ensures that concurrent requests use the calling thread's configuration and language."""
+        config = ForumsConfig.current()
+        config.enabled = True
+        config.save()
+
+        def respond(method, url, **kwargs):  # pylint: disable=unused-argument
+            response = Mock()
+            response.status_code = 200
+            response.json = lambda: {'url': url, 'language': kwargs['headers']['Accept-Language']}
+            return response
+        mock_request.side_effect = respond
+
+        with translation.override('fr'):
+            results = perform_concurrently(
+                lambda: perform_request('GET', 'http://www.google.com/1'),
+                lambda: perform_request('GET', 'http://www.google.com/2'),
+            )
+        self.assertEqual(results, [
+            {'url': 'http://www.google.com/1', 'language': 'fr'},
+            {'url': 'http://www.google.com/2', 'language': 'fr'},
+        ])
+
+    @override_settings(COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS=2)
+    def test_perform_concurrently_error(self):
+        """Ensures that errors of concurrent requests are raised."""
+        def fail():
+            raise CommentClientMaintenanceError('service disabled')
+
+        with self.assertRaises(CommentClientMaintenanceError):
+            perform_concurrently(lambda: 1, fail)
+
 
 def set_discussion_division_settings(
         course_key, enable_cohorts=False, always_divide_inline_discussions=False,
@@ -185,18 +185,33 @@ def get_cached_discussion_key(course_id, discussion_id):
     map is cached but does not contain discussion_id, returns None. If the discussion id map is not cached for course,
     raises a DiscussionIdMapIsNotCached exception.
     """
-    try:
-        mapping = DiscussionsIdMapping.objects.get(course_id=course_id).mapping
-        if not mapping:
-            raise DiscussionIdMapIsNotCached()
+    return get_cached_discussion_keys(course_id, [discussion_id]).get(discussion_id)
+
 
+def get_cached_discussion_keys(course_id, discussion_ids):
+    """
+    Returns a dict mapping the given discussion_ids to the usage keys of their discussion xblocks, leaving out the ones
+    not in the cached discussion id map. If the discussion id map is not cached for course, raises a
+    DiscussionIdMapIsNotCached exception.
+    """
+    mapping = _get_cached_discussion_id_mapping(course_id)
+    keys = {}
+    for discussion_id in discussion_ids:
         usage_key_string = mapping.get(discussion_id)
         if usage_key_string:
-            return UsageKey.from_string(usage_key_string).map_into_course(course_id)
-        else:
-            return None
-    except DiscussionsIdMapping.DoesNotExist:
+            keys[discussion_id] = UsageKey.from_string(usage_key_string).map_into_course(course_id)
+    return keys
+
+
+@request_cached()
+def _get_cached_discussion_id_mapping(course_id):
+    """
+    Returns the discussion id map of the course, loaded once per request.
+    """
+    mapping = DiscussionsIdMapping.get_mapping(course_id)
+    if not mapping:
         raise DiscussionIdMapIsNotCached()
+    return mapping
 
 
 def get_cached_discussion_id_map(course, discussion_ids, user):
@@ -214,18 +229,22 @@ def get_cached_discussion_id_map_by_course_id(course_id, discussion_ids, user):
     """
     include_all = getattr(user, 'is_community_ta', False)
     try:
-        entries = []
+        keys = get_cached_discussion_keys(course_id, discussion_ids)
+    except DiscussionIdMapIsNotCached:
+        return get_discussion_id_map_by_course_id(course_id, user)
+
+    entries = []
+    # Load the course structure once for all the xblocks.
+    with modulestore().bulk_operations(course_id):
         for discussion_id in discussion_ids:
-            key = get_cached_discussion_key(course_id, discussion_id)
+            key = keys.get(discussion_id)
             if not key:
                 continue
             xblock = _get_item_from_modulestore(key)
             if not (has_required_keys(xblock) and (include_all or has_access(user, 'load', xblock, course_id))):
                 continue
             entries.append(get_discussion_id_map_entry(xblock))
-        return dict(entries)
-    except DiscussionIdMapIsNotCached:
-        return get_discussion_id_map_by_course_id(course_id, user)
+    return dict(entries)
 
 
 def get_discussion_id_map(course, user):
@@ -309,7 +309,6 @@ def single_thread(request, course_key, discussion_id, thread_id):
 
     if request.is_ajax():
         cc_user = cc.User.from_django_user(request.user)
-        user_info = cc_user.to_dict()
         is_staff = has_permission(request.user, 'openclose_thread', course.id)
 
         try:
@@ -317,13 +316,15 @@ def single_thread(request, course_key, discussion_id, thread_id):
         except TeamDiscussionHiddenFromUserException:
             return HttpResponseForbidden(TEAM_PERMISSION_MESSAGE)
 
-        thread = _load_thread_for_viewing(
-            request,
-            course,
-            discussion_id=discussion_id,
-            thread_id=thread_id,
-            raise_event=True,
+        # The user and the thread are independent, so fetch them at once.
+        user_info, thread = cc.utils.perform_concurrently(
+            cc_user.to_dict,
+            lambda: _retrieve_thread(request, thread_id),
         )
+        thread = _check_thread_access(request, course, discussion_id, thread)
+        if not thread:
+            raise Http404
+        track_thread_viewed_event(request, course, thread)
 
         with function_trace("get_annotated_content_infos"):
             annotated_content_info = utils.get_annotated_content_infos(
@@ -360,8 +361,24 @@ def _find_thread(request, course, discussion_id, thread_id):
     Returns:
         The thread in question if the user can see it, else None.
     """
+    return _check_thread_access(request, course, discussion_id, _retrieve_thread(request, thread_id))
+
+
+def _retrieve_thread(request, thread_id):
+    """
+    Retrieves the discussion thread with the specified ID from the comments service.
+
+    This only makes comments service requests, so that it can be performed concurrently.
+
+    Args:
+        request: The Django request.
+        thread_id: The ID of the thread.
+
+    Returns:
+        The thread in question if it exists, else None.
+    """
     try:
-        thread = cc.Thread.find(thread_id).retrieve(
+        return cc.Thread.find(thread_id).retrieve(
             with_responses=request.is_ajax(),
             recursive=request.is_ajax(),
             user_id=request.user.id,
@@ -370,6 +387,23 @@ def _find_thread(request, course, discussion_id, thread_id):
         )
     except cc.utils.CommentClientRequestError:
         return None
+
+
+def _check_thread_access(request, course, discussion_id, thread):
+    """
+    Checks that the user can see the discussion thread.
+
+    Args:
+        request: The Django request.
+        course: The owning course.
+        discussion_id: The ID of the owning discussion.
+        thread: The thread, or None.
+
+    Returns:
+        The thread in question if the user can see it, else None.
+    """
+    if thread is None:
+        return None
     # Verify that the student has access to this thread if belongs to a course discussion module
     thread_context = getattr(thread, "context", "course")
     if thread_context == "course" and not utils.discussion_category_id_access(course, request.user, discussion_id):
@@ -16,6 +16,7 @@ from lms.djangoapps.grades import constants, context, course_data, events
 # Grades APIs that should NOT belong within the Grades subsystem
 # TODO move Gradebook to be an external feature outside of core Grades
 from lms.djangoapps.grades.config.waffle import is_writable_gradebook_enabled, gradebook_can_see_bulk_management
+from lms.djangoapps.grades.config import is_incremental_subsection_regrade_enabled
 # Public Grades Factories
 from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory
 from lms.djangoapps.grades.models_api import *
@@ -25,6 +26,7 @@ from lms.djangoapps.grades.signals.handlers import disconnect_submissions_signal
 from lms.djangoapps.grades.subsection_grade import CreateSubsectionGrade
 from lms.djangoapps.grades.subsection_grade_factory import SubsectionGradeFactory
 from lms.djangoapps.grades.tasks import compute_all_grades_for_course as task_compute_all_grades_for_course
+from lms.djangoapps.grades.tasks import update_scorable_block_index as task_update_scorable_block_index
 from lms.djangoapps.grades.util_services import GradesUtilService
 from lms.djangoapps.utils import _get_key
 from track.event_transaction_utils import create_new_event_transaction_id, set_event_transaction_type
@@ -22,6 +22,15 @@ def assume_zero_if_absent(course_key):
     )
 
 
+def is_incremental_subsection_regrade_enabled():
+    """
+    Returns whether grades are recalculated using the persisted index of
+    the subsections that contain each scorable block and the persisted
+    inputs to course grades, instead of the transformed course structure.
+    """
+    return settings.FEATURES.get('ENABLE_INCREMENTAL_SUBSECTION_REGRADE', False)
+
+
 def should_persist_grades(course_key):
     """
     Returns whether grades should be persisted.
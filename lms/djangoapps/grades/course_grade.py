@@ -4,7 +4,7 @@ CourseGrade Class
 
 
 from abc import abstractmethod
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict, defaultdict, namedtuple
 
 import six
 from ccx_keys.locator import CCXLocator
@@ -17,7 +17,7 @@ from xmodule import block_metadata_utils
 
 from .config import assume_zero_if_absent
 from .scores import compute_percent
-from .subsection_grade import ZeroSubsectionGrade
+from .subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
 from .subsection_grade_factory import SubsectionGradeFactory
 
 
@@ -330,5 +330,40 @@ class CourseGrade(CourseGradeBase):
         return success_cutoff and percent >= success_cutoff
 
 
+# Stands in for a graded subsection block, as listed by the persisted CourseGradeInputs.
+GradedSubsection = namedtuple('GradedSubsection', ['location', 'format', 'display_name', 'graded'])
+
+
+class CourseGradeFromInputs(CourseGrade):
+    """
+    Course Grade class when grades are updated from the persisted course
+    grade inputs and subsection grades, rather than from the user's
+    course structure.
+    """
+    def __init__(self, user, course_data, graded_subsection_models, *args, **kwargs):
+        """
+        graded_subsection_models is a list of (GradedSubsection,
+        PersistentSubsectionGrade) tuples for the graded subsections of
+        the course, in course order.
+        """
+        super(CourseGradeFromInputs, self).__init__(user, course_data, *args, **kwargs)
+        self._graded_subsection_models = graded_subsection_models
+
+    @lazy
+    def graded_subsections_by_format(self):
+        subsections_by_format = defaultdict(OrderedDict)
+        for subsection, grade_model in self._graded_subsection_models:
+            subsection_grade = ReadSubsectionGrade(subsection, grade_model, self._subsection_grade_factory)
+            if subsection_grade.graded_total.possible > 0:
+                subsections_by_format[subsection_grade.format][subsection_grade.location] = subsection_grade
+        return subsections_by_format
+
+    @property
+    def attempted(self):
+        # Only updated once the user's course grade was persisted, which
+        # requires a problem to have been attempted.
+        return True
+
+
 def _uniqueify_and_keep_order(iterable):
     return list(OrderedDict([(item, None) for item in iterable]).keys())
@@ -4,11 +4,14 @@ Course Grade Factory Class
 
 
 from collections import namedtuple
+from itertools import islice
 from logging import getLogger
 
 import six
+from ccx_keys.locator import CCXLocator
 from six import text_type
 
+from lms.djangoapps.course_blocks.api import has_individual_student_override_provider
 from openedx.core.djangoapps.signals.signals import (
     COURSE_GRADE_CHANGED,
     COURSE_GRADE_NOW_FAILED,
@@ -17,9 +20,14 @@ from openedx.core.djangoapps.signals.signals import (
 
 from .config import assume_zero_if_absent, should_persist_grades
 from .course_data import CourseData
-from .course_grade import CourseGrade, ZeroCourseGrade
-from .models import PersistentCourseGrade
-from .models_api import prefetch_grade_overrides_and_visible_blocks
+from .course_grade import CourseGrade, CourseGradeFromInputs, GradedSubsection, ZeroCourseGrade
+from .models import PersistentCourseGrade, PersistentSubsectionGrade
+from .models_api import (
+    bulk_prefetch_grade_overrides_and_visible_blocks,
+    prefetch_grade_overrides_and_visible_blocks
+)
+from .subsection_grade_factory import SubsectionGradeFactory
+from .transformer import GradesTransformer
 
 log = getLogger(__name__)
 
@@ -30,6 +38,9 @@ class CourseGradeFactory(object):
     """
     GradeResult = namedtuple('GradeResult', ['student', 'course_grade', 'error'])
 
+    # Number of users whose grading data is prefetched together by bulk_update.
+    BULK_UPDATE_BATCH_SIZE = 100
+
     def read(
             self,
             user,
@@ -83,6 +94,79 @@ class CourseGradeFactory(object):
             force_update_subsections=force_update_subsections
         )
 
+    def update_from_inputs(self, user, course, course_grade_inputs):
+        """
+        Computes, updates, and returns the CourseGrade for the given user
+        in the course from the given CourseGradeInputs, which must be
+        current for the course, and the user's persisted subsection grades,
+        without transforming the course structure for the user.
+
+        Returns None, without updating the grade, if it can't be computed
+        this way: if the inputs don't apply to all learners, or if the
+        user's grades weren't persisted for the current course content and
+        grading policy.
+        """
+        course_key = course.id
+        if (
+                not course_grade_inputs.applies_to_all_learners() or
+                has_individual_student_override_provider() or
+                isinstance(course_key, CCXLocator) or
+                not should_persist_grades(course_key) or
+                assume_zero_if_absent(course_key)
+        ):
+            return None
+
+        try:
+            persistent_grade = PersistentCourseGrade.read(user.id, course_key)
+        except PersistentCourseGrade.DoesNotExist:
+            return None
+        grading_policy_hash = GradesTransformer.grading_policy_hash(course)
+        if (
+                persistent_grade.course_version != course_grade_inputs.course_version or
+                persistent_grade.grading_policy_hash != grading_policy_hash
+        ):
+            return None
+
+        graded_subsections = course_grade_inputs.graded_subsection_list
+        grade_models = {
+            grade_model.full_usage_key: grade_model
+            for grade_model in PersistentSubsectionGrade.objects.select_related('override').filter(
+                user_id=user.id,
+                course_id=course_key,
+                usage_key__in=[usage_key for usage_key, _, _ in graded_subsections],
+            )
+        }
+        if len(grade_models) != len(graded_subsections):
+            return None
+
+        course_data = CourseData(user, course=course)
+        course_grade = CourseGradeFromInputs(
+            user,
+            course_data,
+            [
+                (GradedSubsection(usage_key, assignment_type, display_name, True), grade_models[usage_key])
+                for usage_key, assignment_type, display_name in graded_subsections
+            ],
+        )
+        course_grade = course_grade.update()
+        PersistentCourseGrade.update_or_create(
+            user_id=user.id,
+            course_id=course_key,
+            course_version=persistent_grade.course_version,
+            course_edited_timestamp=persistent_grade.course_edited_timestamp,
+            grading_policy_hash=grading_policy_hash,
+            percent_grade=course_grade.percent,
+            letter_grade=course_grade.letter_grade or "",
+            passed=course_grade.passed,
+        )
+        self._send_course_grade_signals(user, course_data, course_grade)
+
+        log.info(
+            u'Grades: Update from inputs, %s, User: %s, %s',
+            six.text_type(course_data), user.id, course_grade,
+        )
+        return course_grade
+
     def iter(
             self,
             users,
@@ -112,6 +196,73 @@ class CourseGradeFactory(object):
         for user in users:
             yield self._iter_grade_result(user, course_data, force_update)
 
+    def bulk_update(
+            self,
+            users,
+            course=None,
+            collected_block_structure=None,
+            course_key=None,
+            force_update_subsections=False,
+    ):
+        """
+        Computes, updates, and yields a GradeResult for each of the given
+        users in the course, as iter does with force_update.
+
+        Unlike iter, the data needed to grade the users is prefetched for
+        BULK_UPDATE_BATCH_SIZE users at a time, instead of being queried
+        while grading each user: the scores from the user state (in CSM)
+        and the Submissions API, the users' anonymous ids and, if
+        force_update_subsections, the subsection grade overrides and
+        visible blocks. All but the Submissions API scores take a constant
+        number of queries per batch.
+        """
+        course_data = CourseData(
+            user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
+        )
+        should_persist = should_persist_grades(course_data.course_key)
+        users = iter(users)
+        while True:
+            batch = list(islice(users, self.BULK_UPDATE_BATCH_SIZE))
+            if not batch:
+                break
+
+            SubsectionGradeFactory.prefetch_scores(course_data.course_key, batch, course_data.collected_structure)
+            if should_persist and force_update_subsections:
+                bulk_prefetch_grade_overrides_and_visible_blocks(batch, course_data.course_key)
+            try:
+                for user in batch:
+                    yield self._bulk_update_grade_result(user, course_data, force_update_subsections)
+            finally:
+                SubsectionGradeFactory.clear_prefetched_scores(course_data.course_key)
+
+    def _bulk_update_grade_result(self, user, course_data, force_update_subsections):
+        """
+        Returns the GradeResult of updating the given user's grade, using
+        the data prefetched by bulk_update.
+        """
+        try:
+            user_course_data = CourseData(
+                user,
+                course=course_data.course,
+                collected_block_structure=course_data.collected_structure,
+                course_key=course_data.course_key,
+            )
+            course_grade = self._update(
+                user,
+                user_course_data,
+                force_update_subsections=force_update_subsections,
+                prefetched=True,
+            )
+            return self.GradeResult(user, course_grade, None)
+        except Exception as exc:  # pylint: disable=broad-except
+            log.exception(
+                u'Cannot grade student %s in course %s because of exception: %s',
+                user.id,
+                course_data.course_key,
+                text_type(exc)
+            )
+            return self.GradeResult(user, None, exc)
+
     def _iter_grade_result(self, user, course_data, force_update):
         try:
             kwargs = {
@@ -166,16 +317,19 @@ class CourseGradeFactory(object):
         )
 
     @staticmethod
-    def _update(user, course_data, force_update_subsections=False):
+    def _update(user, course_data, force_update_subsections=False, prefetched=False):
         """
         Computes, saves, and returns a CourseGrade object for the
         given user and course.
         Sends a COURSE_GRADE_CHANGED signal to listeners and
         COURSE_GRADE_NOW_PASSED if learner has passed course or
         COURSE_GRADE_NOW_FAILED if learner is now failing course
+
+        If prefetched, the user's grade overrides and visible blocks
+        have already been prefetched by bulk_update.
         """
         should_persist = should_persist_grades(course_data.course_key)
-        if should_persist and force_update_subsections:
+        if should_persist and force_update_subsections and not prefetched:
             prefetch_grade_overrides_and_visible_blocks(user, course_data.course_key)
 
         course_grade = CourseGrade(
@@ -199,6 +353,22 @@ class CourseGradeFactory(object):
                 passed=course_grade.passed,
             )
 
+        CourseGradeFactory._send_course_grade_signals(user, course_data, course_grade)
+
+        log.info(
+            u'Grades: Update, %s, User: %s, %s, persisted: %s',
+            course_data.full_string(), user.id, course_grade, should_persist,
+        )
+
+        return course_grade
+
+    @staticmethod
+    def _send_course_grade_signals(user, course_data, course_grade):
+        """
+        Sends a COURSE_GRADE_CHANGED signal to listeners and
+        COURSE_GRADE_NOW_PASSED if learner has passed course or
+        COURSE_GRADE_NOW_FAILED if learner is now failing course
+        """
         COURSE_GRADE_CHANGED.send_robust(
             sender=None,
             user=user,
@@ -219,10 +389,3 @@ class CourseGradeFactory(object):
                 course_id=course_data.course_key,
                 grade=course_grade,
             )
-
-        log.info(
-            u'Grades: Update, %s, User: %s, %s, persisted: %s',
-            course_data.full_string(), user.id, course_grade, should_persist,
-        )
-
-        return course_grade
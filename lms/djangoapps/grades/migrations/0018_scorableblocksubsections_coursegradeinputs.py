@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+
+from django.db import migrations, models
+from opaque_keys.edx.django.models import CourseKeyField, UsageKeyField
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0017_delete_manual_psgoverride_table'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScorableBlockSubsections',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_id', CourseKeyField(max_length=255)),
+                ('usage_key', UsageKeyField(max_length=255)),
+                ('subsections', models.TextField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseGradeInputs',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_id', CourseKeyField(max_length=255, unique=True)),
+                ('course_version', models.CharField(blank=True, max_length=255, verbose_name=u'Course content version identifier')),
+                ('graded_subsections', models.TextField(blank=True)),
+                ('same_for_all_learners', models.BooleanField(default=False)),
+                ('released_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='scorableblocksubsections',
+            unique_together=set([('course_id', 'usage_key')]),
+        ),
+    ]
@@ -12,13 +12,16 @@ persisted, course grades are also immune to changes in course content.
 import json
 import logging
 from base64 import b64encode
-from collections import defaultdict, namedtuple
+from collections import OrderedDict, defaultdict, namedtuple
 from hashlib import sha1
+from threading import Lock
 
 import six
 from django.apps import apps
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.timezone import now
 from lazy import lazy
@@ -42,6 +45,59 @@ BLOCK_RECORD_LIST_VERSION = 1
 BlockRecord = namedtuple('BlockRecord', ['locator', 'weight', 'raw_possible', 'graded'])
 
 
+class _SavedBlockRecordLists(object):
+    """
+    A process-local, size-bounded LRU map from the content of block record
+    lists whose VisibleBlocks records are known to be saved, to the hashes
+    of those records.
+
+    Learners who see the same blocks of a subsection produce equal block
+    record lists, so this allows most grade writes to skip serializing and
+    hashing their block record lists, and looking up their VisibleBlocks.
+
+    The map is sized by the GRADES_VISIBLE_BLOCKS_LOCAL_CACHE_SIZE setting,
+    and is disabled when it is 0.
+    """
+    def __init__(self):
+        self._hash_values = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'GRADES_VISIBLE_BLOCKS_LOCAL_CACHE_SIZE', 0)
+
+    def get(self, content_key):
+        """
+        Returns the hash of the saved block record list with the given
+        content key, or None if it's not known to be saved.
+        """
+        with self._lock:
+            hash_value = self._hash_values.pop(content_key, None)
+            if hash_value is not None:
+                self._hash_values[content_key] = hash_value
+            return hash_value
+
+    def add(self, content_key, hash_value):
+        """
+        Records that the block record list with the given content key and
+        hash is saved, evicting the least recently used entry if needed.
+        """
+        if not self.max_size:
+            return
+        with self._lock:
+            self._hash_values.pop(content_key, None)
+            self._hash_values[content_key] = hash_value
+            while len(self._hash_values) > self.max_size:
+                self._hash_values.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._hash_values.clear()
+
+
+_saved_block_record_lists = _SavedBlockRecordLists()
+
+
 class BlockRecordList(object):
     """
     An immutable ordered list of BlockRecord objects.
@@ -69,6 +125,14 @@ class BlockRecordList(object):
     def __len__(self):
         return len(self.blocks)
 
+    @lazy
+    def content_key(self):
+        """
+        Returns a hashable key that identifies the content of this list of
+        block records, without serializing it.
+        """
+        return (self.course_key, self.version, self.blocks)
+
     @lazy
     def hash_value(self):
         """
@@ -79,6 +143,9 @@ class BlockRecordList(object):
         supported by adding a label indicated which algorithm was used, e.g.,
         "sha256$j0NDRmSPa5bfid2pAcUXaxCm2Dlh3TwayItZstwyeqQ=".
         """
+        saved_hash_value = _saved_block_record_lists.get(self.content_key)
+        if saved_hash_value is not None:
+            return saved_hash_value
         return b64encode(sha1(self.json_value.encode('utf-8')).digest()).decode('utf-8')
 
     @lazy
@@ -146,6 +213,10 @@ class VisibleBlocks(models.Model):
 
     _CACHE_NAMESPACE = u"grades.models.VisibleBlocks"
 
+    # VisibleBlocks records are immutable and never deleted, so whether one
+    # is saved can be cached across processes for a long time.
+    _SAVED_CACHE_TIMEOUT = 7 * 24 * 60 * 60
+
     class Meta(object):
         app_label = "grades"
 
@@ -178,6 +249,44 @@ class VisibleBlocks(models.Model):
             prefetched = cls._initialize_cache(user_id, course_key)
         return prefetched
 
+    @classmethod
+    def is_saved(cls, blocks):
+        """
+        Returns whether the VisibleBlocks record for the given
+        BlockRecordList is known to be saved, either in this process
+        or in the django cache, without querying the database.
+        """
+        if _saved_block_record_lists.get(blocks.content_key) is not None:
+            return True
+        if cache.get(cls._saved_cache_key(blocks.hash_value)):
+            _saved_block_record_lists.add(blocks.content_key, blocks.hash_value)
+            return True
+        return False
+
+    @classmethod
+    def _mark_saved(cls, block_record_lists):
+        """
+        Records that the VisibleBlocks records for the given
+        BlockRecordLists are saved, once the current transaction commits.
+
+        Marking them any earlier would, should the transaction be rolled
+        back, leave records known to be saved that don't exist, and let
+        other processes skip saving records not yet visible to them.
+        """
+        saved = [(blocks.content_key, blocks.hash_value) for blocks in block_record_lists]
+        if not saved:
+            return
+
+        def _mark():
+            for content_key, hash_value in saved:
+                _saved_block_record_lists.add(content_key, hash_value)
+            cache.set_many(
+                {cls._saved_cache_key(hash_value): True for __, hash_value in saved},
+                cls._SAVED_CACHE_TIMEOUT,
+            )
+
+        transaction.on_commit(_mark)
+
     @classmethod
     def cached_get_or_create(cls, user_id, blocks):
         """
@@ -202,6 +311,7 @@ class VisibleBlocks(models.Model):
                 hashed=blocks.hash_value,
                 defaults={u'blocks_json': blocks.json_value, u'course_id': blocks.course_key},
             )
+        cls._mark_saved([blocks])
         return model
 
     @classmethod
@@ -221,6 +331,7 @@ class VisibleBlocks(models.Model):
             for brl in block_record_lists
         ])
         cls._update_cache(user_id, course_key, created)
+        cls._mark_saved(block_record_lists)
         return created
 
     @classmethod
@@ -230,10 +341,31 @@ class VisibleBlocks(models.Model):
         BlockRecordList objects for the given user and course_key, but
         only for those that aren't already created.
         """
+        unsaved_brls = [brl for brl in block_record_lists if not cls.is_saved(brl)]
+        if not unsaved_brls:
+            return
         cached_records = cls.bulk_read(user_id, course_key)
-        non_existent_brls = {brl for brl in block_record_lists if brl.hash_value not in cached_records}
+        non_existent_brls = {brl for brl in unsaved_brls if brl.hash_value not in cached_records}
         cls.bulk_create(user_id, course_key, non_existent_brls)
 
+    @classmethod
+    def bulk_prefetch(cls, user_ids, course_key):
+        """
+        Prefetches the visible blocks of each of the given users in the given
+        course into the cache, as _initialize_cache does for a single user,
+        but with a single query.
+        """
+        prefetched = {user_id: {} for user_id in user_ids}
+        grades_with_blocks = PersistentSubsectionGrade.objects.select_related('visible_blocks').filter(
+            user_id__in=list(prefetched),
+            course_id=course_key,
+        )
+        for grade in grades_with_blocks:
+            prefetched[grade.user_id][grade.visible_blocks.hashed] = grade.visible_blocks
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user_id, user_visible_blocks in six.iteritems(prefetched):
+            cache[cls._cache_key(user_id, course_key)] = user_visible_blocks
+
     @classmethod
     def _initialize_cache(cls, user_id, course_key):
         """
@@ -263,6 +395,10 @@ class VisibleBlocks(models.Model):
     def _cache_key(cls, user_id, course_key):
         return u"visible_blocks_cache.{}.{}".format(course_key, user_id)
 
+    @classmethod
+    def _saved_cache_key(cls, hash_value):
+        return u"grades.visible_blocks.saved.{}".format(hash_value)
+
 
 @python_2_unicode_compatible
 class PersistentSubsectionGrade(TimeStampedModel):
@@ -424,7 +560,8 @@ class PersistentSubsectionGrade(TimeStampedModel):
         Wrapper for objects.update_or_create.
         """
         cls._prepare_params(params)
-        VisibleBlocks.cached_get_or_create(params['user_id'], params['visible_blocks'])
+        if not VisibleBlocks.is_saved(params['visible_blocks']):
+            VisibleBlocks.cached_get_or_create(params['user_id'], params['visible_blocks'])
         cls._prepare_params_visible_blocks_id(params)
 
         # TODO: do we NEED to pop these?
@@ -700,6 +837,23 @@ class PersistentSubsectionGradeOverride(models.Model):
             cls.objects.filter(grade__user_id=user_id, grade__course_id=course_key)
         }
 
+    @classmethod
+    def bulk_prefetch(cls, user_ids, course_key):
+        """
+        Prefetches the overrides of each of the given users in the given
+        course, as prefetch does for a single user, but with a single query.
+        """
+        prefetched = {user_id: {} for user_id in user_ids}
+        overrides = cls.objects.select_related('grade').filter(
+            grade__user_id__in=list(prefetched),
+            grade__course_id=course_key,
+        )
+        for override in overrides:
+            prefetched[override.grade.user_id][override.grade.usage_key] = override
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user_id, user_overrides in six.iteritems(prefetched):
+            cache[(user_id, str(course_key))] = user_overrides
+
     @classmethod
     def get_override(cls, user_id, usage_key):
         prefetch_values = get_cache(cls._CACHE_NAMESPACE).get((user_id, str(usage_key.course_key)), None)
@@ -770,3 +924,187 @@ class PersistentSubsectionGradeOverride(models.Model):
                 getattr(subsection_grade_model, field_name)
             )
         return cleaned_data
+
+
+@python_2_unicode_compatible
+class ScorableBlockSubsections(models.Model):
+    """
+    A persisted reverse index from each scorable block in a course to the
+    subsections that contain it.
+
+    Used to find the subsection grades affected by a change in a block's
+    score without having to transform the course structure first. The
+    index is current as of the course version of the course's
+    CourseGradeInputs.
+
+    .. no_pii:
+    """
+
+    class Meta(object):
+        app_label = "grades"
+        # (course_id) for updating a course's index, implicitly created via the unique_together constraint
+        unique_together = [
+            ('course_id', 'usage_key'),
+        ]
+
+    course_id = CourseKeyField(blank=False, max_length=255)
+    usage_key = UsageKeyField(blank=False, max_length=255)
+
+    # json-serialized sorted list of the usage keys of the subsections that contain the block
+    subsections = models.TextField(blank=False)
+
+    def __str__(self):
+        """
+        Returns a string representation of this model.
+        """
+        return u"ScorableBlockSubsections: course_id: {}, usage_key: {}, subsections: {}".format(
+            self.course_id, self.usage_key, self.subsections,
+        )
+
+    @property
+    def subsection_keys(self):
+        """
+        Returns the set of usage keys of the subsections that contain the block.
+        """
+        return {
+            UsageKey.from_string(subsection).map_into_course(self.course_id)
+            for subsection in json.loads(self.subsections)
+        }
+
+    @classmethod
+    def get_subsections(cls, usage_key):
+        """
+        Returns the set of usage keys of the subsections that contain the
+        given block, which is empty if the block isn't indexed.
+        """
+        try:
+            indexed = cls.objects.get(course_id=usage_key.course_key, usage_key=usage_key)
+        except cls.DoesNotExist:
+            return set()
+        return indexed.subsection_keys
+
+    @classmethod
+    def update_for_course(cls, course_key, subsections_by_block):
+        """
+        Updates the index of the given course to the given dict of
+        scorable block usage keys to the subsections that contain them.
+
+        Only the rows of the blocks that were added, removed or moved
+        since the last update are written.
+        """
+        serialized_subsections = {
+            six.text_type(usage_key): json.dumps(sorted(six.text_type(subsection) for subsection in subsections))
+            for usage_key, subsections in six.iteritems(subsections_by_block)
+        }
+        with transaction.atomic():
+            stale_ids = []
+            changed_rows = []
+            for row in cls.objects.filter(course_id=course_key):
+                subsections = serialized_subsections.pop(six.text_type(row.usage_key), None)
+                if subsections is None:
+                    stale_ids.append(row.id)
+                elif subsections != row.subsections:
+                    row.subsections = subsections
+                    changed_rows.append(row)
+
+            if stale_ids:
+                cls.objects.filter(id__in=stale_ids).delete()
+            if changed_rows:
+                cls.objects.bulk_update(changed_rows, ['subsections'])
+            if serialized_subsections:
+                cls.objects.bulk_create(
+                    cls(course_id=course_key, usage_key=UsageKey.from_string(usage_key), subsections=subsections)
+                    for usage_key, subsections in six.iteritems(serialized_subsections)
+                )
+        return len(stale_ids), len(changed_rows), len(serialized_subsections)
+
+
+@python_2_unicode_compatible
+class CourseGradeInputs(models.Model):
+    """
+    The inputs to the course grades of a course's learners that don't
+    depend on the learner, as of a version of the course: its graded
+    subsections, in course order.
+
+    Used, along with the persisted subsection grades, to update a
+    learner's course grade without having to transform the course
+    structure for the learner.
+
+    .. no_pii:
+    """
+
+    class Meta(object):
+        app_label = "grades"
+
+    course_id = CourseKeyField(blank=False, max_length=255, unique=True)
+    course_version = models.CharField(u'Course content version identifier', blank=True, max_length=255)
+
+    # json-serialized list of the usage key, assignment type and display name of each graded subsection
+    graded_subsections = models.TextField(blank=True)
+
+    # whether no course, section or subsection is restricted to some of the learners
+    same_for_all_learners = models.BooleanField(default=False)
+    # the latest start date of the course and of its sections and graded subsections
+    released_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        """
+        Returns a string representation of this model.
+        """
+        return u"CourseGradeInputs: course_id: {}, course_version: {}, same_for_all_learners: {}".format(
+            self.course_id, self.course_version, self.same_for_all_learners,
+        )
+
+    @property
+    def graded_subsection_list(self):
+        """
+        Returns a list of (usage key, assignment type, display name)
+        tuples for the graded subsections of the course, in course order.
+        """
+        return [
+            (UsageKey.from_string(usage_key).map_into_course(self.course_id), assignment_type, display_name)
+            for usage_key, assignment_type, display_name in json.loads(self.graded_subsections or '[]')
+        ]
+
+    def applies_to_all_learners(self):
+        """
+        Returns whether all learners currently see the same graded
+        subsections, so that these inputs apply to each of them.
+        """
+        return bool(self.same_for_all_learners and self.released_at and self.released_at <= now())
+
+    @classmethod
+    def get_current(cls, course_key, course_version):
+        """
+        Returns the CourseGradeInputs of the given course if they are
+        current for the given version of the course, else None.
+        """
+        if not course_version:
+            return None
+        try:
+            inputs = cls.objects.get(course_id=course_key)
+        except cls.DoesNotExist:
+            return None
+        if inputs.course_version != course_version:
+            return None
+        return inputs
+
+    @classmethod
+    def update_for_course(cls, course_key, course_version, graded_subsections, same_for_all_learners, released_at):
+        """
+        Updates the CourseGradeInputs of the given course, given a list
+        of (usage key, assignment type, display name) tuples for its
+        graded subsections, in course order.
+        """
+        cls.objects.update_or_create(
+            course_id=course_key,
+            defaults={
+                'course_version': course_version or u'',
+                'graded_subsections': json.dumps([
+                    [six.text_type(usage_key), assignment_type, display_name]
+                    for usage_key, assignment_type, display_name in graded_subsections
+                ]),
+                'same_for_all_learners': same_for_all_learners,
+                'released_at': released_at,
+            },
+        )
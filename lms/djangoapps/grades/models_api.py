@@ -17,6 +17,12 @@ def prefetch_grade_overrides_and_visible_blocks(user, course_key):
     _VisibleBlocks.bulk_read(user.id, course_key)
 
 
+def bulk_prefetch_grade_overrides_and_visible_blocks(users, course_key):
+    user_ids = [user.id for user in users]
+    _PersistentSubsectionGradeOverride.bulk_prefetch(user_ids, course_key)
+    _VisibleBlocks.bulk_prefetch(user_ids, course_key)
+
+
 def prefetch_course_grades(course_key, users):
     _PersistentCourseGrade.prefetch(course_key, users)
 
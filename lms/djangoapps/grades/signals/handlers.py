@@ -247,7 +247,14 @@ def recalculate_course_grade_only(sender, course, course_structure, user, **kwar
     """
     Updates a saved course grade, but does not update the subsection
     grades the user has in this course.
+
+    If the signal comes with the course grade inputs, the course grade is
+    updated from them and the persisted subsection grades when possible.
     """
+    course_grade_inputs = kwargs.get('course_grade_inputs')
+    if course_grade_inputs is not None:
+        if CourseGradeFactory().update_from_inputs(user, course, course_grade_inputs) is not None:
+            return
     CourseGradeFactory().update(user, course=course, course_structure=course_structure)
 
 
@@ -81,9 +81,10 @@ SCORE_PUBLISHED = Signal(
 SUBSECTION_SCORE_CHANGED = Signal(
     providing_args=[
         'course',  # Course object
-        'course_structure',  # BlockStructure object
+        'course_structure',  # BlockStructure object, or None if course_grade_inputs is given
         'user',  # User object
         'subsection_grade',  # SubsectionGrade object
+        'course_grade_inputs',  # Optional CourseGradeInputs object, current for the course
     ]
 )
 
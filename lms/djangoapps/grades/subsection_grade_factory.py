@@ -6,15 +6,19 @@ SubsectionGrade Factory Class
 from collections import OrderedDict
 from logging import getLogger
 
+import six
 from lazy import lazy
 from submissions import api as submissions_api
+from submissions.models import ScoreSummary
+from submissions.serializers import UnannotatedScoreSerializer
 
 from lms.djangoapps.courseware.model_data import ScoresClient
 from lms.djangoapps.grades.config import assume_zero_if_absent, should_persist_grades
 from lms.djangoapps.grades.models import PersistentSubsectionGrade
 from lms.djangoapps.grades.scores import possibly_scored
+from openedx.core.lib.cache_utils import get_cache
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
-from student.models import anonymous_id_for_user
+from student.models import anonymous_id_for_user, anonymous_ids_for_users
 
 from .course_data import CourseData
 from .subsection_grade import CreateSubsectionGrade, ReadSubsectionGrade, ZeroSubsectionGrade
@@ -26,6 +30,8 @@ class SubsectionGradeFactory(object):
     """
     Factory for Subsection Grades.
     """
+    _SCORES_CACHE_NAMESPACE = u'grades.subsection_grade_factory.SubsectionGradeFactory.scores'
+
     def __init__(self, student, course=None, course_structure=None, course_data=None):
         self.student = student
         self.course_data = course_data or CourseData(student, course=course, structure=course_structure)
@@ -106,12 +112,52 @@ class SubsectionGradeFactory(object):
 
         return calculated_grade
 
+    @classmethod
+    def prefetch_scores(cls, course_key, users, course_structure):
+        """
+        Prefetches the scores of the given users for the scorable blocks in
+        the given course structure, both from the user state (in CSM) and
+        from the Submissions API, in a single query each.
+        SubsectionGradeFactories for these users then use the prefetched
+        scores, until clear_prefetched_scores is called.
+
+        The given course_structure should be the collected structure of the
+        course, so that it includes the blocks visible to any of the users.
+        """
+        scorable_locations = [block_key for block_key in course_structure if possibly_scored(block_key)]
+        csm_scores = ScoresClient.create_for_users(course_key, [user.id for user in users], scorable_locations)
+        anonymous_user_ids = anonymous_ids_for_users(users, course_key)
+        submissions_scores = _get_submissions_scores_for_users(course_key, list(anonymous_user_ids.values()))
+        get_cache(cls._SCORES_CACHE_NAMESPACE)[six.text_type(course_key)] = {
+            user.id: (submissions_scores.get(anonymous_user_ids[user.id], {}), csm_scores[user.id])
+            for user in users
+        }
+
+    @classmethod
+    def clear_prefetched_scores(cls, course_key):
+        """
+        Clears the scores prefetched for this course from the RequestCache.
+        """
+        get_cache(cls._SCORES_CACHE_NAMESPACE).pop(six.text_type(course_key), None)
+
+    def _get_prefetched_scores(self):
+        """
+        Returns the (submissions_scores, csm_scores) prefetched for the
+        student, or None if they weren't prefetched.
+        """
+        prefetched = get_cache(self._SCORES_CACHE_NAMESPACE).get(six.text_type(self.course_data.course_key))
+        if prefetched is not None:
+            return prefetched.get(self.student.id)
+
     @lazy
     def _csm_scores(self):
         """
         Lazily queries and returns all the scores stored in the user
         state (in CSM) for the course, while caching the result.
         """
+        prefetched = self._get_prefetched_scores()
+        if prefetched is not None:
+            return prefetched[1]
         scorable_locations = [block_key for block_key in self.course_data.structure if possibly_scored(block_key)]
         return ScoresClient.create_for_locations(self.course_data.course_key, self.student.id, scorable_locations)
 
@@ -121,6 +167,9 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        prefetched = self._get_prefetched_scores()
+        if prefetched is not None:
+            return prefetched[0]
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
@@ -169,3 +218,21 @@ class SubsectionGradeFactory(object):
             getattr(subsection, 'subtree_edited_on', None),
             self.student.id,
         ))
+
+
+def _get_submissions_scores_for_users(course_key, anonymous_user_ids):
+    """
+    Returns a dict mapping each of the given anonymous user ids to its
+    scores in the course, as submissions_api.get_scores returns them, using
+    a single query rather than one per user.
+    """
+    score_summaries = ScoreSummary.objects.filter(
+        student_item__course_id=str(course_key),
+        student_item__student_id__in=anonymous_user_ids,
+    ).select_related('latest', 'latest__submission', 'student_item')
+    scores = {}
+    for summary in score_summaries:
+        if not summary.latest.is_hidden():
+            student_scores = scores.setdefault(summary.student_item.student_id, {})
+            student_scores[summary.student_item.item_id] = UnannotatedScoreSerializer(summary.latest).data
+    return scores
@@ -3,6 +3,7 @@ This module contains tasks for asynchronous execution of grade updates.
 """
 
 
+from collections import OrderedDict
 from logging import getLogger
 
 import six
@@ -11,6 +12,7 @@ from celery_utils.persist_on_failure import LoggedPersistOnFailureTask
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.db.utils import DatabaseError
 from edx_django_utils.monitoring import set_custom_metric, set_custom_metrics_for_course_key
 from opaque_keys.edx.keys import CourseKey, UsageKey
@@ -20,18 +22,26 @@ from submissions import api as sub_api
 from lms.djangoapps.courseware.model_data import get_score
 from lms.djangoapps.course_blocks.api import get_course_blocks
 from lms.djangoapps.grades.config.models import ComputeGradesSetting
+from openedx.core.djangoapps.content.block_structure.exceptions import UsageKeyNotInBlockStructure
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from openedx.core.lib.graph_traversals import traverse_pre_order
 from student.models import CourseEnrollment
 from track.event_transaction_utils import set_event_transaction_id, set_event_transaction_type
 from util.date_utils import from_timestamp
+from xmodule.block_metadata_utils import display_name_with_default
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 
+from .config import is_incremental_subsection_regrade_enabled
 from .config.waffle import DISABLE_REGRADE_ON_POLICY_CHANGE, waffle
 from .constants import ScoreDatabaseTableEnum
 from .course_grade_factory import CourseGradeFactory
 from .exceptions import DatabaseNotReadyError
 from .grade_utils import are_grades_frozen
+from .models import CourseGradeInputs, ScorableBlockSubsections
+from .scores import possibly_scored
 from .signals.signals import SUBSECTION_SCORE_CHANGED
+from .subsection_grade import ReadSubsectionGrade
 from .subsection_grade_factory import SubsectionGradeFactory
 from .transformer import GradesTransformer
 
@@ -120,7 +130,9 @@ def compute_grades_for_course(course_key, offset, batch_size, **kwargs):  # pyli
 
     enrollments = CourseEnrollment.objects.filter(course_id=course_key).order_by('created')
     student_iter = (enrollment.user for enrollment in enrollments[offset:offset + batch_size])
-    for result in CourseGradeFactory().iter(users=student_iter, course_key=course_key, force_update=True):
+    for result in CourseGradeFactory().bulk_update(
+            users=student_iter, course_key=course_key, force_update_subsections=True,
+    ):
         if result.error is not None:
             raise result.error
 
@@ -166,6 +178,73 @@ def recalculate_course_and_subsection_grades_for_user(self, **kwargs):  # pylint
         )
 
 
+@task(base=LoggedPersistOnFailureTask, routing_key=settings.POLICY_CHANGE_GRADES_ROUTING_KEY)
+def update_scorable_block_index(course_key):
+    """
+    Updates the persisted index of the subsections that contain each
+    scorable block in the specified course, and the persisted inputs to
+    its course grades, from its published content.
+    """
+    course_key = CourseKey.from_string(course_key)
+    store = modulestore()
+    with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+        with store.bulk_operations(course_key):
+            course = store.get_course(course_key, depth=0)
+            if course is None:
+                log.warning(u"Grades: Course %s not found when updating the scorable block index.", course_key)
+                return
+            items = {item.location: item for item in store.get_items(course_key)}
+
+    def get_children(block_key):
+        block = items.get(block_key)
+        return block.children if block is not None and block.has_children else []
+
+    subsections_by_block = {}
+    graded_subsections = OrderedDict()
+    same_for_all_learners = not (getattr(course, 'entrance_exam_enabled', False) or _is_restricted(course))
+    released_at = course.start
+    for chapter_key in get_children(course.location):
+        chapter = items.get(chapter_key)
+        for subsection_key in get_children(chapter_key):
+            subsection = items.get(subsection_key)
+            if subsection is None:
+                continue
+            for block_key in traverse_pre_order(subsection_key, get_children):
+                if possibly_scored(block_key):
+                    subsections_by_block.setdefault(block_key, set()).add(subsection_key)
+            if subsection.graded:
+                graded_subsections.setdefault(subsection_key, (
+                    subsection_key, subsection.format, display_name_with_default(subsection),
+                ))
+                same_for_all_learners = same_for_all_learners and not (
+                    _is_restricted(chapter) or _is_restricted(subsection)
+                )
+                starts = [start for start in (released_at, chapter.start, subsection.start) if start]
+                released_at = max(starts) if starts else None
+
+    with transaction.atomic():
+        CourseGradeInputs.update_for_course(
+            course_key,
+            course.course_version,
+            list(graded_subsections.values()),
+            same_for_all_learners,
+            released_at,
+        )
+        deleted, updated, created = ScorableBlockSubsections.update_for_course(course_key, subsections_by_block)
+    log.info(
+        u"Grades: Updated the scorable block index of course %s, version %s: %d deleted, %d updated, %d created.",
+        course_key, course.course_version, deleted, updated, created,
+    )
+
+
+def _is_restricted(block):
+    """
+    Returns whether the given course, section or subsection is visible
+    to only some of the course's learners.
+    """
+    return bool(block.visible_to_staff_only or any(block.group_access.values()))
+
+
 @task(
     bind=True,
     base=LoggedPersistOnFailureTask,
@@ -307,19 +386,42 @@ def _update_subsection_grades(
     A helper function to update subsection grades in the database
     for each subsection containing the given block, and to signal
     that those subsection grades were updated.
+
+    When incremental subsection regrades are enabled, subsection grades
+    that are left unchanged don't trigger a course grade update and, if
+    the persisted course grade inputs are current for the course, the
+    subsections containing the block are read from the scorable block
+    index, so that only their subtrees are transformed for the student.
     """
     student = User.objects.get(id=user_id)
     store = modulestore()
     with store.bulk_operations(course_key):
+        incremental_regrade = is_incremental_subsection_regrade_enabled()
+        if incremental_regrade:
+            course = store.get_course(course_key, depth=0)
+            course_grade_inputs = CourseGradeInputs.get_current(course_key, course.course_version)
+            if course_grade_inputs is not None:
+                _update_indexed_subsection_grades(
+                    student,
+                    course,
+                    course_grade_inputs,
+                    scored_block_usage_key,
+                    only_if_higher,
+                    score_deleted,
+                    force_update_subsections,
+                )
+                return
+
         course_structure = get_course_blocks(student, store.make_course_usage_key(course_key))
+        if not incremental_regrade:
+            course = store.get_course(course_key, depth=0)
+
         subsections_to_update = course_structure.get_transformer_block_field(
             scored_block_usage_key,
             GradesTransformer,
             'subsections',
             set(),
         )
-
-        course = store.get_course(course_key, depth=0)
         subsection_grade_factory = SubsectionGradeFactory(student, course, course_structure)
 
         for subsection_usage_key in subsections_to_update:
@@ -330,6 +432,10 @@ def _update_subsection_grades(
                     score_deleted,
                     force_update_subsections,
                 )
+                if incremental_regrade and isinstance(subsection_grade, ReadSubsectionGrade):
+                    # The persisted grade was kept as it was higher, so
+                    # the course grade is unaffected.
+                    continue
                 SUBSECTION_SCORE_CHANGED.send(
                     sender=None,
                     course=course,
@@ -339,6 +445,50 @@ def _update_subsection_grades(
                 )
 
 
+def _update_indexed_subsection_grades(
+        student,
+        course,
+        course_grade_inputs,
+        scored_block_usage_key,
+        only_if_higher,
+        score_deleted,
+        force_update_subsections,
+):
+    """
+    Updates the student's grade for each subsection containing the given
+    block, per the scorable block index, transforming only the subtree
+    of each of these subsections, and signals the updated grades along
+    with the given course grade inputs.
+    """
+    for subsection_usage_key in ScorableBlockSubsections.get_subsections(scored_block_usage_key):
+        try:
+            subsection_structure = get_course_blocks(student, subsection_usage_key)
+        except UsageKeyNotInBlockStructure:
+            continue
+        if subsection_usage_key not in subsection_structure:
+            # The subsection isn't accessible to the student.
+            continue
+
+        subsection_grade = SubsectionGradeFactory(student, course, subsection_structure).update(
+            subsection_structure[subsection_usage_key],
+            only_if_higher,
+            score_deleted,
+            force_update_subsections,
+        )
+        if isinstance(subsection_grade, ReadSubsectionGrade):
+            # The persisted grade was kept as it was higher, so
+            # the course grade is unaffected.
+            continue
+        SUBSECTION_SCORE_CHANGED.send(
+            sender=None,
+            course=course,
+            course_structure=None,
+            user=student,
+            subsection_grade=subsection_grade,
+            course_grade_inputs=course_grade_inputs,
+        )
+
+
 def _course_task_args(course_key, **kwargs):
     """
     Helper function to generate course-grade task args.
@@ -6,13 +6,18 @@ Tests for the CourseGradeFactory class.
 import itertools
 
 import ddt
+import six
 from django.conf import settings
 from mock import patch
 from six import text_type
+from submissions import api as submissions_api
 
 from lms.djangoapps.courseware.access import has_access
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
+from openedx.core.djangoapps.content.block_structure.api import get_block_structure_manager
 from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from openedx.core.lib.cache_utils import get_cache
+from student.models import anonymous_id_for_user
 from student.tests.factories import UserFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
@@ -21,6 +26,7 @@ from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, waffle
 from ..course_grade import CourseGrade, ZeroCourseGrade
 from ..course_grade_factory import CourseGradeFactory
 from ..subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
+from ..subsection_grade_factory import SubsectionGradeFactory
 from .base import GradeTestBase
 from .utils import mock_get_score
 
@@ -337,6 +343,84 @@ class TestGradeIteration(SharedModuleStoreTestCase):
         self.assertIsNotNone(all_course_grades[student2])
         self.assertIsNotNone(all_course_grades[student5])
 
+    def test_bulk_update(self):
+        # Two of the students have a score in the Submissions API.
+        submission_points = {self.students[0].id: 1, self.students[3].id: 2}
+        for student in self.students:
+            if student.id in submission_points:
+                submission = submissions_api.create_submission(
+                    {
+                        'student_id': anonymous_id_for_user(student, self.course.id),
+                        'course_id': text_type(self.course.id),
+                        'item_id': 'ora_item',
+                        'item_type': 'openassessment',
+                    },
+                    'answer',
+                )
+                submissions_api.set_score(submission['uuid'], submission_points[student.id], 2)
+
+        prefetched_scores = []
+
+        def pop_prefetched_scores(course_key):
+            """
+            Clears the prefetched scores, keeping them for the test.
+            """
+            scores_cache = get_cache(SubsectionGradeFactory._SCORES_CACHE_NAMESPACE)  # pylint: disable=protected-access
+            prefetched_scores.append(scores_cache.pop(text_type(course_key)))
+
+        with patch.object(CourseGradeFactory, 'BULK_UPDATE_BATCH_SIZE', 2):
+            with patch.object(SubsectionGradeFactory, 'clear_prefetched_scores', side_effect=pop_prefetched_scores):
+                results = list(CourseGradeFactory().bulk_update(
+                    self.students, self.course, force_update_subsections=True,
+                ))
+
+        self.assertEqual([result.student for result in results], self.students)
+        for result in results:
+            self.assertIsNone(result.error)
+            self.assertEqual(result.course_grade.percent, 0.0)
+
+        # The scores are prefetched once for each batch of users.
+        self.assertEqual(
+            [sorted(batch_scores) for batch_scores in prefetched_scores],
+            [sorted(student.id for student in batch) for batch in (
+                self.students[0:2], self.students[2:4], self.students[4:],
+            )],
+        )
+        students_by_id = {student.id: student for student in self.students}
+        for batch_scores in prefetched_scores:
+            for user_id, (submissions_scores, _) in six.iteritems(batch_scores):
+                if user_id in submission_points:
+                    self.assertEqual(list(submissions_scores), ['ora_item'])
+                    self.assertEqual(submissions_scores['ora_item']['points_earned'], submission_points[user_id])
+                else:
+                    self.assertEqual(submissions_scores, {})
+                # The scores are the ones the Submissions API returns.
+                self.assertEqual(submissions_scores, submissions_api.get_scores(
+                    text_type(self.course.id), anonymous_id_for_user(students_by_id[user_id], self.course.id),
+                ))
+
+    def test_prefetch_scores_query_count(self):
+        collected_structure = get_block_structure_manager(self.course.id).get_collected()
+        # The course has no scorable blocks, so the user state isn't queried.
+        # A query for the saved anonymous ids, one to save the others and one
+        # for the Submissions API scores of all the users.
+        with self.assertNumQueries(3):
+            SubsectionGradeFactory.prefetch_scores(self.course.id, self.students, collected_structure)
+        SubsectionGradeFactory.clear_prefetched_scores(self.course.id)
+
+    @patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory._update')
+    def test_bulk_update_exception(self, mock_update):
+        mock_update.side_effect = [
+            Exception(u"Error for {}.".format(student.username)) if student.username == 'student2' else None
+            for student in self.students
+        ]
+        results = list(CourseGradeFactory().bulk_update(self.students, self.course))
+        self.assertEqual(
+            {result.student: text_type(result.error) for result in results if result.error},
+            {self.students[1]: "Error for student2."},
+        )
+        self.assertEqual(len(results), 5)
+
     def _course_grades_and_errors_for(self, course, students):
         """
         Simple helper method to iterate through student grades and give us
@@ -12,8 +12,9 @@ from hashlib import sha1
 import ddt
 import pytz
 import six
+from django.db import transaction
 from django.db.utils import IntegrityError
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.utils.timezone import now
 from freezegun import freeze_time
 from mock import patch
@@ -28,7 +29,8 @@ from lms.djangoapps.grades.models import (
     PersistentCourseGrade,
     PersistentSubsectionGrade,
     PersistentSubsectionGradeOverride,
-    VisibleBlocks
+    VisibleBlocks,
+    _saved_block_record_lists
 )
 from student.tests.factories import UserFactory
 from track.event_transaction_utils import get_event_transaction_id, get_event_transaction_type
@@ -189,6 +191,34 @@ class VisibleBlocksTest(GradesModelTestCase):
         self.assertNotEqual(stored_vblocks.pk, new_vblocks.pk)
         self.assertNotEqual(stored_vblocks.hashed, new_vblocks.hashed)
 
+    @override_settings(GRADES_VISIBLE_BLOCKS_LOCAL_CACHE_SIZE=10)
+    @patch('django.db.transaction.on_commit', lambda func, using=None: func())
+    def test_saved_blocks(self):
+        """
+        Ensures that visible blocks that were saved by this process are
+        known to be saved without serializing or looking them up again.
+        """
+        self.addCleanup(_saved_block_record_lists.clear)
+        stored_vblocks = self._create_block_record_list([self.record_a, self.record_b])
+
+        same_blocks = BlockRecordList.from_list([self.record_a, self.record_b], self.course_key)
+        with self.assertNumQueries(0):
+            self.assertTrue(VisibleBlocks.is_saved(same_blocks))
+        self.assertEqual(same_blocks.hash_value, stored_vblocks.hashed)
+        self.assertNotIn('json_value', same_blocks.__dict__)
+
+        self.assertFalse(VisibleBlocks.is_saved(BlockRecordList.from_list([self.record_b], self.course_key)))
+
+    @override_settings(GRADES_VISIBLE_BLOCKS_LOCAL_CACHE_SIZE=1)
+    @patch('django.db.transaction.on_commit', lambda func, using=None: func())
+    def test_saved_blocks_eviction(self):
+        self.addCleanup(_saved_block_record_lists.clear)
+        self._create_block_record_list([self.record_a])
+        self._create_block_record_list([self.record_b])
+
+        self.assertFalse(VisibleBlocks.is_saved(BlockRecordList.from_list([self.record_a], self.course_key)))
+        self.assertTrue(VisibleBlocks.is_saved(BlockRecordList.from_list([self.record_b], self.course_key)))
+
     def test_blocks_property(self):
         """
         Ensures that, given an array of BlockRecord, creating visible_blocks
@@ -203,6 +233,43 @@ class VisibleBlocksTest(GradesModelTestCase):
 
 
 @ddt.ddt
+@override_settings(GRADES_VISIBLE_BLOCKS_LOCAL_CACHE_SIZE=10)
+class VisibleBlocksTransactionTest(TransactionTestCase):
+    """
+    Test that VisibleBlocks are only known to be saved once committed.
+    """
+    def setUp(self):
+        super(VisibleBlocksTransactionTest, self).setUp()
+        self.addCleanup(_saved_block_record_lists.clear)
+        self.course_key = CourseLocator(org='some_org', course='some_course', run='some_run')
+        self.record = BlockRecord(
+            locator=BlockUsageLocator(course_key=self.course_key, block_type='problem', block_id='block_id_a'),
+            weight=1,
+            raw_possible=10,
+            graded=False,
+        )
+
+    def _blocks(self):
+        """
+        Returns a new BlockRecordList of the test's record.
+        """
+        return BlockRecordList.from_list([self.record], self.course_key)
+
+    def test_not_saved_until_commit(self):
+        with transaction.atomic():
+            VisibleBlocks.cached_get_or_create(12345, self._blocks())
+            self.assertFalse(VisibleBlocks.is_saved(self._blocks()))
+        self.assertTrue(VisibleBlocks.is_saved(self._blocks()))
+
+    def test_not_saved_after_rollback(self):
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                VisibleBlocks.cached_get_or_create(12345, self._blocks())
+                raise ValueError
+        self.assertFalse(VisibleBlocks.is_saved(self._blocks()))
+        self.assertFalse(VisibleBlocks.objects.filter(hashed=self._blocks().hash_value).exists())
+
+
 class PersistentSubsectionGradeTest(GradesModelTestCase):
     """
     Test the PersistentSubsectionGrade model.
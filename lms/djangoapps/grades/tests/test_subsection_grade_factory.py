@@ -7,13 +7,14 @@ import ddt
 from django.conf import settings
 from mock import patch
 
+from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
 from lms.djangoapps.courseware.tests.test_submitting_problems import ProblemSubmissionTestMixin
 from lms.djangoapps.grades.config.tests.utils import persistent_grades_feature_flags
 from student.tests.factories import UserFactory
 
 from ..constants import GradeOverrideFeatureEnum
 from ..models import PersistentSubsectionGrade, PersistentSubsectionGradeOverride
-from ..subsection_grade_factory import ZeroSubsectionGrade
+from ..subsection_grade_factory import SubsectionGradeFactory, ZeroSubsectionGrade
 from .base import GradeTestBase
 from .utils import mock_get_score
 
@@ -58,6 +59,32 @@ class TestSubsectionGradeFactory(ProblemSubmissionTestMixin, GradeTestBase):
             grade = self.subsection_grade_factory.update(self.sequence)
         self.assert_grade(grade, 1, 2)
 
+    def test_prefetched_scores(self):  # pylint: disable=protected-access
+        """
+        Test that scores prefetched for a batch of users are used
+        without querying them again.
+        """
+        other_user = UserFactory()
+        for user, grade in ((self.request.user, 1), (other_user, 2)):
+            StudentModuleFactory(
+                student=user,
+                course_id=self.course.id,
+                module_state_key=self.problem.location,
+                grade=grade,
+                max_grade=2,
+            )
+
+        SubsectionGradeFactory.prefetch_scores(self.course.id, [self.request.user, other_user], self.course_structure)
+        try:
+            with self.assertNumQueries(0):
+                csm_scores = self.subsection_grade_factory._csm_scores
+                submissions_scores = self.subsection_grade_factory._submissions_scores
+        finally:
+            SubsectionGradeFactory.clear_prefetched_scores(self.course.id)
+
+        self.assertEqual(csm_scores.get(self.problem.location).correct, 1)
+        self.assertEqual(submissions_scores, {})
+
     def test_write_only_if_engaged(self):
         """
         Test that scores are not persisted when a learner has
@@ -21,7 +21,14 @@ from lms.djangoapps.grades import tasks
 from lms.djangoapps.grades.config.models import PersistentGradesEnabledFlag
 from lms.djangoapps.grades.config.waffle import ENFORCE_FREEZE_GRADE_AFTER_COURSE_END, waffle_flags
 from lms.djangoapps.grades.constants import ScoreDatabaseTableEnum
-from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsectionGrade
+from lms.djangoapps.course_blocks.api import get_course_blocks
+from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory
+from lms.djangoapps.grades.models import (
+    CourseGradeInputs,
+    PersistentCourseGrade,
+    PersistentSubsectionGrade,
+    ScorableBlockSubsections
+)
 from lms.djangoapps.grades.services import GradesService
 from lms.djangoapps.grades.signals.signals import PROBLEM_WEIGHTED_SCORE_CHANGED
 from lms.djangoapps.grades.tasks import (
@@ -30,7 +37,8 @@ from lms.djangoapps.grades.tasks import (
     compute_all_grades_for_course,
     compute_grades_for_course,
     compute_grades_for_course_v2,
-    recalculate_subsection_grade_v3
+    recalculate_subsection_grade_v3,
+    update_scorable_block_index
 )
 from openedx.core.djangoapps.content.block_structure.exceptions import BlockStructureNotFound
 from openedx.core.djangoapps.waffle_utils.testutils import override_waffle_flag
@@ -253,6 +261,126 @@ class RecalculateSubsectionGradeTest(HasCourseWithProblemsMixin, ModuleStoreTest
             self.assertIsNotNone(PersistentCourseGrade.read(self.user.id, self.course.id))
             self.assertGreater(len(PersistentSubsectionGrade.bulk_read_grades(self.user.id, self.course.id)), 0)
 
+    def test_update_scorable_block_index(self):
+        with self.store.default_store(ModuleStoreEnum.Type.split):
+            self.set_up_course()
+            removed_problem = ItemFactory.create(parent=self.sequential, category='problem')
+            ItemFactory.create(parent=self.chapter, category='sequential', graded=True, format='Homework')
+            update_scorable_block_index.apply(kwargs={'course_key': six.text_type(self.course.id)})
+            self.assertEqual(
+                ScorableBlockSubsections.get_subsections(removed_problem.location), {self.sequential.location},
+            )
+            problem_row_id = ScorableBlockSubsections.objects.get(usage_key=self.problem.location).id
+
+            other_sequential = ItemFactory.create(
+                parent=self.chapter, category='sequential', graded=True, format='Homework', visible_to_staff_only=True,
+            )
+            other_sequential.children = [self.problem.location]
+            modulestore().update_item(other_sequential, self.user.id)
+            modulestore().delete_item(removed_problem.location, self.user.id)
+            added_problem = ItemFactory.create(parent=other_sequential, category='problem')
+            orphan_problem = ItemFactory.create(parent=self.chapter, category='problem')
+            update_scorable_block_index.apply(kwargs={'course_key': six.text_type(self.course.id)})
+
+            self.assertEqual(
+                ScorableBlockSubsections.get_subsections(self.problem.location),
+                {self.sequential.location, other_sequential.location},
+            )
+            # The block's row is updated in place rather than replaced.
+            self.assertEqual(ScorableBlockSubsections.objects.get(usage_key=self.problem.location).id, problem_row_id)
+            self.assertEqual(
+                ScorableBlockSubsections.get_subsections(added_problem.location), {other_sequential.location},
+            )
+            self.assertEqual(ScorableBlockSubsections.get_subsections(removed_problem.location), set())
+            self.assertEqual(ScorableBlockSubsections.get_subsections(orphan_problem.location), set())
+
+            course = modulestore().get_course(self.course.id)
+            course_grade_inputs = CourseGradeInputs.get_current(self.course.id, course.course_version)
+            self.assertEqual(len(course_grade_inputs.graded_subsection_list), 2)
+            self.assertEqual(
+                course_grade_inputs.graded_subsection_list[1][:2], (other_sequential.location, u'Homework'),
+            )
+            self.assertFalse(course_grade_inputs.same_for_all_learners)
+            self.assertIsNone(CourseGradeInputs.get_current(self.course.id, u'stale_version'))
+
+    def _set_up_indexed_course(self, index_is_current=True):
+        """
+        Configures a started course with a graded subsection and indexes it.
+        """
+        self.set_up_course()
+        self.course.start = datetime(2015, 1, 1, tzinfo=pytz.UTC)
+        modulestore().update_item(self.course, self.user.id)
+        self.sequential.graded = True
+        self.sequential.format = u'Homework'
+        modulestore().update_item(self.sequential, self.user.id)
+        update_scorable_block_index.apply(kwargs={'course_key': six.text_type(self.course.id)})
+        if not index_is_current:
+            # The course is edited after the index was built.
+            ItemFactory.create(parent=self.chapter, category='sequential')
+
+    @ddt.data(True, False)
+    @patch('lms.djangoapps.grades.signals.signals.SUBSECTION_SCORE_CHANGED.send')
+    def test_incremental_regrade(self, index_is_current, mock_subsection_signal):
+        with self.store.default_store(ModuleStoreEnum.Type.split):
+            self._set_up_indexed_course(index_is_current)
+
+            with patch.dict(settings.FEATURES, {'ENABLE_INCREMENTAL_SUBSECTION_REGRADE': True}):
+                with patch('lms.djangoapps.grades.tasks.get_course_blocks', wraps=get_course_blocks) as mock_blocks:
+                    self._apply_recalculate_subsection_grade()
+
+            # Only the subsection is transformed if the index is current.
+            expected_root = self.sequential.location if index_is_current else self.course.location
+            mock_blocks.assert_called_once_with(self.user, expected_root)
+            self.assertEqual(mock_subsection_signal.call_count, 1)
+            signal_kwargs = mock_subsection_signal.call_args[1]
+            self.assertEqual(signal_kwargs['subsection_grade'].location, self.sequential.location)
+            self.assertEqual(signal_kwargs.get('course_grade_inputs') is not None, index_is_current)
+
+    def test_incremental_regrade_updates_course_grade(self):
+        with self.store.default_store(ModuleStoreEnum.Type.split):
+            self._set_up_indexed_course()
+            with patch.dict(settings.FEATURES, {'ENABLE_INCREMENTAL_SUBSECTION_REGRADE': True}):
+                # The first course grade is computed from the course structure.
+                self._apply_recalculate_subsection_grade()
+                self.assertEqual(PersistentCourseGrade.read(self.user.id, self.course.id).percent_grade, 0.01)
+
+                with patch.object(CourseGradeFactory, 'update', wraps=CourseGradeFactory().update) as mock_update:
+                    with self.mock_csm_get_score(MagicMock(
+                        modified=datetime.utcnow().replace(tzinfo=pytz.UTC) + timedelta(days=1),
+                        grade=2.0,
+                        max_grade=2.0,
+                    )):
+                        with mock_get_score(2, 2):
+                            recalculate_subsection_grade_v3.apply(kwargs=self.recalculate_subsection_grade_kwargs)
+                mock_update.assert_not_called()
+
+            incremental_percent = PersistentCourseGrade.read(self.user.id, self.course.id).percent_grade
+            self.assertEqual(incremental_percent, 0.02)
+            full_course_grade = CourseGradeFactory().update(self.user, course_key=self.course.id)
+            self.assertEqual(full_course_grade.percent, incremental_percent)
+
+    @ddt.data(True, False)
+    @patch('lms.djangoapps.grades.signals.signals.SUBSECTION_SCORE_CHANGED.send')
+    def test_incremental_regrade_skips_unchanged_grade(self, index_is_current, mock_subsection_signal):
+        with self.store.default_store(ModuleStoreEnum.Type.split):
+            self._set_up_indexed_course(index_is_current)
+            self._apply_recalculate_subsection_grade()
+            self.assertEqual(mock_subsection_signal.call_count, 1)
+
+            # A lower score leaves the persisted subsection grade as it was,
+            # so the course grade doesn't need to be updated.
+            self.recalculate_subsection_grade_kwargs['only_if_higher'] = True
+            lower_score = MagicMock(
+                modified=datetime.utcnow().replace(tzinfo=pytz.UTC) + timedelta(days=1),
+                grade=0.0,
+                max_grade=2.0,
+            )
+            with patch.dict(settings.FEATURES, {'ENABLE_INCREMENTAL_SUBSECTION_REGRADE': True}):
+                with self.mock_csm_get_score(lower_score):
+                    with mock_get_score(0, 2):
+                        recalculate_subsection_grade_v3.apply(kwargs=self.recalculate_subsection_grade_kwargs)
+            self.assertEqual(mock_subsection_signal.call_count, 1)
+
     @patch('lms.djangoapps.grades.signals.signals.SUBSECTION_SCORE_CHANGED.send')
     @patch('lms.djangoapps.grades.subsection_grade_factory.SubsectionGradeFactory.update')
     def test_retry_first_time_only(self, mock_update, mock_course_signal):
@@ -590,7 +718,7 @@ class FreezeGradingAfterCourseEndTest(HasCourseWithProblemsMixin, ModuleStoreTes
                         freeze_flag_value,
                         end_date_adjustment,
                         mock_log,
-                        factory.iter,
+                        factory.bulk_update,
                         'compute_grades_for_course'
                     )
 
@@ -13,6 +13,7 @@ WAFFLE_SWITCHES = WaffleSwitchNamespace(name=WAFFLE_NAMESPACE)
 # Waffle switches
 OPTIMIZE_GET_LEARNERS_FOR_COURSE = u'optimize_get_learners_for_course'
 GENERATE_GRADE_REPORT_VERIFIED_ONLY = u'generate_grade_report_for_verified_only'
+PARALLEL_GRADE_REPORTS = u'parallel_grade_reports'
 
 
 def waffle_flags():
@@ -35,3 +36,11 @@ def generate_grade_report_for_verified_only():
     verified learners.
     """
     return WAFFLE_SWITCHES.is_enabled(GENERATE_GRADE_REPORT_VERIFIED_ONLY)
+
+
+def parallel_grade_reports_enabled():
+    """
+    Returns True if waffle switch is enabled that indicates course grade reports
+    are to be generated by subtasks that each grade a shard of the enrolled learners.
+    """
+    return WAFFLE_SWITCHES.is_enabled(PARALLEL_GRADE_REPORTS)
@@ -16,3 +16,8 @@ class UpdateProblemModuleStateError(Exception):
 class DuplicateTaskException(Exception):
     """Exception indicating that a task already exists or has already completed."""
     pass
+
+
+class SubtaskFailedError(Exception):
+    """Exception indicating that some subtasks of a task failed, so that its results are incomplete."""
+    pass
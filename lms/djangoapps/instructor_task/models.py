@@ -20,13 +20,15 @@ import hashlib
 import json
 import logging
 import os.path
+import shutil
+import tempfile
 from uuid import uuid4
 
 import six
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.db import models, transaction
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext as _
@@ -196,9 +198,9 @@ class InstructorTask(models.Model):
 class ReportStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for reports
-    download. Should probably refactor later to create a ReportFile object that
-    can simply be appended to for the sake of memory efficiency, rather than
-    passing in the whole dataset. Doing that for now just because it's simpler.
+    download. Large reports should be built up with a ReportFile, which can
+    simply be appended to for the sake of memory efficiency, rather than
+    passing in the whole dataset.
     """
     @classmethod
     def from_config(cls, config_name):
@@ -243,6 +245,64 @@ class ReportStore(object):
                 yield [six.text_type(item) for item in row]
 
 
+class ReportFile(object):
+    """
+    A CSV report that rows can be appended to as they are generated.
+
+    Rows are written to a temporary file that is kept in memory only until
+    it grows beyond MAX_MEMORY_SIZE bytes, after which it is rolled over to
+    disk. Once complete, the file is handed to the report store as a
+    stream via `ReportStore.store_file`, so memory use stays constant
+    regardless of the size of the report.
+    """
+    MAX_MEMORY_SIZE = 1024 * 1024
+
+    def __init__(self):
+        self.file = tempfile.SpooledTemporaryFile(max_size=self.MAX_MEMORY_SIZE)
+        if six.PY2:
+            # Adding unicode signature (BOM) for MS Excel 2013 compatibility
+            self.file.write(codecs.BOM_UTF8)
+            self._csvwriter = csv.writer(self.file)
+        else:
+            self._csvwriter = csv.writer(codecs.getwriter('utf-8')(self.file))
+        self.num_rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def append_rows(self, rows):
+        """
+        Appends the given rows (each row is an iterable of strings) to
+        the report.
+        """
+        for row in rows:
+            if six.PY2:
+                self._csvwriter.writerow([six.text_type(item).encode('utf-8') for item in row])
+            else:
+                self._csvwriter.writerow([six.text_type(item) for item in row])
+            self.num_rows += 1
+
+    def append_file(self, source):
+        """
+        Appends the contents of the given file-like object, which holds
+        rows previously written by another ReportFile, without a header.
+        The rows are copied in chunks, and are not counted in num_rows.
+        """
+        bom = source.read(len(codecs.BOM_UTF8))
+        if bom != codecs.BOM_UTF8:
+            self.file.write(bom)
+        shutil.copyfileobj(source, self.file)
+
+    def close(self):
+        """
+        Discards the temporary file backing the report.
+        """
+        self.file.close()
+
+
 class DjangoStorageReportStore(ReportStore):
     """
     ReportStore implementation that delegates to django's storage api.
@@ -300,6 +360,40 @@ class DjangoStorageReportStore(ReportStore):
         output_buffer.seek(0)
         self.store(course_id, filename, output_buffer)
 
+    def store_file(self, course_id, filename, report_file):
+        """
+        Given a course_id, filename, and a ReportFile, stream the contents
+        of the report file to the storage backend without loading them
+        into memory. The storage backend reads the file in chunks (or,
+        for S3, uploads it in parts).
+        """
+        path = self.path_to(course_id, filename)
+        report_file.file.seek(0)
+        self.storage.save(path, File(report_file.file, name=filename))
+
+    def open(self, course_id, filename):
+        """
+        Return a file-like object for reading the given file, as bytes.
+        """
+        return self.storage.open(self.path_to(course_id, filename), 'rb')
+
+    def delete(self, course_id, filename):
+        """
+        Delete the given file for the given course.
+        """
+        self.storage.delete(self.path_to(course_id, filename))
+
+    def list_files(self, course_id, dirname):
+        """
+        For a given `course_id`, return the sorted names of the files in
+        the given directory, which are relative to that directory.
+        """
+        try:
+            _, filenames = self.storage.listdir(self.path_to(course_id, dirname))
+        except OSError:
+            return []
+        return sorted(filenames)
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples.
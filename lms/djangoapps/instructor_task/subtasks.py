@@ -459,7 +459,7 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
         raise DuplicateTaskException(msg)
 
 
-def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0):
+def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0, mark_complete=True):
     """
     Update the status of the subtask in the parent InstructorTask object tracking its progress.
 
@@ -470,16 +470,22 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 
     The subtask lock acquired in the call to check_subtask_is_valid() is released here, only when
     the attempting of retries has concluded.
+
+    Returns True if this update completed the last of the InstructorTask's subtasks, so that
+    callers can run any final steps, such as merging the subtasks' results, exactly once.
+    If `mark_complete` is False, the InstructorTask is left in PROGRESS when its last subtask
+    completes, and the caller is responsible for calling complete_instructor_task() once those
+    final steps are done.
     """
     try:
-        _update_subtask_status(entry_id, current_task_id, new_subtask_status)
+        return _update_subtask_status(entry_id, current_task_id, new_subtask_status, mark_complete)
     except DatabaseError:
         # If we fail, try again recursively.
         retry_count += 1
         if retry_count < MAX_DATABASE_LOCK_RETRIES:
             TASK_LOG.info(u"Retrying to update status for subtask %s of instructor task %d with status %s:  retry %d",
                           current_task_id, entry_id, new_subtask_status, retry_count)
-            update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count)
+            return update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count, mark_complete)
         else:
             TASK_LOG.info(u"Failed to update status after %d retries for subtask %s of instructor task %d with status %s",
                           retry_count, current_task_id, entry_id, new_subtask_status)
@@ -492,7 +498,7 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 
 
 @transaction.atomic
-def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
+def _update_subtask_status(entry_id, current_task_id, new_subtask_status, mark_complete=True):
     """
     Update the status of the subtask in the parent InstructorTask object tracking its progress.
 
@@ -512,12 +518,14 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     subtasks.  'Total' is expected to have been set at the time the subtasks were created.
     The other three counters are incremented depending on the value of `status`.  Once the counters
     for 'succeeded' and 'failed' match the 'total', the subtasks are done and the InstructorTask's
-    "status" is changed to SUCCESS.
+    "status" is changed to SUCCESS, unless `mark_complete` is False.
 
     The "subtasks" field also contains a 'status' key, that contains a dict that stores status
     information for each subtask.  At the moment, the value for each subtask (keyed by its task_id)
     is the value of the SubtaskStatus.to_dict(), but could be expanded in future to store information
     about failure messages, progress made, etc.
+
+    Returns True if this update completed the last of the subtasks.
     """
     TASK_LOG.info(u"Preparing to update status for subtask %s for instructor task %d with status %s",
                   current_task_id, entry_id, new_subtask_status)
@@ -567,8 +575,9 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
         # If we're done with the last task, update the parent status to indicate that.
         # At present, we mark the task as having succeeded.  In future, we should see
         # if there was a catastrophic failure that occurred, and figure out how to
-        # report that here.
-        if num_remaining <= 0:
+        # report that here.  Callers that still have work to do once all of the
+        # subtasks are done leave the task in progress, and complete it themselves.
+        if num_remaining <= 0 and mark_complete:
             entry.task_state = SUCCESS
         entry.subtasks = json.dumps(subtask_dict)
         entry.task_output = InstructorTask.create_output_for_success(task_progress)
@@ -577,6 +586,24 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
         entry.save()
         TASK_LOG.info(u"Task output updated to %s for subtask %s of instructor task %d",
                       entry.task_output, current_task_id, entry_id)
+        return new_state in READY_STATES and num_remaining == 0
     except Exception:
         TASK_LOG.exception("Unexpected error while updating InstructorTask.")
         raise
+
+
+@transaction.atomic
+def complete_instructor_task(entry_id, state, exception=None, traceback_string=None):
+    """
+    Sets the final state of an InstructorTask whose subtasks were updated with
+    `mark_complete=False`, once all of them have completed.
+
+    If an exception is given, the task's output is replaced by the exception's
+    information, as for any other failed task.
+    """
+    entry = InstructorTask.objects.select_for_update().get(pk=entry_id)
+    entry.task_state = state
+    if exception is not None:
+        entry.task_output = InstructorTask.create_output_for_failure(exception, traceback_string)
+    entry.save()
+    TASK_LOG.info(u"Instructor task %d completed with state %s", entry_id, state)
@@ -29,6 +29,7 @@ from django.conf import settings
 from django.utils.translation import ugettext_noop
 
 from bulk_email.tasks import perform_delegate_email_batches
+from lms.djangoapps.instructor_task.config.waffle import parallel_grade_reports_enabled
 from lms.djangoapps.instructor_task.tasks_base import BaseInstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
@@ -185,10 +186,40 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
+    if parallel_grade_reports_enabled():
+        def _create_grades_csv_shard_subtask(to_grade, initial_subtask_status, report_for_verified_only):
+            """Creates a subtask to grade the given shard of learners."""
+            return calculate_grades_csv_shard.subtask(
+                (
+                    entry_id,
+                    xmodule_instance_args,
+                    [user['pk'] for user in to_grade],
+                    initial_subtask_status.to_dict(),
+                    report_for_verified_only,
+                ),
+                task_id=initial_subtask_status.task_id,
+                routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+            )
+
+        task_fn = partial(CourseGradeReport.generate_in_shards, _create_grades_csv_shard_subtask, xmodule_instance_args)
+    else:
+        task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
+def calculate_grades_csv_shard(
+    entry_id, xmodule_instance_args, user_ids, subtask_status_dict, report_for_verified_only=None
+):
+    """
+    Grade a shard of a course's learners for a grade report that is generated
+    in parallel. The last shard to complete merges the report.
+    """
+    return CourseGradeReport.generate_shard(
+        xmodule_instance_args, entry_id, user_ids, subtask_status_dict, report_for_verified_only
+    )
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
@@ -2,21 +2,24 @@
 Functionality for generating grade reports.
 """
 
+import json
 import logging
 import re
+import traceback
 from collections import OrderedDict, defaultdict
 from datetime import datetime
 from itertools import chain
 from time import time
 
 import six
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from lazy import lazy
 from opaque_keys.edx.keys import UsageKey
 from pytz import UTC
 from six import text_type
-from six.moves import zip, zip_longest
+from six.moves import range, zip_longest
 
 from course_blocks.api import get_course_blocks
 from course_modes.models import CourseMode
@@ -32,6 +35,15 @@ from lms.djangoapps.instructor_task.config.waffle import (
     generate_grade_report_for_verified_only,
     optimize_get_learners_switch_enabled
 )
+from lms.djangoapps.instructor_task.exceptions import SubtaskFailedError
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportFile, ReportStore
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    complete_instructor_task,
+    queue_subtasks_for_query,
+    update_subtask_status
+)
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.services import IDVerificationService
 from openedx.core.lib.cache_utils import get_cache
@@ -45,7 +57,7 @@ from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import upload_csv_to_report_store, upload_report_file_to_report_store
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -69,6 +81,17 @@ def _flatten(iterable):
     return list(chain.from_iterable(iterable))
 
 
+def _update_task_progress(context, success_rows, error_rows):
+    """
+    Adds the given batch of rows to the task progress counters of the
+    given report context, and reports the updated progress on the task.
+    """
+    context.task_progress.succeeded += len(success_rows)
+    context.task_progress.failed += len(error_rows)
+    context.task_progress.attempted += len(success_rows) + len(error_rows)
+    context.task_progress.update_task_state()
+
+
 class GradeReportBase(object):
     """
     Base class for grade reports (ProblemGradeReport and CourseGradeReport).
@@ -163,31 +186,28 @@ class GradeReportBase(object):
         course_id = context.course_id
         return get_enrolled_learners_for_course(course_id=course_id, verified_only=context.report_for_verified_only)
 
-    def _compile(self, context, batched_rows):
+    def _compile(self, context, batched_rows, success_file, error_file):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        Appends each batch of (success_rows, error_rows) in the given
+        batched_rows to the success and error report files as soon as it is
+        generated, so that only a single batch is held in memory at a time.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = zip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
+        for success_rows, error_rows in batched_rows:
+            success_file.append_rows(success_rows)
+            error_file.append_rows(error_rows)
+            _update_task_progress(context, success_rows, error_rows)
 
-        # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
-        context.task_progress.failed = len(error_rows)
-        context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
         context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
 
-    def _upload(self, context, success_rows, error_rows):
+    def _upload(self, context, success_file, error_file):
         """
-        Creates and uploads a CSV for the given headers and rows.
+        Uploads the given success and error report files, whose first rows
+        are their headers.
         """
         date = datetime.now(UTC)
-        upload_csv_to_report_store(success_rows, context.file_name, context.course_id, date)
-        if len(error_rows) > 1:
-            upload_csv_to_report_store(error_rows, context.file_name + '_err', context.course_id, date)
+        upload_report_file_to_report_store(success_file, context.file_name, context.course_id, date)
+        if error_file.num_rows > 1:
+            upload_report_file_to_report_store(error_file, context.file_name + '_err', context.course_id, date)
 
     def log_additional_info_for_testing(self, context, message):
         """
@@ -206,7 +226,9 @@ class _CourseGradeReportContext(object):
     boundaries.
     """
 
-    def __init__(self, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+    def __init__(
+        self, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name, report_for_verified_only=None
+    ):
         self.task_info_string = (
             u'Task: {task_id}, '
             u'InstructorTask ID: {entry_id}, '
@@ -218,8 +240,12 @@ class _CourseGradeReportContext(object):
             course_id=course_id,
             task_input=_task_input,
         )
+        self.entry_id = _entry_id
         self.action_name = action_name
         self.course_id = course_id
+        if report_for_verified_only is None:
+            report_for_verified_only = generate_grade_report_for_verified_only()
+        self.report_for_verified_only = report_for_verified_only
         self.task_progress = TaskProgress(self.action_name, total=None, start_time=time())
 
     @lazy
@@ -405,6 +431,10 @@ class CourseGradeReport(object):
     # Batch size for chunking the list of enrollees in the course.
     USER_BATCH_SIZE = 100
 
+    # Report store directory for the CSV parts written by each shard of a
+    # report that is generated in parallel.
+    SHARD_PARTS_DIR = u'grade_report_parts'
+
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
         """
@@ -414,20 +444,103 @@ class CourseGradeReport(object):
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
             return CourseGradeReport()._generate(context)
 
+    @classmethod
+    def generate_in_shards(
+        cls, create_shard_subtask, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name
+    ):
+        """
+        Public method to generate a grade report in parallel.
+
+        The enrolled learners, in order of id, are split into shards of at most
+        GRADES_DOWNLOAD_USERS_PER_TASK learners, and a subtask, created by calling
+        `create_shard_subtask` with the shard's list of {'pk': user_id} dicts, its
+        initial SubtaskStatus and whether the report is for verified learners only,
+        is queued for each shard. Each subtask calls `generate_shard`, and the last
+        to complete merges the shards' parts into the final report.
+        """
+        context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+        learners = CourseEnrollment.objects.users_enrolled_in(
+            course_id,
+            include_inactive=True,
+            verified_only=context.report_for_verified_only,
+        ).order_by('id')
+        total_num_learners = learners.count()
+        if total_num_learners == 0:
+            with modulestore().bulk_operations(course_id):
+                return CourseGradeReport()._generate(context)
+
+        def _create_shard_subtask(to_grade, initial_subtask_status):
+            """Creates the subtask for the given shard, for the learners selected above."""
+            return create_shard_subtask(to_grade, initial_subtask_status, context.report_for_verified_only)
+
+        entry = InstructorTask.objects.get(pk=_entry_id)
+        return queue_subtasks_for_query(
+            entry,
+            action_name,
+            _create_shard_subtask,
+            [learners],
+            [],
+            settings.GRADES_DOWNLOAD_USERS_PER_TASK,
+            total_num_learners,
+        )
+
+    @classmethod
+    def generate_shard(
+        cls, _xmodule_instance_args, _entry_id, user_ids, subtask_status_dict, report_for_verified_only=None
+    ):
+        """
+        Public method to generate the part of a grade report for the given
+        shard of learners, as a subtask of `generate_in_shards`.
+
+        The InstructorTask stays in progress until the last shard to complete
+        has merged the report, and then fails if any shard or the merge did.
+        """
+        subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+        current_task_id = subtask_status.task_id
+        check_subtask_is_valid(_entry_id, current_task_id, subtask_status)
+
+        entry = InstructorTask.objects.get(pk=_entry_id)
+        course_id = entry.course_id
+        action_name = json.loads(entry.task_output)['action_name']
+        report = CourseGradeReport()
+        with modulestore().bulk_operations(course_id):
+            context = _CourseGradeReportContext(
+                _xmodule_instance_args, _entry_id, course_id, json.loads(entry.task_input), action_name,
+                report_for_verified_only=report_for_verified_only,
+            )
+            try:
+                report._generate_shard(context, user_ids)  # pylint: disable=protected-access
+            except Exception:
+                TASK_LOG.exception(u'%s, Task type: %s, Failed to grade shard', context.task_info_string, action_name)
+                subtask_status.increment(failed=len(user_ids), state=FAILURE)
+                if update_subtask_status(_entry_id, current_task_id, subtask_status, mark_complete=False):
+                    report._complete_shards(context)  # pylint: disable=protected-access
+                raise
+
+            subtask_status.increment(
+                succeeded=context.task_progress.succeeded,
+                failed=context.task_progress.failed,
+                state=SUCCESS,
+            )
+            if update_subtask_status(_entry_id, current_task_id, subtask_status, mark_complete=False):
+                report._complete_shards(context)  # pylint: disable=protected-access
+        return subtask_status.to_dict()
+
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
         """
         context.update_status(u'Starting grades')
-        success_headers = self._success_headers(context)
-        error_headers = self._error_headers()
-        batched_rows = self._batched_rows(context)
+        with ReportFile() as success_file, ReportFile() as error_file:
+            success_file.append_rows([self._success_headers(context)])
+            error_file.append_rows([self._error_headers()])
+            batched_rows = self._batched_rows(context)
 
-        context.update_status(u'Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
+            context.update_status(u'Compiling grades')
+            self._compile(context, batched_rows, success_file, error_file)
 
-        context.update_status(u'Uploading grades')
-        self._upload(context, success_headers, success_rows, error_headers, error_rows)
+            context.update_status(u'Uploading grades')
+            self._upload(context, success_file, error_file)
 
         return context.update_status(u'Completed grades')
 
@@ -452,40 +565,140 @@ class CourseGradeReport(object):
         """
         return ["Student ID", "Username", "Error"]
 
-    def _batched_rows(self, context):
+    def _generate_shard(self, context, user_ids):
+        """
+        Internal method for grading the given shard of learners and storing
+        the resulting rows, without headers, as parts of the report.
+        """
+        context.update_status(u'Starting grades for shard')
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        # Parts are named after the shard's first learner, so that sorting
+        # them by name orders them as the learners were sharded.
+        part_name = u'{:012d}.csv'.format(user_ids[0])
+        with ReportFile() as success_file, ReportFile() as error_file:
+            batched_rows = self._batched_rows(context, self._batch_shard_users(user_ids))
+            self._compile(context, batched_rows, success_file, error_file)
+
+            context.update_status(u'Uploading grades for shard')
+            for kind, report_file in ((u'success', success_file), (u'error', error_file)):
+                if report_file.num_rows:
+                    report_store.store_file(
+                        context.course_id, self._shard_part_path(context, kind, part_name), report_file,
+                    )
+        return context.update_status(u'Completed grades for shard')
+
+    def _complete_shards(self, context):
         """
-        A generator of batches of (success_rows, error_rows) for this report.
+        Internal method for merging the report once all of its shards have
+        completed, and only then marking the InstructorTask as completed: as
+        failed if any of the shards failed or the merge raised, and as
+        succeeded otherwise.
         """
-        for users in self._batch_users(context):
+        try:
+            self._merge_shards(context)
+        except Exception as exc:  # pylint: disable=broad-except
+            TASK_LOG.exception(
+                u'%s, Task type: %s, Failed to merge grades', context.task_info_string, context.action_name,
+            )
+            complete_instructor_task(context.entry_id, FAILURE, exc, traceback.format_exc())
+        else:
+            complete_instructor_task(context.entry_id, SUCCESS)
+
+    def _merge_shards(self, context):
+        """
+        Internal method for concatenating the parts stored by all of the
+        shards of a report into the final report, and deleting the parts.
+
+        If any of the shards failed, the report would be incomplete, so only
+        the parts are deleted, and SubtaskFailedError is raised.
+        """
+        subtasks = json.loads(InstructorTask.objects.get(pk=context.entry_id).subtasks)
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        part_names = {
+            kind: report_store.list_files(context.course_id, self._shard_part_path(context, kind))
+            for kind in (u'success', u'error')
+        }
+        try:
+            self._merge_parts(context, report_store, subtasks, part_names)
+        finally:
+            for kind in part_names:
+                for part_name in part_names[kind]:
+                    report_store.delete(context.course_id, self._shard_part_path(context, kind, part_name))
+
+    def _merge_parts(self, context, report_store, subtasks, part_names):
+        """
+        Internal method for concatenating the given parts into the final report.
+        """
+        if subtasks['failed']:
+            raise SubtaskFailedError(
+                u'{} of {} shards failed, not merging grades'.format(subtasks['failed'], subtasks['total'])
+            )
+
+        context.update_status(u'Merging grades')
+        with ReportFile() as success_file, ReportFile() as error_file:
+            success_file.append_rows([self._success_headers(context)])
+            error_file.append_rows([self._error_headers()])
+            for kind, report_file in ((u'success', success_file), (u'error', error_file)):
+                for part_name in part_names[kind]:
+                    part_path = self._shard_part_path(context, kind, part_name)
+                    with report_store.open(context.course_id, part_path) as part:
+                        report_file.append_file(part)
+
+            date = datetime.now(UTC)
+            upload_report_file_to_report_store(success_file, 'grade_report', context.course_id, date)
+            if part_names[u'error']:
+                upload_report_file_to_report_store(error_file, 'grade_report_err', context.course_id, date)
+
+    def _shard_part_path(self, context, kind, part_name=None):
+        """
+        Returns the report store path of the given part, or of the directory
+        of parts of the given kind, for the report of the given context.
+        """
+        parts_dir = u'{}/{}/{}'.format(self.SHARD_PARTS_DIR, context.entry_id, kind)
+        return u'{}/{}'.format(parts_dir, part_name) if part_name else parts_dir
+
+    def _batch_shard_users(self, user_ids):
+        """
+        Returns a generator of batches of the users with the given ids.
+        """
+        for index in range(0, len(user_ids), self.USER_BATCH_SIZE):
+            yield get_user_model().objects.filter(
+                id__in=user_ids[index:index + self.USER_BATCH_SIZE],
+            ).select_related('profile').order_by('id')
+
+    def _batched_rows(self, context, user_batches=None):
+        """
+        A generator of batches of (success_rows, error_rows) for this report,
+        for the given batches of users, or for all enrolled learners.
+        """
+        if user_batches is None:
+            user_batches = self._batch_users(context)
+        for users in user_batches:
             users = [u for u in users if u is not None]
             yield self._rows_for_users(context, users)
 
-    def _compile(self, context, batched_rows):
+    def _compile(self, context, batched_rows, success_file, error_file):
         """
-        Compiles and returns the complete list of (success_rows, error_rows) for
-        the given batched_rows and context.
+        Appends each batch of (success_rows, error_rows) in the given
+        batched_rows to the success and error report files as soon as it is
+        generated, so that only a single batch is held in memory at a time.
         """
-        # partition and chain successes and errors
-        success_rows, error_rows = zip(*batched_rows)
-        success_rows = list(chain(*success_rows))
-        error_rows = list(chain(*error_rows))
+        for success_rows, error_rows in batched_rows:
+            success_file.append_rows(success_rows)
+            error_file.append_rows(error_rows)
+            _update_task_progress(context, success_rows, error_rows)
 
-        # update metrics on task status
-        context.task_progress.succeeded = len(success_rows)
-        context.task_progress.failed = len(error_rows)
-        context.task_progress.attempted = context.task_progress.succeeded + context.task_progress.failed
         context.task_progress.total = context.task_progress.attempted
-        return success_rows, error_rows
 
-    def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
+    def _upload(self, context, success_file, error_file):
         """
-        Creates and uploads a CSV for the given headers and rows.
+        Uploads the given success and error report files, whose first rows
+        are their headers.
         """
         date = datetime.now(UTC)
-        upload_csv_to_report_store([success_headers] + success_rows, 'grade_report', context.course_id, date)
-        if len(error_rows) > 0:
-            error_rows = [error_headers] + error_rows
-            upload_csv_to_report_store(error_rows, 'grade_report_err', context.course_id, date)
+        upload_report_file_to_report_store(success_file, 'grade_report', context.course_id, date)
+        if error_file.num_rows > 1:
+            upload_report_file_to_report_store(error_file, 'grade_report_err', context.course_id, date)
 
     def _grades_header(self, context):
         """
@@ -564,8 +777,7 @@ class CourseGradeReport(object):
 
         course_id = context.course_id
         task_log_message = u'{}, Task type: {}'.format(context.task_info_string, context.action_name)
-        report_for_verified_only = generate_grade_report_for_verified_only()
-        return get_enrolled_learners_for_course(course_id=course_id, verified_only=report_for_verified_only)
+        return get_enrolled_learners_for_course(course_id=course_id, verified_only=context.report_for_verified_only)
 
     def _user_grades(self, course_grade, context):
         """
@@ -726,14 +938,15 @@ class ProblemGradeReport(GradeReportBase):
         `course_id`.
         """
         context.update_status('ProblemGradeReport - 1: Starting problem grades')
-        success_headers = self._success_headers(context)
-        error_headers = self._error_headers()
-        batched_rows = self._batched_rows(context)
+        with ReportFile() as success_file, ReportFile() as error_file:
+            success_file.append_rows([self._success_headers(context)])
+            error_file.append_rows([self._error_headers()])
+            batched_rows = self._batched_rows(context)
 
-        context.update_status('ProblemGradeReport - 2: Compiling grades')
-        success_rows, error_rows = self._compile(context, batched_rows)
-        context.update_status('ProblemGradeReport - 3: Uploading grades')
-        self._upload(context, [success_headers] + success_rows, [error_headers] + error_rows)
+            context.update_status('ProblemGradeReport - 2: Compiling grades')
+            self._compile(context, batched_rows, success_file, error_file)
+            context.update_status('ProblemGradeReport - 3: Uploading grades')
+            self._upload(context, success_file, error_file)
 
         return context.update_status('ProblemGradeReport - 4: Completed problem grades')
 
@@ -771,7 +984,6 @@ class ProblemGradeReport(GradeReportBase):
             collected_block_structure=context.course_structure,
             course_key=context.course_id,
         ):
-            context.task_progress.attempted += 1
             if not course_grade:
                 err_msg = text_type(error)
                 # There was an error grading this student.
@@ -781,7 +993,6 @@ class ProblemGradeReport(GradeReportBase):
                     [student.id, student.email, student.username] +
                     [err_msg]
                 )
-                context.task_progress.failed += 1
                 continue
 
             earned_possible_values = []
@@ -796,7 +1007,6 @@ class ProblemGradeReport(GradeReportBase):
                     else:
                         earned_possible_values.append(['Not Attempted', problem_score.possible])
 
-            context.task_progress.succeeded += 1
             enrollment_status = _user_enrollment_status(student, context.course_id)
             success_rows.append(
                 [student.id, student.email, student.username] +
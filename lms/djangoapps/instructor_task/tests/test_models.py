@@ -12,7 +12,7 @@ from django.test import SimpleTestCase, TestCase, override_settings
 from opaque_keys.edx.locator import CourseLocator
 
 from common.test.utils import MockS3BotoMixin
-from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore, TASK_INPUT_LENGTH
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportFile, ReportStore, TASK_INPUT_LENGTH
 from lms.djangoapps.instructor_task.tests.test_base import TestReportMixin
 
 
@@ -69,6 +69,23 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_store_file(self):
+        """
+        Test that rows appended to a ReportFile in several batches are
+        all stored, in order.
+        """
+        report_store = self.create_report_store()
+        with ReportFile() as report_file:
+            report_file.append_rows([[u'id', u'name']])
+            report_file.append_rows([[1, u'ni\xf1o'], [2, u'b']])
+            report_file.append_rows([[3, u'c']])
+            self.assertEqual(report_file.num_rows, 4)
+            report_store.store_file(self.course_id, 'report.csv', report_file)
+
+        with report_store.storage.open(report_store.path_to(self.course_id, 'report.csv')) as stored_file:
+            content = stored_file.read().decode('utf-8-sig')
+        self.assertEqual(content.splitlines(), [u'id,name', u'1,ni\xf1o', u'2,b', u'3,c'])
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
@@ -11,18 +11,23 @@ from functools import partial
 from uuid import uuid4
 
 import ddt
+import unicodecsv
 from celery.states import FAILURE, SUCCESS
+from django.test.utils import override_settings
 from django.utils.translation import ugettext_noop
 from mock import MagicMock, Mock, patch
 from opaque_keys.edx.keys import i4xEncoder
 from six.moves import range
+from waffle.testutils import override_switch
 
 from course_modes.models import CourseMode
 from lms.djangoapps.courseware.models import StudentModule
 from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
+from lms.djangoapps.instructor_task.config.waffle import PARALLEL_GRADE_REPORTS, WAFFLE_NAMESPACE
 from lms.djangoapps.instructor_task.exceptions import UpdateProblemModuleStateError
-from lms.djangoapps.instructor_task.models import InstructorTask
+from lms.djangoapps.instructor_task.models import PROGRESS, InstructorTask, ReportStore
 from lms.djangoapps.instructor_task.tasks import (
+    calculate_grades_csv,
     delete_problem_state,
     export_ora2_data,
     generate_certificates,
@@ -32,7 +37,9 @@ from lms.djangoapps.instructor_task.tasks import (
 )
 from lms.djangoapps.instructor_task.tasks_helper.misc import upload_ora2_data
 from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
-from lms.djangoapps.instructor_task.tests.test_base import InstructorTaskModuleTestCase
+from lms.djangoapps.instructor_task.tasks_helper.grades import CourseGradeReport
+from lms.djangoapps.instructor_task.tests.test_base import InstructorTaskModuleTestCase, TestReportMixin
+from student.models import CourseEnrollment
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
 PROBLEM_URL_NAME = "test_urlname"
@@ -684,3 +691,120 @@ class TestOra2ResponsesInstructorTask(TestInstructorTasks):
             assert args[0] == task_entry.id
             assert callable(args[1])
             assert args[2] == action_name
+
+
+@override_switch(u'{}.{}'.format(WAFFLE_NAMESPACE, PARALLEL_GRADE_REPORTS), True)
+@override_settings(GRADES_DOWNLOAD_USERS_PER_TASK=2)
+class TestParallelGradeReportInstructorTask(TestReportMixin, TestInstructorTasks):
+    """Tests instructor task that generates course grade reports in shards."""
+
+    def setUp(self):
+        super(TestParallelGradeReportInstructorTask, self).setUp()
+        self.usernames = ['student{}'.format(index) for index in range(5)]
+        for username in self.usernames:
+            self.create_student(username)
+        self.num_learners = CourseEnrollment.objects.users_enrolled_in(self.course.id, include_inactive=True).count()
+
+    def _report_rows(self, report_name):
+        """
+        Returns the rows of the single report whose name contains report_name.
+        """
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        links = [link for link in report_store.links_for(self.course.id) if report_name in link[0]]
+        self.assertEqual(len(links), 1)
+        with report_store.storage.open(report_store.path_to(self.course.id, links[0][0])) as csv_file:
+            return list(unicodecsv.DictReader(csv_file, encoding='utf-8-sig'))
+
+    def _assert_no_parts(self, task_entry):
+        """
+        Asserts that the shards' parts of the given task's report were removed.
+        """
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        for kind in ('success', 'error'):
+            parts_dir = u'{}/{}/{}'.format(CourseGradeReport.SHARD_PARTS_DIR, task_entry.id, kind)
+            self.assertEqual(report_store.list_files(self.course.id, parts_dir), [])
+
+    def _assert_no_report(self):
+        """
+        Asserts that no grade report was published.
+        """
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertFalse(any('grade_report' in link[0] for link in report_store.links_for(self.course.id)))
+
+    def test_sharded_report(self):
+        task_entry = self._create_input_entry()
+        merge_shards = CourseGradeReport._merge_shards
+        states_during_merge = []
+
+        def _merge_shards(report, context):
+            states_during_merge.append(InstructorTask.objects.get(id=task_entry.id).task_state)
+            return merge_shards(report, context)
+
+        with patch.object(CourseGradeReport, '_merge_shards', autospec=True, side_effect=_merge_shards):
+            self._run_task_with_mock_celery(calculate_grades_csv, task_entry.id, task_entry.task_id)
+
+        # The task only succeeds once the report has been merged.
+        self.assertEqual(states_during_merge, [PROGRESS])
+
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        subtasks = json.loads(entry.subtasks)
+        self.assertEqual(subtasks['total'], (self.num_learners + 1) // 2)
+        self.assertEqual(subtasks['succeeded'], subtasks['total'])
+        output = json.loads(entry.task_output)
+        self.assertEqual(output['attempted'], self.num_learners)
+        self.assertEqual(output['succeeded'], self.num_learners)
+
+        rows = self._report_rows('grade_report')
+        self.assertEqual(len(rows), self.num_learners)
+        student_ids = [int(row['Student ID']) for row in rows]
+        self.assertEqual(student_ids, sorted(student_ids))
+        for username in self.usernames:
+            self.assertIn(username, [row['Username'] for row in rows])
+
+        # The shards' parts are removed once merged.
+        self._assert_no_parts(task_entry)
+
+    def test_sharded_report_verified_only_computed_once(self):
+        task_entry = self._create_input_entry()
+        with patch(
+            'lms.djangoapps.instructor_task.tasks_helper.grades.generate_grade_report_for_verified_only',
+            return_value=False,
+        ) as mock_verified_only:
+            self._run_task_with_mock_celery(calculate_grades_csv, task_entry.id, task_entry.task_id)
+        self.assertEqual(mock_verified_only.call_count, 1)
+        self.assertEqual(InstructorTask.objects.get(id=task_entry.id).task_state, SUCCESS)
+
+    def test_sharded_report_with_failed_shard(self):
+        task_entry = self._create_input_entry()
+        # The second shard fails.
+        rows_for_users = [([], []), TestTaskFailure()] + [([], [])] * self.num_learners
+        with patch.object(CourseGradeReport, '_rows_for_users', side_effect=rows_for_users):
+            self._run_task_with_mock_celery(calculate_grades_csv, task_entry.id, task_entry.task_id)
+
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['exception'], 'SubtaskFailedError')
+        subtasks = json.loads(entry.subtasks)
+        self.assertEqual(subtasks['failed'], 1)
+        self.assertEqual(subtasks['succeeded'], subtasks['total'] - 1)
+        self._assert_no_report()
+        self._assert_no_parts(task_entry)
+
+    def test_sharded_report_with_failed_merge(self):
+        task_entry = self._create_input_entry()
+        with patch(
+            'lms.djangoapps.instructor_task.tasks_helper.grades.upload_report_file_to_report_store',
+            side_effect=TestTaskFailure('merge failed'),
+        ):
+            self._run_task_with_mock_celery(calculate_grades_csv, task_entry.id, task_entry.task_id)
+
+        entry = InstructorTask.objects.get(id=task_entry.id)
+        self.assertEqual(entry.task_state, FAILURE)
+        output = json.loads(entry.task_output)
+        self.assertEqual(output['exception'], 'TestTaskFailure')
+        self.assertEqual(output['message'], 'merge failed')
+        subtasks = json.loads(entry.subtasks)
+        self.assertEqual(subtasks['succeeded'], subtasks['total'])
+        self._assert_no_report()
+        self._assert_no_parts(task_entry)
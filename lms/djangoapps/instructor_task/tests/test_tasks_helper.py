@@ -148,6 +148,35 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         num_students = len(emails)
         self.assertDictContainsSubset({'attempted': num_students, 'succeeded': num_students, 'failed': 0}, result)
 
+    @patch.object(CourseGradeReport, 'USER_BATCH_SIZE', 1)
+    def test_progress_updated_per_batch(self):
+        """
+        Test that the task progress is updated as each batch of rows is
+        written to the report, and that all batches end up in the report.
+        """
+        usernames = ['student{}'.format(i) for i in range(3)]
+        for username in usernames:
+            self.create_student(username, '{}@example.com'.format(username))
+
+        self.current_task = Mock()  # pylint: disable=attribute-defined-outside-init
+        self.current_task.update_state = Mock()
+        with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task') as mock_current_task:
+            mock_current_task.return_value = self.current_task
+            result = CourseGradeReport.generate(None, None, self.course.id, None, 'graded')
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0, 'total': 3}, result)
+
+        attempted_counts = [
+            call[1]['meta']['attempted'] for call in self.current_task.update_state.call_args_list
+        ]
+        for attempted in range(1, 4):
+            self.assertIn(attempted, attempted_counts)
+
+        self.verify_rows_in_csv(
+            [{'Username': username} for username in usernames],
+            verify_order=False,
+            ignore_other_columns=True,
+        )
+
     @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
     @patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.iter')
     def test_grading_failure(self, mock_grades_iter, _mock_current_task):
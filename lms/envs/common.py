@@ -478,6 +478,22 @@ FEATURES = {
     # .. toggle_status: supported
     # .. toggle_warnings: None
     'ENABLE_ORA_USER_STATE_UPLOAD_DATA': False,
+
+    # .. toggle_name: ENABLE_INCREMENTAL_SUBSECTION_REGRADE
+    # .. toggle_implementation: DjangoSetting
+    # .. toggle_default: False
+    # .. toggle_description: Set to True to recalculate a learner's grades after a score change using the index of
+    #      the subsections containing each scorable block and the course grade inputs that are persisted on course
+    #      publish, instead of transforming the whole course structure for the learner. Must be set in both the LMS
+    #      and Studio, which builds the index.
+    # .. toggle_category: grades
+    # .. toggle_use_cases: incremental_release
+    # .. toggle_creation_date: 2026-10-18
+    # .. toggle_expiration_date: None
+    # .. toggle_tickets: None
+    # .. toggle_status: supported
+    # .. toggle_warnings: None
+    'ENABLE_INCREMENTAL_SUBSECTION_REGRADE': False,
 }
 
 # Settings for the course reviews tool template and identification key, set either to None to disable course reviews
@@ -622,6 +638,10 @@ CACHES = {
     },
 }
 
+# Upper bound, in bytes of pickled data, on the process-local tier of the split
+# modulestore's CourseStructureCache. Set to 0 to disable the process-local tier.
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = 256 * 1024 * 1024
+
 ############################ OAUTH2 Provider ###################################
 OAUTH_EXPIRE_CONFIDENTIAL_CLIENT_DAYS = 365
 OAUTH_EXPIRE_PUBLIC_CLIENT_DAYS = 30
@@ -1043,6 +1063,26 @@ CONTENTSTORE = {
     'DOC_STORE_CONFIG': DOC_STORE_CONFIG
 }
 
+# Hands downloads of course assets that are mirrored to local disk off to the
+# web server, instead of streaming them from the contentstore.
+CONTENTSERVER_SENDFILE = {
+    # 'X-Accel-Redirect' (nginx) or 'X-Sendfile' (Apache, lighttpd); None disables it.
+    'HEADER': None,
+    # Local directory in which assets are mirrored, each in a file named by its content digest.
+    'ROOT': '',
+    # With X-Accel-Redirect, the internal web server location that serves ROOT.
+    'URL_PREFIX': '/contentserver-mirror/',
+}
+
+# Number of course assets whose metadata is cached in each process, in front of
+# the course_assets cache. Set to 0 to disable the process-local tier.
+CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE = 1000
+
+# How long, in seconds, CourseOverviews are cached in the default cache, and
+# how many are cached in each process in front of it. Set to 0 to disable.
+COURSE_OVERVIEW_CACHE_TIMEOUT = 60 * 60
+COURSE_OVERVIEW_LOCAL_CACHE_SIZE = 1000
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -1130,8 +1170,25 @@ CODE_JAIL = {
         'REALTIME': 3,
         'PROXY': 0,
     },
+
+    # Warm sandbox workers, which skip interpreter startup and imports for
+    # each execution (see capa.safe_exec.worker_pool). Disabled if size is 0.
+    'worker_pool': {
+        # How many workers each process keeps?
+        'size': 0,
+        # How many executions before a worker is replaced?
+        'max_executions': 100,
+        # Memory use (in bytes) beyond which a worker is replaced.
+        'max_memory': 268435456,
+    },
 }
 
+# Results of sandboxed code executions kept in-process, in front of the
+# default cache, and the maximum size in bytes of a compressed result to
+# cache at all.
+SAFE_EXEC_CACHE_LOCAL_SIZE = 1000
+SAFE_EXEC_CACHE_MAX_ENTRY_SIZE = 512 * 1024
+
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
 # of them must match the course id for that course to run unsafe code.
 #
@@ -2191,8 +2248,18 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Backend storage options
     PRUNING_ACTIVE=False,
+
+    # Whether to log the timing profile of each block structure
+    # transformation, and keep the profiles for the rest of the request.
+    PROFILE_TRANSFORMS=False,
 )
 
+# Number of seconds for which course blocks transformed for a particular user
+# by the course block access transformers are cached. Content released by a
+# start date may become visible up to this long after the date. 0 disables
+# the cache.
+COURSE_BLOCKS_USER_CACHE_TIMEOUT = 0
+
 ################################ Bulk Email ###################################
 
 # Suffix used to construct 'from' email address for bulk emails.
@@ -2231,12 +2298,24 @@ BULK_EMAIL_JOB_SIZE_THRESHOLD = 100
 # a bulk email message.
 BULK_EMAIL_LOG_SENT_EMAILS = False
 
-# Delay in seconds to sleep between individual mail messages being sent,
-# when a bulk email task is retried for rate-related reasons.  Choose this
+# Delay in seconds between individual mail messages being sent, when a bulk
+# email task is first retried for rate-related reasons.  Choose this
 # value depending on the number of workers that might be sending email in
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Maximum number of emails per second a bulk email task sends.  When a task
+# is retried for rate-related reasons, it starts out sending one email every
+# BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS seconds, more slowly the more such
+# retries there were, and speeds back up as emails are sent, up to this rate.
+# Zero means no limit, except for retried tasks, which then speed back up to
+# one email every BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS seconds at most.
+BULK_EMAIL_MAX_SENDS_PER_SECOND = 0
+
+# Number of connections to the email backend that a bulk email task sends
+# emails over concurrently.
+BULK_EMAIL_CONNECTION_POOL_SIZE = 1
+
 ############################# Email Opt In ####################################
 
 # Minimum age for organization-wide email opt in
@@ -2444,7 +2523,7 @@ INSTALLED_APPS = [
     # Course data caching
     'openedx.core.djangoapps.content.course_overviews.apps.CourseOverviewsConfig',
     'openedx.core.djangoapps.content.block_structure.apps.BlockStructureConfig',
-    'lms.djangoapps.course_blocks',
+    'lms.djangoapps.course_blocks.apps.CourseBlocksConfig',
 
 
     # Coursegraph
@@ -2852,10 +2931,19 @@ BADGR_TIMEOUT = 10
 # the ones that contain information other than grades.
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# Maximum number of enrolled learners graded by each subtask of a course grade
+# report, when the instructor_task.parallel_grade_reports switch is enabled.
+GRADES_DOWNLOAD_USERS_PER_TASK = 5000
+
 POLICY_CHANGE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
 
 RECALCULATE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
 
+# Maximum number of saved visible block sets remembered by each process, so
+# that grade writes for learners who see the same blocks skip looking them up.
+# Set to 0 to disable the process-local tier.
+GRADES_VISIBLE_BLOCKS_LOCAL_CACHE_SIZE = 10000
+
 SOFTWARE_SECURE_VERIFICATION_ROUTING_KEY = 'edx.lms.core.default'
 
 GRADES_DOWNLOAD = {
@@ -3354,6 +3442,12 @@ CREDENTIALS_PUBLIC_SERVICE_URL = 'http://localhost:8005'
 
 COMMENTS_SERVICE_URL = 'http://localhost:18080'
 COMMENTS_SERVICE_KEY = 'password'
+# Number of keep-alive connections to the comments service pooled in each process,
+# and how many times failed connections are retried. Set the size to 0 to disable pooling.
+COMMENTS_SERVICE_POOL_SIZE = 20
+COMMENTS_SERVICE_MAX_RETRIES = 2
+# Number of comments service requests that a view may make concurrently.
+COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS = 4
 
 # Reverification checkpoint name pattern
 CHECKPOINT_PATTERN = r'(?P<checkpoint_name>[^/]+)'
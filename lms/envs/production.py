@@ -336,6 +336,11 @@ LOGGING = get_logger_config(LOG_DIR,
 COURSE_LISTINGS = ENV_TOKENS.get('COURSE_LISTINGS', {})
 COMMENTS_SERVICE_URL = ENV_TOKENS.get("COMMENTS_SERVICE_URL", '')
 COMMENTS_SERVICE_KEY = ENV_TOKENS.get("COMMENTS_SERVICE_KEY", '')
+COMMENTS_SERVICE_POOL_SIZE = ENV_TOKENS.get('COMMENTS_SERVICE_POOL_SIZE', COMMENTS_SERVICE_POOL_SIZE)
+COMMENTS_SERVICE_MAX_RETRIES = ENV_TOKENS.get('COMMENTS_SERVICE_MAX_RETRIES', COMMENTS_SERVICE_MAX_RETRIES)
+COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS = ENV_TOKENS.get(
+    'COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS', COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS
+)
 CERT_QUEUE = ENV_TOKENS.get("CERT_QUEUE", 'test-pull')
 
 # git repo loading  environment
@@ -344,6 +349,9 @@ GIT_IMPORT_STATIC = ENV_TOKENS.get('GIT_IMPORT_STATIC', True)
 GIT_IMPORT_PYTHON_LIB = ENV_TOKENS.get('GIT_IMPORT_PYTHON_LIB', True)
 PYTHON_LIB_FILENAME = ENV_TOKENS.get('PYTHON_LIB_FILENAME', 'python_lib.zip')
 
+SAFE_EXEC_CACHE_LOCAL_SIZE = ENV_TOKENS.get('SAFE_EXEC_CACHE_LOCAL_SIZE', SAFE_EXEC_CACHE_LOCAL_SIZE)
+SAFE_EXEC_CACHE_MAX_ENTRY_SIZE = ENV_TOKENS.get('SAFE_EXEC_CACHE_MAX_ENTRY_SIZE', SAFE_EXEC_CACHE_MAX_ENTRY_SIZE)
+
 for name, value in ENV_TOKENS.get("CODE_JAIL", {}).items():
     oldvalue = CODE_JAIL.get(name)
     if isinstance(oldvalue, dict):
@@ -501,6 +509,12 @@ XQUEUE_INTERFACE = AUTH_TOKENS['XQUEUE_INTERFACE']
 # use the one from common.py
 MODULESTORE = convert_module_store_setting_if_needed(AUTH_TOKENS.get('MODULESTORE', MODULESTORE))
 MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
+CONTENTSERVER_SENDFILE = ENV_TOKENS.get('CONTENTSERVER_SENDFILE', CONTENTSERVER_SENDFILE)
+CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE = ENV_TOKENS.get(
+    'CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE', CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE
+)
+COURSE_OVERVIEW_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_OVERVIEW_CACHE_TIMEOUT', COURSE_OVERVIEW_CACHE_TIMEOUT)
+COURSE_OVERVIEW_LOCAL_CACHE_SIZE = ENV_TOKENS.get('COURSE_OVERVIEW_LOCAL_CACHE_SIZE', COURSE_OVERVIEW_LOCAL_CACHE_SIZE)
 
 EMAIL_HOST_USER = AUTH_TOKENS.get('EMAIL_HOST_USER', '')  # django default is ''
 EMAIL_HOST_PASSWORD = AUTH_TOKENS.get('EMAIL_HOST_PASSWORD', '')  # django default is ''
@@ -573,9 +587,15 @@ DISABLE_ACCOUNT_ACTIVATION_REQUIREMENT_SWITCH = ENV_TOKENS.get(
 
 # Grades download
 GRADES_DOWNLOAD_ROUTING_KEY = ENV_TOKENS.get('GRADES_DOWNLOAD_ROUTING_KEY', HIGH_MEM_QUEUE)
+GRADES_DOWNLOAD_USERS_PER_TASK = ENV_TOKENS.get('GRADES_DOWNLOAD_USERS_PER_TASK', GRADES_DOWNLOAD_USERS_PER_TASK)
+GRADES_VISIBLE_BLOCKS_LOCAL_CACHE_SIZE = ENV_TOKENS.get(
+    'GRADES_VISIBLE_BLOCKS_LOCAL_CACHE_SIZE', GRADES_VISIBLE_BLOCKS_LOCAL_CACHE_SIZE
+)
 
 GRADES_DOWNLOAD = ENV_TOKENS.get("GRADES_DOWNLOAD", GRADES_DOWNLOAD)
 
+COURSE_BLOCKS_USER_CACHE_TIMEOUT = ENV_TOKENS.get('COURSE_BLOCKS_USER_CACHE_TIMEOUT', COURSE_BLOCKS_USER_CACHE_TIMEOUT)
+
 # Rate limit for regrading tasks that a grading policy change can kick off
 
 # financial reports
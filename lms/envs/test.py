@@ -128,6 +128,9 @@ MOCK_STAFF_GRADING = True
 MOCK_PEER_GRADING = True
 
 COMMENTS_SERVICE_URL = 'http://localhost:4567'
+# Tests mock requests.request, and expect the comments service requests in order.
+COMMENTS_SERVICE_POOL_SIZE = 0
+COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS = 0
 
 DJFS = {
     'type': 'osfs',
@@ -227,6 +230,22 @@ CACHES = {
     },
 }
 
+# Tests count mongo calls, so don't keep structures around between them.
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = 0
+
+# Test databases are rolled back between tests, so don't remember saved visible blocks.
+GRADES_VISIBLE_BLOCKS_LOCAL_CACHE_SIZE = 0
+
+# Tests clear the django caches between them, which the process-local tier can't follow.
+CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE = 0
+
+# Tests count the queries of CourseOverview lookups, so don't cache overviews.
+COURSE_OVERVIEW_CACHE_TIMEOUT = 0
+COURSE_OVERVIEW_LOCAL_CACHE_SIZE = 0
+
+# Likewise for results of sandboxed code executions.
+SAFE_EXEC_CACHE_LOCAL_SIZE = 0
+
 ############################### BLOCKSTORE #####################################
 # Blockstore tests
 RUN_BLOCKSTORE_TESTS = os.environ.get('EDXAPP_RUN_BLOCKSTORE_TESTS', 'no').lower() in ('true', 'yes', '1')
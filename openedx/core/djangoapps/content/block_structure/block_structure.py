@@ -7,11 +7,11 @@ Module with family of classes for block structures.
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
     _BlockData - Data structure for a single block's data.
+    _RemovalFilter - Filter function that removes blocks satisfying a condition.
 """
 
 
 from copy import deepcopy
-from functools import partial
 from logging import getLogger
 
 import six
@@ -19,6 +19,7 @@ import six
 from openedx.core.lib.graph_traversals import traverse_post_order, traverse_topologically
 
 from .exceptions import TransformerException
+from .indexed import IndexedBlockGraph
 
 logger = getLogger(__name__)  # pylint: disable=invalid-name
 
@@ -43,6 +44,33 @@ class _BlockRelations(object):
         self.children = []
 
 
+def _universal_filter(block_key):  # pylint: disable=unused-argument
+    """
+    A filter function that always returns True for all blocks.
+    """
+    return True
+
+
+class _RemovalFilter(object):
+    """
+    Filter function that removes blocks that satisfy a removal_condition
+    from a block structure as they are filtered. Its removal_condition
+    and keep_descendants are exposed so that the filter can also be
+    applied in bulk (see BlockStructureBlockData.bulk_filter).
+    """
+    def __init__(self, block_structure, removal_condition, keep_descendants):
+        self.block_structure = block_structure
+        self.removal_condition = removal_condition
+        self.keep_descendants = keep_descendants
+
+    def __call__(self, block_key):
+        return self.block_structure.retain_or_remove(
+            block_key,
+            removal_condition=self.removal_condition,
+            keep_descendants=self.keep_descendants,
+        )
+
+
 class BlockStructure(object):
     """
     Base class for a block structure.  BlockStructures are constructed
@@ -65,6 +93,12 @@ class BlockStructure(object):
         # dict {UsageKey: _BlockRelations}
         self._block_relations = {}
 
+        # Integer-indexed snapshot of _block_relations, built on demand
+        # for bulk graph operations and discarded whenever the
+        # relations change.
+        # IndexedBlockGraph or None
+        self._indexed_graph = None
+
         # Add the root block.
         self._add_block(self._block_relations, root_block_usage_key)
 
@@ -124,6 +158,7 @@ class BlockStructure(object):
         """
         self.root_block_usage_key = usage_key
         self._block_relations[usage_key].parents = []
+        self._indexed_graph = None
 
     def __contains__(self, usage_key):
         """
@@ -231,6 +266,16 @@ class BlockStructure(object):
 
         # Replace this structure's relations with the newly pruned one.
         self._block_relations = pruned_block_relations
+        self._indexed_graph = None
+
+    def _get_indexed_graph(self):
+        """
+        Returns an IndexedBlockGraph of this block structure's current
+        relations.
+        """
+        if self._indexed_graph is None:
+            self._indexed_graph = IndexedBlockGraph.from_block_relations(self._block_relations)
+        return self._indexed_graph
 
     def _add_relation(self, parent_key, child_key):
         """
@@ -241,6 +286,7 @@ class BlockStructure(object):
             child_key (UsageKey) - Usage key of the child block.
         """
         self._add_to_relations(self._block_relations, parent_key, child_key)
+        self._indexed_graph = None
 
     @staticmethod
     def _add_to_relations(block_relations, parent_key, child_key):
@@ -423,12 +469,15 @@ class BlockStructureBlockData(BlockStructure):
         deep-copy of this instance's contents.
         """
         from .factory import BlockStructureFactory
-        return BlockStructureFactory.create_new(
+        block_structure = BlockStructureFactory.create_new(
             self.root_block_usage_key,
             deepcopy(self._block_relations),
             deepcopy(self.transformer_data),
             deepcopy(self._block_data_map),
         )
+        # The indexed graph is immutable, so it can be shared.
+        block_structure._indexed_graph = self._indexed_graph
+        return block_structure
 
     def iteritems(self):
         """
@@ -635,6 +684,7 @@ class BlockStructureBlockData(BlockStructure):
         # Remove block.
         self._block_relations.pop(usage_key, None)
         self._block_data_map.pop(usage_key, None)
+        self._indexed_graph = None
 
         # Recreate the graph connections if descendants are to be kept.
         if keep_descendants:
@@ -646,7 +696,7 @@ class BlockStructureBlockData(BlockStructure):
         """
         Returns a filter function that always returns True for all blocks.
         """
-        return lambda block_key: True
+        return _universal_filter
 
     def create_removal_filter(self, removal_condition, keep_descendants=False):
         """
@@ -661,11 +711,7 @@ class BlockStructureBlockData(BlockStructure):
             keep_descendants (bool) - See the description in
                 remove_block.
         """
-        return partial(
-            self.retain_or_remove,
-            removal_condition=removal_condition,
-            keep_descendants=keep_descendants,
-        )
+        return _RemovalFilter(self, removal_condition, keep_descendants)
 
     def retain_or_remove(self, block_key, removal_condition, keep_descendants=False):
         """
@@ -702,11 +748,7 @@ class BlockStructureBlockData(BlockStructure):
             keep_descendants (bool) - See the description in
                 remove_block.
         """
-        self.filter_topological_traversal(
-            filter_func=self.create_removal_filter(
-                removal_condition, keep_descendants
-            )
-        )
+        self.bulk_filter([self.create_removal_filter(removal_condition, keep_descendants)])
 
     def filter_topological_traversal(self, filter_func, **kwargs):
         """
@@ -730,6 +772,39 @@ class BlockStructureBlockData(BlockStructure):
         for _ in self.topological_traversal(filter_func=filter_func, **kwargs):
             pass
 
+    def bulk_filter(self, filters):
+        """
+        Applies all of the given filters in a single pass over this
+        block structure, with the same result as a topological traversal
+        with the filters chained together.
+
+        If all of the filters were created by create_universal_filter or
+        create_removal_filter, the blocks to remove are found with a pass
+        over the integer-indexed graph (see IndexedBlockGraph.find_removals)
+        and then removed in bulk. Otherwise, the filters are applied with
+        filter_topological_traversal.
+
+        Arguments:
+            filters ([(usage_key)->bool]) - Filter functions, as returned
+                by create_universal_filter or create_removal_filter.
+        """
+        filters = [filter_func for filter_func in filters if filter_func is not _universal_filter]
+        if not filters:
+            return
+
+        if not all(isinstance(filter_func, _RemovalFilter) for filter_func in filters):
+            self.filter_topological_traversal(
+                lambda block_key: all(filter_func(block_key) for filter_func in filters)
+            )
+            return
+
+        removals = self._get_indexed_graph().find_removals(
+            self._get_indexed_graph().index_of[self.root_block_usage_key],
+            [(filter_func.removal_condition, filter_func.keep_descendants) for filter_func in filters],
+        )
+        for block_key, keep_descendants in removals:
+            self.remove_block(block_key, keep_descendants)
+
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
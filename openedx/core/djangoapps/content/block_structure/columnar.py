@@ -0,0 +1,441 @@
+"""
+Compact, columnar serialization format for collected BlockStructures.
+
+Instead of pickling the structure's per-block _BlockRelations and
+BlockData objects, the columnar format stores:
+
+    * the usage keys of all blocks, so that each block is identified by
+      its integer index in the rest of the data,
+    * the parent and child relations as CSR-style adjacency arrays of
+      block indices,
+    * the structure-level transformer data,
+    * one separately compressed column per collected xBlock field and one
+      per transformer's block-specific data.
+
+Columns are only decompressed and unpickled when a block's value for them
+is first accessed, so transformers that need only a few fields never
+materialize the rest.
+
+Binary layout:
+
+    MAGIC (4 bytes) | FORMAT_VERSION (1 byte) | header length (4 bytes) |
+    zlib compressed pickled header | column segments...
+
+The header contains the byte offset and length of each column segment,
+relative to the end of the header.
+"""
+
+
+import struct
+import zlib
+from array import array
+from copy import deepcopy
+
+import six
+from six.moves import cPickle as pickle
+from six.moves import range
+
+from .block_structure import BlockData, TransformerData, TransformerDataMap, _BlockRelations
+from .indexed import IndexedBlockGraph, adjacency_arrays
+
+# Legacy serializations are zlib streams, which can never start with a NUL byte.
+MAGIC = b'\x00BSC'
+
+# Increment this value whenever the binary layout changes.
+FORMAT_VERSION = 1
+
+# Keep this constant as we upgrade from python 2 to 3.
+PICKLE_PROTOCOL = 4
+
+_PREAMBLE = struct.Struct('>4sBI')
+
+# Column name prefixes for collected xBlock fields and block-specific
+# transformer data.
+XBLOCK_FIELD_COLUMN = u'x'
+TRANSFORMER_COLUMN = u't'
+
+
+class ColumnarFormatError(Exception):
+    """
+    Raised when the given data is not in a supported columnar format.
+    """
+    pass
+
+
+def is_columnar(serialized_data):
+    """
+    Returns whether the given serialized data is in the columnar format.
+    """
+    return serialized_data[:len(MAGIC)] == MAGIC
+
+
+def serialize(block_structure):
+    """
+    Serializes the relations, transformer data and block data of the
+    given block_structure into the columnar format.
+
+    Arguments:
+        block_structure (BlockStructureBlockData) - The block structure
+            that is to be serialized.
+
+    Returns:
+        bytes - The serialized data.
+    """
+    # pylint: disable=protected-access
+    block_relations = block_structure._block_relations
+    block_data_map = block_structure._block_data_map
+
+    block_keys = list(block_relations)
+    block_keys.extend(key for key in block_data_map if key not in block_relations)
+    index_of = {block_key: index for index, block_key in enumerate(block_keys)}
+
+    children_offsets, children = adjacency_arrays(
+        (block_relations[block_key].children for block_key in block_keys[:len(block_relations)]),
+        index_of,
+    )
+    parents_offsets, parents = adjacency_arrays(
+        (block_relations[block_key].parents for block_key in block_keys[:len(block_relations)]),
+        index_of,
+    )
+
+    columns = {}
+    data_indices = array('l')
+    for block_key, block_data in six.iteritems(block_data_map):
+        index = index_of[block_key]
+        data_indices.append(index)
+        for field_name, value in six.iteritems(block_data.fields):
+            _append_to_column(columns, (XBLOCK_FIELD_COLUMN, field_name), index, value)
+        for transformer_name, transformer_data in six.iteritems(block_data.transformer_data):
+            _append_to_column(columns, (TRANSFORMER_COLUMN, transformer_name), index, transformer_data.fields)
+
+    segments = []
+    column_offsets = {}
+    offset = 0
+    for column_name, column in six.iteritems(columns):
+        segment = zlib.compress(pickle.dumps(column, PICKLE_PROTOCOL), 1)
+        column_offsets[column_name] = (offset, len(segment))
+        segments.append(segment)
+        offset += len(segment)
+
+    header = zlib.compress(pickle.dumps(
+        {
+            'block_keys': block_keys,
+            'num_related_blocks': len(block_relations),
+            'children_offsets': children_offsets,
+            'children': children,
+            'parents_offsets': parents_offsets,
+            'parents': parents,
+            'data_indices': data_indices,
+            'transformer_data': block_structure.transformer_data,
+            'columns': column_offsets,
+        },
+        PICKLE_PROTOCOL,
+    ))
+    return b''.join([_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header)), header] + segments)
+
+
+def deserialize(serialized_data, root_block_usage_key):
+    """
+    Deserializes the given columnar data and returns the block structure.
+
+    Only the block keys, the relations and the structure-level transformer
+    data are decoded eagerly. Collected xBlock fields and block-specific
+    transformer data are decoded, one column at a time, on first access.
+
+    Arguments:
+        serialized_data (bytes) - Data previously returned by serialize.
+
+        root_block_usage_key (UsageKey) - The usage key for the root of
+            the block structure.
+
+    Returns:
+        BlockStructureBlockData - The deserialized block structure.
+
+    Raises:
+        ColumnarFormatError if the data is not in a supported format.
+    """
+    from .factory import BlockStructureFactory
+
+    magic, version, header_length = _PREAMBLE.unpack_from(serialized_data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ColumnarFormatError(u'Unsupported block structure format version {}'.format(version))
+
+    header_end = _PREAMBLE.size + header_length
+    data = memoryview(serialized_data)
+    header = pickle.loads(zlib.decompress(data[_PREAMBLE.size:header_end]))
+    block_keys = header['block_keys']
+
+    block_relations = {}
+    children_offsets, children = header['children_offsets'], header['children']
+    parents_offsets, parents = header['parents_offsets'], header['parents']
+    for index in range(header['num_related_blocks']):
+        relations = _BlockRelations()
+        relations.children = [block_keys[i] for i in children[children_offsets[index]:children_offsets[index + 1]]]
+        relations.parents = [block_keys[i] for i in parents[parents_offsets[index]:parents_offsets[index + 1]]]
+        block_relations[block_keys[index]] = relations
+
+    columns = _Columns(data[header_end:], header['columns'])
+    block_data_map = {}
+    for index in header['data_indices']:
+        block_data = BlockData(block_keys[index])
+        block_data.fields = _LazyFieldDict(columns, index, XBLOCK_FIELD_COLUMN)
+        block_data.transformer_data = _LazyTransformerDataMap(columns, index, TRANSFORMER_COLUMN)
+        block_data_map[block_keys[index]] = block_data
+
+    block_structure = BlockStructureFactory.create_new(
+        root_block_usage_key,
+        block_relations,
+        header['transformer_data'],
+        block_data_map,
+    )
+    # Seed the structure's indexed graph with the already decoded arrays.
+    block_structure._indexed_graph = IndexedBlockGraph(  # pylint: disable=protected-access
+        block_keys[:header['num_related_blocks']],
+        children_offsets,
+        children,
+        parents_offsets,
+        parents,
+    )
+    return block_structure
+
+
+def _append_to_column(columns, column_name, index, value):
+    """
+    Appends the given block index and value to the named sparse column.
+    """
+    try:
+        indices, values = columns[column_name]
+    except KeyError:
+        indices, values = columns[column_name] = (array('l'), [])
+    indices.append(index)
+    values.append(value)
+
+
+class _Columns(object):
+    """
+    The column segments of a serialized block structure, each decoded on
+    first access.
+    """
+    def __init__(self, data, column_offsets):
+        self._data = data
+        self._column_offsets = column_offsets
+        self._decoded = {}
+        self.names_by_prefix = {}
+        for prefix, name in column_offsets:
+            self.names_by_prefix.setdefault(prefix, set()).add(name)
+
+    def get(self, column_name, index):
+        """
+        Returns the value in the named column for the block at the
+        given index.
+
+        Raises KeyError if the block has no value in the column.
+        """
+        try:
+            column = self._decoded[column_name]
+        except KeyError:
+            offset, length = self._column_offsets[column_name]
+            indices, values = pickle.loads(zlib.decompress(self._data[offset:offset + length]))
+            column = self._decoded[column_name] = dict(zip(indices, values))
+        return column[index]
+
+    def __deepcopy__(self, memo):
+        """
+        Copies share the (immutable) serialized data, but decode their own
+        values so that mutating one copy never affects another.
+        """
+        return _Columns(self._data, self._column_offsets)
+
+
+class _LazyColumnDict(dict):
+    """
+    A dict of a single block's values, whose missing entries are loaded
+    from the block structure's columns on first access.
+    """
+    __slots__ = ('_columns', '_index', '_prefix', '_resolved')
+
+    def __init__(self, columns, index, prefix):
+        super(_LazyColumnDict, self).__init__()
+        self._columns = columns
+        self._index = index
+        self._prefix = prefix
+        # Names that have already been loaded from the columns (or
+        # deleted), created on demand to keep unaccessed blocks small.
+        self._resolved = None
+
+    def _load(self, name):
+        """
+        Returns the value of the given name for this block.
+        Raises KeyError if this block has no such value.
+        """
+        return self._columns.get((self._prefix, name), self._index)
+
+    def _normalize_key(self, key):
+        """
+        Returns the name under which the given key is stored.
+        """
+        return key
+
+    def _names(self):
+        """
+        Returns the names of all columns that may hold values for this block.
+        """
+        return self._columns.names_by_prefix.get(self._prefix, ())
+
+    def _mark_resolved(self, name):
+        """
+        Records that the value of the given name must no longer be loaded
+        from the columns, since it was set or deleted. Returns whether it
+        had already been.
+        """
+        if name not in self._names():
+            return True
+        if self._resolved is None:
+            self._resolved = set()
+        elif name in self._resolved:
+            return True
+        self._resolved.add(name)
+        return False
+
+    def _resolve(self, name):
+        """
+        Loads the value of the given name into this dict, if it hasn't
+        been loaded already. Returns whether a value was loaded.
+        """
+        if dict.__contains__(self, name) or self._mark_resolved(name):
+            return False
+        try:
+            dict.__setitem__(self, name, self._load(name))
+        except KeyError:
+            return False
+        return True
+
+    def _materialize(self):
+        """
+        Loads all of this block's values.
+        """
+        for name in self._names():
+            self._resolve(name)
+
+    def __missing__(self, key):
+        if self._resolve(key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        key = self._normalize_key(key)
+        return dict.__contains__(self, key) or self._resolve(key)
+
+    def __setitem__(self, key, value):
+        key = self._normalize_key(key)
+        self._mark_resolved(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        key = self._normalize_key(key)
+        self._resolve(key)
+        self._mark_resolved(key)
+        dict.__delitem__(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, *args):
+        key = self._normalize_key(key)
+        self._resolve(key)
+        self._mark_resolved(key)
+        return dict.pop(self, key, *args)
+
+    def popitem(self):
+        self._materialize()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in six.iteritems(dict(*args, **kwargs)):
+            self[key] = value
+
+    def clear(self):
+        self._materialize()
+        dict.clear(self)
+
+    def __iter__(self):
+        self._materialize()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._materialize()
+        return dict.__len__(self)
+
+    def __eq__(self, other):
+        self._materialize()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._materialize()
+        return dict.__repr__(self)
+
+    def keys(self):
+        self._materialize()
+        return dict.keys(self)
+
+    def values(self):
+        self._materialize()
+        return dict.values(self)
+
+    def items(self):
+        self._materialize()
+        return dict.items(self)
+
+    def copy(self):
+        self._materialize()
+        return dict(dict.items(self))
+
+    def __reduce__(self):
+        # Pickle as a plain dict, since the columns aren't picklable.
+        return (dict, (self.copy(),))
+
+    def __deepcopy__(self, memo):
+        result = type(self)(deepcopy(self._columns, memo), self._index, self._prefix)
+        memo[id(self)] = result
+        result._resolved = set(self._resolved) if self._resolved is not None else None  # pylint: disable=protected-access
+        for key, value in dict.items(self):
+            dict.__setitem__(result, key, deepcopy(value, memo))
+        return result
+
+
+class _LazyFieldDict(_LazyColumnDict):
+    """
+    The collected xBlock fields of a single block.
+    """
+    __slots__ = ()
+
+
+class _LazyTransformerDataMap(_LazyColumnDict, TransformerDataMap):
+    """
+    The block-specific transformer data of a single block.
+    """
+    __slots__ = ()
+
+    def _load(self, name):
+        transformer_data = TransformerData()
+        transformer_data.fields = super(_LazyTransformerDataMap, self)._load(name)
+        return transformer_data
+
+    def _normalize_key(self, key):
+        return self._translate_key(key)
+
+    def __getitem__(self, key):
+        return TransformerDataMap.__getitem__(self, key)
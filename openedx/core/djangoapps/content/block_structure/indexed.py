@@ -0,0 +1,179 @@
+"""
+Integer-indexed, array-backed representation of a BlockStructure's graph.
+
+Usage keys are interned to dense integer indices and the parent and child
+relations are stored as CSR-style (offsets, targets) arrays, so that whole
+graph passes, such as computing the blocks to remove for a set of removal
+filters, work on small integers instead of hashing opaque usage keys.
+
+An IndexedBlockGraph is immutable. It describes the relations of a block
+structure at a point in time, and is discarded by the block structure
+whenever its relations change.
+"""
+
+
+from array import array
+
+from six.moves import range
+
+
+class IndexedBlockGraph(object):
+    """
+    Immutable, integer-indexed snapshot of a block structure's relations.
+    """
+    def __init__(self, block_keys, children_offsets, children, parents_offsets, parents):
+        """
+        Arguments:
+            block_keys ([UsageKey]) - The usage keys of the blocks, where
+                the position of each key is its integer index.
+
+            children_offsets, children (array) - CSR arrays of the
+                children of each block: the indices of the children of
+                block i are children[children_offsets[i]:children_offsets[i + 1]].
+
+            parents_offsets, parents (array) - CSR arrays of the parents
+                of each block, laid out like the children arrays.
+        """
+        self.block_keys = block_keys
+        self.index_of = {block_key: index for index, block_key in enumerate(block_keys)}
+        self.children_offsets = children_offsets
+        self.children = children
+        self.parents_offsets = parents_offsets
+        self.parents = parents
+
+    def __len__(self):
+        return len(self.block_keys)
+
+    @classmethod
+    def from_block_relations(cls, block_relations):
+        """
+        Returns an IndexedBlockGraph for the given map of usage keys
+        to _BlockRelations.
+        """
+        block_keys = list(block_relations)
+        index_of = {block_key: index for index, block_key in enumerate(block_keys)}
+        children_offsets, children = adjacency_arrays(
+            (block_relations[block_key].children for block_key in block_keys), index_of,
+        )
+        parents_offsets, parents = adjacency_arrays(
+            (block_relations[block_key].parents for block_key in block_keys), index_of,
+        )
+        return cls(block_keys, children_offsets, children, parents_offsets, parents)
+
+    def get_children(self, index):
+        """
+        Returns the indices of the children of the block at the given index.
+        """
+        return self.children[self.children_offsets[index]:self.children_offsets[index + 1]]
+
+    def get_parents(self, index):
+        """
+        Returns the indices of the parents of the block at the given index.
+        """
+        return self.parents[self.parents_offsets[index]:self.parents_offsets[index + 1]]
+
+    def reachable(self, start_index):
+        """
+        Returns a bytearray marking the blocks reachable from the block
+        at the given start_index.
+        """
+        children_offsets, children = self.children_offsets, self.children
+        reached = bytearray(len(self.block_keys))
+        reached[start_index] = 1
+        stack = [start_index]
+        while stack:
+            index = stack.pop()
+            for child in children[children_offsets[index]:children_offsets[index + 1]]:
+                if not reached[child]:
+                    reached[child] = 1
+                    stack.append(child)
+        return reached
+
+    def topological_order(self, start_index):
+        """
+        Returns the indices of the blocks reachable from the block at the
+        given start_index, each after all of its reachable parents.
+
+        Blocks are ordered as by
+        openedx.core.lib.graph_traversals.traverse_topologically.
+        """
+        children_offsets, children = self.children_offsets, self.children
+        reached = self.reachable(start_index)
+
+        # Number of edges from reachable parents that are yet to be visited.
+        pending = [0] * len(self.block_keys)
+        for index in range(len(self.block_keys)):
+            if reached[index]:
+                for child in children[children_offsets[index]:children_offsets[index + 1]]:
+                    pending[child] += 1
+
+        order = []
+        stack = [start_index]
+        while stack:
+            index = stack.pop()
+            order.append(index)
+            block_children = children[children_offsets[index]:children_offsets[index + 1]]
+            for child in reversed(block_children):
+                pending[child] -= 1
+                if pending[child] == 0 and child != start_index:
+                    stack.append(child)
+        return order
+
+    def find_removals(self, start_index, removal_filters):
+        """
+        Returns the blocks that the given removal filters would remove in
+        a topological traversal starting at the block at start_index.
+
+        A block is only tested if it is still reachable, that is if the
+        start block is one of its parents, or if at least one of its
+        parents was either retained or removed with keep_descendants.
+        For each tested block, the filters are tried in the given order
+        and the first whose removal_condition holds removes the block.
+
+        Arguments:
+            start_index (int) - The index of the starting block.
+
+            removal_filters ([(removal_condition, keep_descendants)]) -
+                Pairs of a function that takes a usage key and returns
+                whether to remove the block, and whether descendants of
+                blocks removed by it are to be kept.
+
+        Returns:
+            [(UsageKey, bool)] - The usage keys of the blocks to remove,
+                in topological order, each with its keep_descendants
+                value.
+        """
+        block_keys = self.block_keys
+        parents_offsets, parents = self.parents_offsets, self.parents
+
+        # Whether descendants of a visited block remain reachable through it.
+        passes_through = bytearray(len(block_keys))
+        removals = []
+        for index in self.topological_order(start_index):
+            if index != start_index and not any(
+                    passes_through[parent] for parent in parents[parents_offsets[index]:parents_offsets[index + 1]]
+            ):
+                continue
+
+            block_key = block_keys[index]
+            for removal_condition, keep_descendants in removal_filters:
+                if removal_condition(block_key):
+                    removals.append((block_key, keep_descendants))
+                    passes_through[index] = keep_descendants
+                    break
+            else:
+                passes_through[index] = 1
+        return removals
+
+
+def adjacency_arrays(adjacency_lists, index_of):
+    """
+    Returns the (offsets, targets) CSR arrays for the given iterable
+    of lists of block keys, using the given map of block key to index.
+    """
+    offsets = array('l', [0])
+    targets = array('l')
+    for block_keys in adjacency_lists:
+        targets.extend(index_of[block_key] for block_key in block_keys)
+        offsets.append(len(targets))
+    return offsets, targets
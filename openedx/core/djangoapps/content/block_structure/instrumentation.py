@@ -0,0 +1,178 @@
+"""
+Instrumentation of block structure transformations.
+
+Each call to BlockStructureManager.get_transformed is profiled with a
+TransformProfile, which records:
+
+    * where the collected block structure came from (the cache, the
+      storage backing it, a fresh collection from the modulestore, or
+      the caller) and how long getting and deserializing it took,
+    * the wall time taken and the number of blocks removed by each
+      transformer, and by the final pruning of unreachable blocks,
+    * the number of blocks removed by the whole transformation.
+
+Every profile is reported as accumulated custom monitoring metrics. When
+BLOCK_STRUCTURES_SETTINGS['PROFILE_TRANSFORMS'] is enabled, profiles are
+also logged and kept for the rest of the request (see get_request_profiles).
+"""
+
+
+import json
+import threading
+from contextlib import contextmanager
+from logging import getLogger
+from time import time
+
+import six
+from django.conf import settings
+from edx_django_utils import monitoring as monitoring_utils
+
+from openedx.core.lib.cache_utils import get_cache
+
+logger = getLogger(__name__)  # pylint: disable=C0103
+
+# Sources of the collected block structure of a transformation.
+SOURCE_PROVIDED = u'provided'
+SOURCE_CACHE = u'cache'
+SOURCE_STORAGE = u'storage'
+SOURCE_MODULESTORE = u'modulestore'
+
+# Label of metrics whose source or transformer isn't known.
+UNKNOWN_LABEL = u'unknown'
+
+_REQUEST_CACHE_NAMESPACE = u'block_structure.instrumentation'
+_active = threading.local()
+
+
+class TransformerProfile(object):
+    """
+    Timing data of a single transformer, or of a single step of a
+    transformation, such as the combined pass of the filtering
+    transformers.
+    """
+    def __init__(self, name, wall_time, blocks_removed):
+        self.name = name
+        self.wall_time = wall_time
+        self.blocks_removed = blocks_removed
+
+    def to_dict(self):
+        """
+        Returns the timing data as a JSON-serializable dict.
+        """
+        return {
+            u'name': self.name,
+            u'wall_time': self.wall_time,
+            u'blocks_removed': self.blocks_removed,
+        }
+
+
+class TransformProfile(object):
+    """
+    Timing and cache data of a single transformation of a block structure.
+    """
+    def __init__(self, root_block_usage_key):
+        self.root_block_usage_key = root_block_usage_key
+        self.collected_source = None
+        self.collected_time = 0.0
+        self.deserialize_time = 0.0
+        self.transformers = []
+        self.blocks_removed = 0
+        self.total_time = 0.0
+
+    @contextmanager
+    def time_transformer(self, name, block_structure):
+        """
+        Records the wall time taken and the number of blocks removed from
+        the given block_structure by the wrapped step of the transformation.
+        """
+        num_blocks = len(block_structure)
+        start_time = time()
+        try:
+            yield
+        finally:
+            self.transformers.append(
+                TransformerProfile(name, time() - start_time, num_blocks - len(block_structure))
+            )
+
+    def to_dict(self):
+        """
+        Returns the profile, and those of its transformers, as a JSON-serializable dict.
+        """
+        return {
+            u'root_block_usage_key': six.text_type(self.root_block_usage_key),
+            u'collected_source': self.collected_source,
+            u'collected_time': self.collected_time,
+            u'deserialize_time': self.deserialize_time,
+            u'transformers': [transformer.to_dict() for transformer in self.transformers],
+            u'blocks_removed': self.blocks_removed,
+            u'total_time': self.total_time,
+        }
+
+
+def active_profile():
+    """
+    Returns the TransformProfile of the transformation in progress in
+    this thread, or None.
+    """
+    return getattr(_active, 'profile', None)
+
+
+@contextmanager
+def profile_transform(root_block_usage_key):
+    """
+    Profiles the wrapped transformation of the block structure at the
+    given root, and yields its TransformProfile.
+    """
+    profile = TransformProfile(root_block_usage_key)
+    previous_profile = active_profile()
+    _active.profile = profile
+    start_time = time()
+    try:
+        yield profile
+    finally:
+        profile.total_time = time() - start_time
+        _active.profile = previous_profile
+        _report(profile)
+
+
+def record_collected(source, deserialize_time=0.0):
+    """
+    Records the source of the collected block structure of the
+    transformation in progress, if any, and the time taken to
+    deserialize it.
+    """
+    profile = active_profile()
+    if profile is not None:
+        profile.collected_source = source
+        profile.deserialize_time = deserialize_time
+
+
+def get_request_profiles():
+    """
+    Returns the TransformProfiles recorded in the current request, if
+    profiling is enabled.
+    """
+    return get_cache(_REQUEST_CACHE_NAMESPACE).setdefault('profiles', [])
+
+
+def _report(profile):
+    """
+    Reports the given profile as custom monitoring metrics and, if
+    enabled, keeps and logs it.
+    """
+    monitoring_utils.accumulate(u'block_structure.transform.count', 1)
+    monitoring_utils.accumulate(u'block_structure.transform.time', profile.total_time)
+    monitoring_utils.accumulate(u'block_structure.transform.blocks_removed', profile.blocks_removed)
+    monitoring_utils.accumulate(u'block_structure.collected.{}'.format(profile.collected_source or UNKNOWN_LABEL), 1)
+    monitoring_utils.accumulate(u'block_structure.collected.time', profile.collected_time)
+    monitoring_utils.accumulate(u'block_structure.collected.deserialize_time', profile.deserialize_time)
+    for transformer in profile.transformers:
+        name = transformer.name or UNKNOWN_LABEL
+        monitoring_utils.accumulate(u'block_structure.transformer.{}.time'.format(name), transformer.wall_time)
+        monitoring_utils.accumulate(
+            u'block_structure.transformer.{}.blocks_removed'.format(name), transformer.blocks_removed,
+        )
+
+    if settings.BLOCK_STRUCTURES_SETTINGS.get('PROFILE_TRANSFORMS', False):
+        get_request_profiles().append(profile)
+        logger.info(u'BlockStructure: Transform profile: %s', json.dumps(profile.to_dict(), sort_keys=True))
@@ -5,10 +5,11 @@ BlockStructures.
 
 
 from contextlib import contextmanager
+from time import time
 
 import six
 
-from . import config
+from . import config, instrumentation
 from .exceptions import BlockStructureNotFound, TransformerDataIncompatible, UsageKeyNotInBlockStructure
 from .factory import BlockStructureFactory
 from .store import BlockStructureStore
@@ -64,21 +65,28 @@ class BlockStructureManager(object):
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
         """
-        block_structure = collected_block_structure.copy() if collected_block_structure else self.get_collected()
-
-        if starting_block_usage_key:
-            # Override the root_block_usage_key so traversals start at the
-            # requested location.  The rest of the structure will be pruned
-            # as part of the transformation.
-            if starting_block_usage_key not in block_structure:
-                raise UsageKeyNotInBlockStructure(
-                    u"The requested usage_key '{0}' is not found in the block_structure with root '{1}'",
-                    six.text_type(starting_block_usage_key),
-                    six.text_type(self.root_block_usage_key),
-                )
-            block_structure.set_root_block(starting_block_usage_key)
-        transformers.transform(block_structure)
-        return block_structure
+        with instrumentation.profile_transform(self.root_block_usage_key) as profile:
+            start_time = time()
+            if collected_block_structure:
+                block_structure = collected_block_structure.copy()
+                instrumentation.record_collected(instrumentation.SOURCE_PROVIDED)
+            else:
+                block_structure = self.get_collected()
+            profile.collected_time = time() - start_time
+
+            if starting_block_usage_key:
+                # Override the root_block_usage_key so traversals start at the
+                # requested location.  The rest of the structure will be pruned
+                # as part of the transformation.
+                if starting_block_usage_key not in block_structure:
+                    raise UsageKeyNotInBlockStructure(
+                        u"The requested usage_key '{0}' is not found in the block_structure with root '{1}'",
+                        six.text_type(starting_block_usage_key),
+                        six.text_type(self.root_block_usage_key),
+                    )
+                block_structure.set_root_block(starting_block_usage_key)
+            transformers.transform(block_structure)
+            return block_structure
 
     def get_collected(self):
         """
@@ -106,6 +114,7 @@ class BlockStructureManager(object):
                 raise
             else:
                 block_structure = self._update_collected()
+                instrumentation.record_collected(instrumentation.SOURCE_MODULESTORE)
 
         return block_structure
 
@@ -5,13 +5,14 @@ Module for the Storage of BlockStructure objects.
 
 
 from logging import getLogger
+from time import time
 
 import six
 
 from django.utils.encoding import python_2_unicode_compatible
 from openedx.core.lib.cache_utils import zpickle, zunpickle
 
-from . import config
+from . import columnar, config, instrumentation
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
@@ -96,11 +97,16 @@ class BlockStructureStore(object):
 
         try:
             serialized_data = self._get_from_cache(bs_model)
+            source = instrumentation.SOURCE_CACHE
         except BlockStructureNotFound:
             serialized_data = self._get_from_store(bs_model)
             self._add_to_cache(serialized_data, bs_model)
+            source = instrumentation.SOURCE_STORAGE
 
-        return self._deserialize(serialized_data, root_block_usage_key)
+        start_time = time()
+        block_structure = self._deserialize(serialized_data, root_block_usage_key)
+        instrumentation.record_collected(source, time() - start_time)
+        return block_structure
 
     def delete(self, root_block_usage_key):
         """
@@ -195,7 +201,13 @@ class BlockStructureStore(object):
     def _serialize(self, block_structure):
         """
         Serializes the data for the given block_structure.
+
+        Uses the compact columnar format if it is enabled, and a
+        compressed pickle otherwise.
         """
+        if config.waffle().is_enabled(config.COLUMNAR_SERIALIZATION):
+            return columnar.serialize(block_structure)
+
         data_to_cache = (
             block_structure._block_relations,
             block_structure.transformer_data,
@@ -206,9 +218,14 @@ class BlockStructureStore(object):
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
+
+        Data in the columnar format is decoded lazily; all other data is
+        assumed to be a compressed pickle.
         """
 
         try:
+            if columnar.is_columnar(serialized_data):
+                return columnar.deserialize(serialized_data, root_block_usage_key)
             block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
         except Exception:
             # Somehow failed to de-serialized the data, assume it's corrupt.
@@ -268,6 +268,77 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         block_structure.remove_block_traversal(lambda block: block == 2)
         self.assert_block_structure(block_structure, [[1], [], [], []], missing_blocks=[2])
 
+    @ddt.data(
+        *itertools.product(
+            [True, False],
+            [
+                ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+                ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+                ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+            ],
+            [[1], [2], [3], [1, 3], [2, 3], [1, 4], [3, 5]],
+        )
+    )
+    @ddt.unpack
+    def test_bulk_filter(self, keep_descendants, children_map, blocks_to_remove):
+        removal_condition = lambda block: block in blocks_to_remove
+
+        # Filter one structure with a topological traversal and the other in bulk.
+        traversed_structure = self.create_block_structure(children_map)
+        traversed_structure.filter_topological_traversal(
+            traversed_structure.create_removal_filter(removal_condition, keep_descendants)
+        )
+        traversed_structure._prune_unreachable()
+
+        bulk_structure = self.create_block_structure(children_map)
+        bulk_structure.bulk_filter([
+            bulk_structure.create_universal_filter(),
+            bulk_structure.create_removal_filter(removal_condition, keep_descendants),
+        ])
+        bulk_structure._prune_unreachable()
+
+        self.assertEqual(set(bulk_structure), set(traversed_structure))
+        for block in bulk_structure:
+            self.assertEqual(bulk_structure.get_children(block), traversed_structure.get_children(block))
+            self.assertEqual(bulk_structure.get_parents(block), traversed_structure.get_parents(block))
+
+    def test_bulk_filter_short_circuits(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        tested_blocks = []
+
+        def _remove_nothing(block):
+            tested_blocks.append(block)
+            return False
+
+        block_structure.bulk_filter([
+            block_structure.create_removal_filter(lambda block: block == 1),
+            block_structure.create_removal_filter(_remove_nothing),
+        ])
+        # Block 1 is removed by the first filter, and its descendants are
+        # unreachable, so neither is tested by the second filter.
+        self.assertEqual(tested_blocks, [0, 2])
+        block_structure._prune_unreachable()
+        self.assert_block_structure(block_structure, [[2], [], [], [], []], missing_blocks=[1, 3, 4])
+
+    def test_bulk_filter_with_custom_filter(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        block_structure.bulk_filter([
+            block_structure.create_removal_filter(lambda block: block == 3),
+            lambda block: block != 2,
+        ])
+        block_structure._prune_unreachable()
+        self.assert_block_structure(block_structure, [[1, 2], [4], [], [], []], missing_blocks=[3])
+
+    def test_indexed_graph_invalidated(self):
+        block_structure = self.create_block_structure(ChildrenMapTestMixin.LINEAR_CHILDREN_MAP)
+        block_structure.bulk_filter([block_structure.create_removal_filter(lambda block: False)])
+        self.assertIsNotNone(block_structure._indexed_graph)
+
+        block_structure.remove_block(3, keep_descendants=False)
+        self.assertIsNone(block_structure._indexed_graph)
+        block_structure.remove_block_traversal(lambda block: block == 2)
+        self.assert_block_structure(block_structure, [[1], [], [], []], missing_blocks=[2, 3])
+
     def test_copy(self):
         def _set_value(structure, value):
             """
@@ -0,0 +1,126 @@
+"""
+Tests for columnar.py
+"""
+# pylint: disable=protected-access
+
+
+import pickle
+from unittest import TestCase
+
+from .. import columnar
+from ..block_structure import BlockStructureBlockData, TransformerData
+from .helpers import ChildrenMapTestMixin, MockTransformer
+
+
+class TestColumnarSerialization(TestCase, ChildrenMapTestMixin):
+    """
+    Tests for the columnar BlockStructure serialization format
+    """
+    def setUp(self):
+        super(TestColumnarSerialization, self).setUp()
+        self.children_map = self.DAG_CHILDREN_MAP
+        self.block_structure = self.create_block_structure(self.children_map, BlockStructureBlockData)
+        self.block_structure._add_transformer(MockTransformer)
+        for block_key in range(len(self.children_map)):
+            block_data = self.block_structure._get_or_create_block(block_key)
+            block_data.display_name = u'Block {}'.format(block_key)
+            if block_key % 2 == 0:
+                self.block_structure.set_transformer_block_field(block_key, MockTransformer, 'even', [block_key])
+
+    def round_trip(self):
+        """
+        Returns the block structure after serializing and deserializing it.
+        """
+        serialized_data = columnar.serialize(self.block_structure)
+        self.assertTrue(columnar.is_columnar(serialized_data))
+        return columnar.deserialize(serialized_data, self.block_structure.root_block_usage_key)
+
+    def test_relations(self):
+        deserialized = self.round_trip()
+        self.assert_block_structure(deserialized, self.children_map)
+        for block_key in range(len(self.children_map)):
+            self.assertEqual(deserialized.get_children(block_key), self.block_structure.get_children(block_key))
+            self.assertEqual(deserialized.get_parents(block_key), self.block_structure.get_parents(block_key))
+
+    def test_block_data(self):
+        deserialized = self.round_trip()
+        self.assertEqual(
+            deserialized._get_transformer_data_version(MockTransformer),
+            MockTransformer.WRITE_VERSION,
+        )
+        for block_key in range(len(self.children_map)):
+            self.assertEqual(
+                deserialized.get_xblock_field(block_key, 'display_name'),
+                u'Block {}'.format(block_key),
+            )
+            self.assertIsNone(deserialized.get_xblock_field(block_key, 'unknown_field'))
+            self.assertEqual(
+                deserialized.get_transformer_block_field(block_key, MockTransformer, 'even', 'odd'),
+                [block_key] if block_key % 2 == 0 else 'odd',
+            )
+
+    def test_lazy_decoding(self):
+        deserialized = self.round_trip()
+        block_data = deserialized[0]
+        self.assertEqual(dict.__len__(block_data.fields), 0)
+        self.assertEqual(dict.__len__(block_data.transformer_data), 0)
+
+        self.assertEqual(block_data.display_name, u'Block 0')
+        self.assertEqual(dict.__len__(block_data.fields), 1)
+        self.assertEqual(dict.__len__(block_data.transformer_data), 0)
+
+    def test_full_materialization(self):
+        deserialized = self.round_trip()
+        self.assertEqual(deserialized[2].fields, {'display_name': u'Block 2'})
+        self.assertEqual(list(deserialized[2].transformer_data.keys()), [MockTransformer.name()])
+        self.assertIn(MockTransformer, deserialized[2].transformer_data)
+        self.assertNotIn(MockTransformer, deserialized[1].transformer_data)
+
+    def test_remove_field(self):
+        deserialized = self.round_trip()
+        deserialized.remove_transformer_block_field(0, MockTransformer, 'even')
+        self.assertIsNone(deserialized.get_transformer_block_field(0, MockTransformer, 'even'))
+
+        del deserialized[0].display_name
+        self.assertIsNone(deserialized.get_xblock_field(0, 'display_name'))
+
+    def test_override_field(self):
+        deserialized = self.round_trip()
+        deserialized.override_xblock_field(0, 'display_name', u'Overridden')
+        self.assertEqual(deserialized.get_xblock_field(0, 'display_name'), u'Overridden')
+
+    def test_set_then_delete_unloaded_field(self):
+        deserialized = self.round_trip()
+        fields = deserialized[0].fields
+        fields['display_name'] = u'Overridden'
+        del fields['display_name']
+        self.assertNotIn('display_name', fields)
+        self.assertIsNone(deserialized.get_xblock_field(0, 'display_name'))
+
+        transformer_data = deserialized[2].transformer_data
+        transformer_data[MockTransformer] = TransformerData()
+        transformer_data.pop(MockTransformer)
+        self.assertNotIn(MockTransformer, transformer_data)
+        self.assertEqual(transformer_data, {})
+
+    def test_copy_is_independent(self):
+        deserialized = self.round_trip()
+        copied = deserialized.copy()
+        copied.get_transformer_block_field(0, MockTransformer, 'even').append('changed')
+        self.assertEqual(deserialized.get_transformer_block_field(0, MockTransformer, 'even'), [0])
+        self.assertEqual(copied.get_transformer_block_field(0, MockTransformer, 'even'), [0, 'changed'])
+
+    def test_pickle_deserialized_block_data(self):
+        deserialized = self.round_trip()
+        fields = pickle.loads(pickle.dumps(deserialized[0].fields))
+        self.assertIs(type(fields), dict)
+        self.assertEqual(fields, {'display_name': u'Block 0'})
+
+    def test_is_columnar(self):
+        self.assertFalse(columnar.is_columnar(b''))
+        self.assertFalse(columnar.is_columnar(b'\x78\x9c'))
+        self.assertTrue(columnar.is_columnar(columnar.MAGIC))
+
+    def test_unsupported_version(self):
+        with self.assertRaises(columnar.ColumnarFormatError):
+            columnar.deserialize(columnar.MAGIC + b'\xff\x00\x00\x00\x00', 0)
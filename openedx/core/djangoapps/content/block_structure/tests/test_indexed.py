@@ -0,0 +1,67 @@
+"""
+Tests for indexed.py
+"""
+
+
+from unittest import TestCase
+
+import ddt
+
+from ..block_structure import BlockStructure
+from ..indexed import IndexedBlockGraph
+from .helpers import ChildrenMapTestMixin
+
+
+@ddt.ddt
+class TestIndexedBlockGraph(TestCase, ChildrenMapTestMixin):
+    """
+    Tests for IndexedBlockGraph
+    """
+    def create_graph(self, children_map):
+        """
+        Returns an IndexedBlockGraph for the given children_map.
+        """
+        block_structure = self.create_block_structure(children_map, BlockStructure)
+        return IndexedBlockGraph.from_block_relations(block_structure._block_relations)  # pylint: disable=protected-access
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_relations(self, children_map):
+        graph = self.create_graph(children_map)
+        self.assertEqual(len(graph), len(children_map))
+        parents_map = self.get_parents_map(children_map)
+        for block, children in enumerate(children_map):
+            index = graph.index_of[block]
+            self.assertEqual([graph.block_keys[child] for child in graph.get_children(index)], children)
+            self.assertEqual([graph.block_keys[parent] for parent in graph.get_parents(index)], parents_map[block])
+
+    @ddt.data(
+        (ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP, 0, [0, 1, 3, 4, 2]),
+        (ChildrenMapTestMixin.DAG_CHILDREN_MAP, 0, [0, 1, 2, 3, 5, 6, 4]),
+        (ChildrenMapTestMixin.DAG_CHILDREN_MAP, 2, [2, 3, 5, 6, 4]),
+    )
+    @ddt.unpack
+    def test_topological_order(self, children_map, start_block, expected_order):
+        graph = self.create_graph(children_map)
+        order = graph.topological_order(graph.index_of[start_block])
+        self.assertEqual([graph.block_keys[index] for index in order], expected_order)
+
+    def test_find_removals(self):
+        graph = self.create_graph(ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+        removals = graph.find_removals(
+            graph.index_of[0],
+            [(lambda block: block == 1, False), (lambda block: block in (2, 5), True)],
+        )
+        # Block 3 is still reachable through block 2, whose descendants are kept.
+        self.assertEqual(removals, [(1, False), (2, True), (5, True)])
+
+    def test_find_removals_unreachable(self):
+        graph = self.create_graph(ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP)
+        removals = graph.find_removals(
+            graph.index_of[0],
+            [(lambda block: block in (1, 3), False)],
+        )
+        self.assertEqual(removals, [(1, False)])
@@ -5,11 +5,21 @@ Tests for manager.py
 
 import ddt
 import six
+from django.conf import settings
 from django.test import TestCase
+from mock import patch
 
 from ..block_structure import BlockStructureBlockData
 from ..config import RAISE_ERROR_WHEN_NOT_FOUND, STORAGE_BACKING_FOR_CACHE, waffle
 from ..exceptions import BlockStructureNotFound, UsageKeyNotInBlockStructure
+from ..instrumentation import (
+    SOURCE_CACHE,
+    SOURCE_MODULESTORE,
+    SOURCE_PROVIDED,
+    TransformerProfile,
+    get_request_profiles,
+    profile_transform
+)
 from ..manager import BlockStructureManager
 from ..transformers import BlockStructureTransformers
 from .helpers import (
@@ -172,6 +182,43 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
             with self.assertRaises(UsageKeyNotInBlockStructure):
                 self.bs_manager.get_transformed(self.transformers, starting_block_usage_key=100)
 
+    @patch.dict(settings.BLOCK_STRUCTURES_SETTINGS, {'PROFILE_TRANSFORMS': True})
+    def test_get_transformed_profiles(self):
+        profiles = get_request_profiles()
+        del profiles[:]
+        with mock_registered_transformers(self.registered_transformers):
+            self.bs_manager.get_transformed(self.transformers)
+            block_structure = self.bs_manager.get_transformed(self.transformers)
+            self.bs_manager.get_transformed(self.transformers, collected_block_structure=block_structure)
+
+        assert [profile.collected_source for profile in profiles] == [
+            SOURCE_MODULESTORE, SOURCE_CACHE, SOURCE_PROVIDED,
+        ]
+        for profile in profiles:
+            assert profile.root_block_usage_key == self.block_key_factory(0)
+            assert [transformer.name for transformer in profile.transformers] == [TestTransformer1.name(), u'prune']
+            assert [transformer.blocks_removed for transformer in profile.transformers] == [0, 0]
+            assert profile.blocks_removed == 0
+            assert profile.total_time >= profile.collected_time
+
+    @patch('openedx.core.djangoapps.content.block_structure.instrumentation.monitoring_utils')
+    def test_get_transformed_metrics(self, mock_monitoring_utils):
+        with mock_registered_transformers(self.registered_transformers):
+            self.bs_manager.get_transformed(self.transformers)
+        mock_monitoring_utils.accumulate.assert_any_call(u'block_structure.transform.count', 1)
+        mock_monitoring_utils.accumulate.assert_any_call(u'block_structure.transform.blocks_removed', 0)
+        mock_monitoring_utils.accumulate.assert_any_call(u'block_structure.collected.modulestore', 1)
+        mock_monitoring_utils.accumulate.assert_any_call(
+            u'block_structure.transformer.{}.blocks_removed'.format(TestTransformer1.name()), 0,
+        )
+
+    @patch('openedx.core.djangoapps.content.block_structure.instrumentation.monitoring_utils')
+    def test_metrics_of_unknown_source_and_transformer(self, mock_monitoring_utils):
+        with profile_transform(self.block_key_factory(0)) as profile:
+            profile.transformers.append(TransformerProfile(None, 0.0, 0))
+        mock_monitoring_utils.accumulate.assert_any_call(u'block_structure.collected.unknown', 1)
+        mock_monitoring_utils.accumulate.assert_any_call(u'block_structure.transformer.unknown.time', 0.0)
+
     def test_get_collected_cached(self):
         self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
         self.collect_and_verify(expect_modulestore_called=False, expect_cache_updated=False)
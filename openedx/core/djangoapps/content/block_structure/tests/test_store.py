@@ -7,7 +7,8 @@ import ddt
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE, waffle
+from ..columnar import is_columnar
+from ..config import COLUMNAR_SERIALIZATION, STORAGE_BACKING_FOR_CACHE, waffle
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
 from ..store import BlockStructureStore
@@ -90,3 +91,24 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         assert self.mock_cache.timeout_from_last_call == 0
         self.store.add(self.block_structure)
         assert self.mock_cache.timeout_from_last_call == timeout
+
+    @ddt.data(True, False)
+    def test_columnar_serialization(self, with_storage_backing):
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(COLUMNAR_SERIALIZATION, active=True):
+                self.store.add(self.block_structure)
+            serialized_data = next(iter(self.mock_cache.map.values()))
+            self.assertTrue(is_columnar(serialized_data))
+
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+            self.assert_block_structure(stored_value, self.children_map)
+            self.assertEqual(
+                stored_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+                u'{} val'.format(MockTransformer.name()),
+            )
+
+    def test_pickled_data_read_with_columnar_enabled(self):
+        self.store.add(self.block_structure)
+        with waffle().override(COLUMNAR_SERIALIZATION, active=True):
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.children_map)
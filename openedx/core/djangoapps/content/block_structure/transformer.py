@@ -177,7 +177,7 @@ class FilteringTransformerMixin(BlockStructureTransformer):
         transform_block_filters calls will be combined and used in a single
         tree traversal.
         """
-        block_structure.filter_topological_traversal(self.transform_block_filters(usage_info, block_structure))
+        block_structure.bulk_filter(self.transform_block_filters(usage_info, block_structure))
 
     @abstractmethod
     def transform_block_filters(self, usage_info, block_structure):
@@ -3,9 +3,10 @@ Module for a collection of BlockStructureTransformers.
 """
 
 
-import functools
+from contextlib import contextmanager
 from logging import getLogger
 
+from . import instrumentation
 from .exceptions import TransformerDataIncompatible, TransformerException
 from .transformer import FilteringTransformerMixin
 from .transformer_registry import TransformerRegistry
@@ -113,11 +114,18 @@ class BlockStructureTransformers(object):
         single course tree traversal, then remaining transformers are run in
         the order that they were added.
         """
+        profile = instrumentation.active_profile()
+        num_blocks = len(block_structure)
+
         self._transform_with_filters(block_structure)
         self._transform_without_filters(block_structure)
 
         # Prune the block structure to remove any unreachable blocks.
-        block_structure._prune_unreachable()  # pylint: disable=protected-access
+        with self._timed(profile, u'prune', block_structure):
+            block_structure._prune_unreachable()  # pylint: disable=protected-access
+
+        if profile is not None:
+            profile.blocks_removed += num_blocks - len(block_structure)
 
     def _transform_with_filters(self, block_structure):
         """
@@ -127,28 +135,42 @@ class BlockStructureTransformers(object):
         if not self._transformers['supports_filter']:
             return
 
+        profile = instrumentation.active_profile()
         filters = []
         for transformer in self._transformers['supports_filter']:
-            filters.extend(transformer.transform_block_filters(self.usage_info, block_structure))
-
-        combined_filters = functools.reduce(
-            self._filter_chain,
-            filters,
-            block_structure.create_universal_filter()
-        )
-        block_structure.filter_topological_traversal(combined_filters)
+            with self._timed(profile, transformer.name(), block_structure):
+                filters.extend(transformer.transform_block_filters(self.usage_info, block_structure))
 
-    def _filter_chain(self, accumulated, additional):
-        """
-        Given two functions that take a block_key and return a boolean, yield
-        a function that takes a block key, and 'ands' the functions together
-        """
-        return lambda block_key: accumulated(block_key) and additional(block_key)
+        # The filters of all transformers are applied in a single traversal,
+        # so the blocks they remove are attributed to this combined step.
+        with self._timed(profile, u'bulk_filter', block_structure):
+            block_structure.bulk_filter(filters)
 
     def _transform_without_filters(self, block_structure):
         """
         Transforms the given block_structure using the transform
         method from the given transformers.
         """
+        profile = instrumentation.active_profile()
         for transformer in self._transformers['no_filter']:
-            transformer.transform(self.usage_info, block_structure)
+            with self._timed(profile, transformer.name(), block_structure):
+                transformer.transform(self.usage_info, block_structure)
+
+    @staticmethod
+    def _timed(profile, name, block_structure):
+        """
+        Returns a context manager recording the wrapped step of the
+        transformation in the given profile, if any.
+        """
+        if profile is None:
+            return _noop_context()
+        return profile.time_transformer(name, block_structure)
+
+
+@contextmanager
+def _noop_context():
+    """
+    A context manager that does nothing, for transformations that aren't
+    being profiled.
+    """
+    yield
@@ -0,0 +1,181 @@
+"""
+Cache tiers in front of the CourseOverview table.
+
+CourseOverviews are cached, pickled, in the default cache for
+COURSE_OVERVIEW_CACHE_TIMEOUT seconds and, if COURSE_OVERVIEW_LOCAL_CACHE_SIZE
+is set, in a process-local LRU for LOCAL_CACHE_TIMEOUT seconds. Entries are
+keyed by course id and CourseOverview.VERSION.
+
+Entries are deleted whenever an overview or its image set is saved or
+deleted, which happens whenever a course is published. The process-local
+entries of other processes can't be deleted, so they expire quickly.
+
+Each read returns a fresh copy of the cached overview, which callers are free
+to modify.
+"""
+
+
+import threading
+import time
+from collections import OrderedDict
+
+import six
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from six.moves import cPickle as pickle
+
+LOCAL_CACHE_TIMEOUT = 60
+
+_CACHE_KEY_PREFIX = u'course_overview'
+
+
+class LocalCourseOverviewCache(object):
+    """
+    A thread-safe, process-local LRU cache of pickled CourseOverviews, whose
+    entries expire after LOCAL_CACHE_TIMEOUT seconds.
+    """
+    def __init__(self, max_size=0):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the pickled overview cached for key, or None if it isn't
+        cached or has expired.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[1] < time.time():
+                return None
+            # Re-insert the entry so that it becomes the most recently used.
+            self._entries[key] = entry
+            return entry[0]
+
+    def set(self, key, data):
+        """
+        Caches the pickled overview under key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (data, time.time() + LOCAL_CACHE_TIMEOUT)
+            self._evict()
+
+    def delete(self, key):
+        """
+        Removes the entry for key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def resize(self, max_size):
+        """
+        Changes the maximum number of entries, evicting entries if necessary.
+        """
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def _evict(self):
+        """
+        Evicts least recently used entries until at most max_size remain.
+
+        Must be called with self._lock held.
+        """
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+_LOCAL_CACHE = LocalCourseOverviewCache()
+
+
+def get_local_cache():
+    """
+    Returns the process-local cache of overviews, or None if it is disabled.
+    """
+    max_size = getattr(settings, 'COURSE_OVERVIEW_LOCAL_CACHE_SIZE', 0)
+    if not max_size:
+        return None
+
+    if _LOCAL_CACHE.max_size != max_size:
+        _LOCAL_CACHE.resize(max_size)
+    return _LOCAL_CACHE
+
+
+def is_enabled():
+    """
+    Returns whether overviews are cached.
+    """
+    return bool(getattr(settings, 'COURSE_OVERVIEW_CACHE_TIMEOUT', 0))
+
+
+def get_many(course_ids, version):
+    """
+    Returns a dict mapping the given course ids to copies of their cached
+    overviews of the given version, for the course ids with cached overviews.
+    """
+    if not is_enabled():
+        return {}
+
+    keys = {_cache_key(course_id, version): course_id for course_id in course_ids}
+    local_cache = get_local_cache()
+    found = {}
+    if local_cache:
+        for key in keys:
+            data = local_cache.get(key)
+            if data is not None:
+                found[key] = data
+
+    missing_keys = [key for key in keys if key not in found]
+    if missing_keys:
+        shared = cache.get_many(missing_keys)
+        if local_cache:
+            for key, data in six.iteritems(shared):
+                local_cache.set(key, data)
+        found.update(shared)
+
+    return {keys[key]: pickle.loads(data) for key, data in six.iteritems(found)}
+
+
+def set_many(course_overviews, version):
+    """
+    Caches the given overviews, of the given version.
+    """
+    if not is_enabled():
+        return
+
+    entries = {
+        _cache_key(course_overview.id, version): pickle.dumps(course_overview, pickle.HIGHEST_PROTOCOL)
+        for course_overview in course_overviews
+    }
+    cache.set_many(entries, settings.COURSE_OVERVIEW_CACHE_TIMEOUT)
+    local_cache = get_local_cache()
+    if local_cache:
+        for key, data in six.iteritems(entries):
+            local_cache.set(key, data)
+
+
+def delete(course_id, version):
+    """
+    Removes the cached overview of the given course and version, now and,
+    should an overview be cached again before the current transaction
+    commits, once it commits.
+    """
+    key = _cache_key(course_id, version)
+
+    def _delete():
+        cache.delete(key)
+        local_cache = get_local_cache()
+        if local_cache:
+            local_cache.delete(key)
+
+    _delete()
+    transaction.on_commit(_delete)
+
+
+def _cache_key(course_id, version):
+    """
+    Returns the cache key of the overview of the given course and version.
+    """
+    return u'{}.{}.{}'.format(_CACHE_KEY_PREFIX, version, course_id)
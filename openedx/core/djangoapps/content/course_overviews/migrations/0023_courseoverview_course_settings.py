@@ -0,0 +1,123 @@
+# Generated by Django 2.2.16 on 2020-09-21 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course_overviews', '0022_courseoverviewtab_is_hidden'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courseoverview',
+            name='_html_textbooks_json',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='courseoverview',
+            name='_pdf_textbooks_json',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='courseoverview',
+            name='_textbooks_json',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='courseoverview',
+            name='allow_public_wiki_access',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='courseoverview',
+            name='course_visibility',
+            field=models.TextField(default='private'),
+        ),
+        migrations.AddField(
+            model_name='courseoverview',
+            name='edxnotes',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='courseoverview',
+            name='edxnotes_visibility',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='courseoverview',
+            name='enable_ccx',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='courseoverview',
+            name='hide_progress_tab',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='courseoverview',
+            name='show_calculator',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='courseoverview',
+            name='teams_enabled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='historicalcourseoverview',
+            name='_html_textbooks_json',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='historicalcourseoverview',
+            name='_pdf_textbooks_json',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='historicalcourseoverview',
+            name='_textbooks_json',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.AddField(
+            model_name='historicalcourseoverview',
+            name='allow_public_wiki_access',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='historicalcourseoverview',
+            name='course_visibility',
+            field=models.TextField(default='private'),
+        ),
+        migrations.AddField(
+            model_name='historicalcourseoverview',
+            name='edxnotes',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='historicalcourseoverview',
+            name='edxnotes_visibility',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='historicalcourseoverview',
+            name='enable_ccx',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='historicalcourseoverview',
+            name='hide_progress_tab',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='historicalcourseoverview',
+            name='show_calculator',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='historicalcourseoverview',
+            name='teams_enabled',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -31,11 +31,13 @@ from openedx.core.djangoapps.models.course_details import CourseDetails
 from openedx.core.lib.cache_utils import request_cached, RequestCache
 from static_replace.models import AssetBaseUrlConfig
 from xmodule import block_metadata_utils, course_metadata_utils
-from xmodule.course_module import DEFAULT_START_DATE, CourseDescriptor
+from xmodule.course_module import DEFAULT_START_DATE, CourseDescriptor, Textbook
 from xmodule.error_module import ErrorDescriptor
 from xmodule.modulestore.django import modulestore
 from xmodule.tabs import CourseTab
 
+from . import cache as overview_cache
+
 
 log = logging.getLogger(__name__)
 
@@ -63,7 +65,7 @@ class CourseOverview(TimeStampedModel):
         app_label = 'course_overviews'
 
     # IMPORTANT: Bump this whenever you modify this model and/or add a migration.
-    VERSION = 11  # this one goes to eleven
+    VERSION = 12
 
     # Cache entry versioning.
     version = IntegerField()
@@ -126,6 +128,19 @@ class CourseOverview(TimeStampedModel):
 
     language = TextField(null=True)
 
+    # Course settings
+    allow_public_wiki_access = BooleanField(default=False)
+    _textbooks_json = TextField(default=u'[]')  # JSON representation of list of [title, book_url] pairs
+    _pdf_textbooks_json = TextField(default=u'[]')
+    _html_textbooks_json = TextField(default=u'[]')
+    hide_progress_tab = BooleanField(default=False)
+    edxnotes = BooleanField(default=False)
+    edxnotes_visibility = BooleanField(default=True)
+    enable_ccx = BooleanField(default=False)
+    course_visibility = TextField(default=u'private')
+    teams_enabled = BooleanField(default=False)
+    show_calculator = BooleanField(default=False)
+
     history = HistoricalRecords()
 
     @classmethod
@@ -229,6 +244,20 @@ class CourseOverview(TimeStampedModel):
         if not CatalogIntegration.is_enabled():
             course_overview.language = course.language
 
+        course_overview.allow_public_wiki_access = course.allow_public_wiki_access
+        course_overview._textbooks_json = json.dumps(
+            [[textbook.title, textbook.book_url] for textbook in course.textbooks]
+        )
+        course_overview._pdf_textbooks_json = json.dumps(course.pdf_textbooks)
+        course_overview._html_textbooks_json = json.dumps(course.html_textbooks)
+        course_overview.hide_progress_tab = bool(course.hide_progress_tab)
+        course_overview.edxnotes = course.edxnotes
+        course_overview.edxnotes_visibility = course.edxnotes_visibility
+        course_overview.enable_ccx = course.enable_ccx
+        course_overview.course_visibility = course.course_visibility
+        course_overview.teams_enabled = course.teams_enabled
+        course_overview.show_calculator = course.show_calculator
+
         return course_overview
 
     @classmethod
@@ -341,10 +370,10 @@ class CourseOverview(TimeStampedModel):
         """
         Load a CourseOverview object for a given course ID.
 
-        First, we try to load the CourseOverview from the database. If it
-        doesn't exist, we load the entire course from the modulestore, create a
-        CourseOverview object from it, and then cache it in the database for
-        future use.
+        First, we try to load the CourseOverview from the cache, then from the
+        database. If it doesn't exist, we load the entire course from the
+        modulestore, create a CourseOverview object from it, and then cache it
+        in the database for future use.
 
         Arguments:
             course_id (CourseKey): the ID of the course overview to be loaded.
@@ -358,6 +387,10 @@ class CourseOverview(TimeStampedModel):
             - IOError if some other error occurs while trying to load the
                 course from the module store.
         """
+        cached_overviews = overview_cache.get_many([course_id], cls.VERSION)
+        if course_id in cached_overviews:
+            return cached_overviews[course_id]
+
         try:
             course_overview = cls.objects.select_related('image_set').get(id=course_id)
             if course_overview.version < cls.VERSION:
@@ -372,15 +405,18 @@ class CourseOverview(TimeStampedModel):
         if course_overview and not hasattr(course_overview, 'image_set'):
             CourseOverviewImageSet.create(course_overview)
 
-        return course_overview or cls.load_from_module_store(course_id)
+        course_overview = course_overview or cls.load_from_module_store(course_id)
+        cls._cache_overviews([course_overview])
+        return course_overview
 
     @classmethod
     def get_from_ids(cls, course_ids):
         """
         Return a dict mapping course_ids to CourseOverviews.
 
-        Tries to select all CourseOverviews in one query,
-        then fetches remaining (uncached) overviews from the modulestore.
+        Tries to get all CourseOverviews from the cache, then to select the
+        remaining ones in one query, then fetches remaining (uncached)
+        overviews from the modulestore.
 
         Course IDs for non-existant courses will map to None.
 
@@ -389,13 +425,15 @@ class CourseOverview(TimeStampedModel):
 
         Returns: dict[CourseKey, CourseOverview|None]
         """
-        overviews = {
-            overview.id: overview
-            for overview in cls.objects.select_related('image_set').filter(
-                id__in=course_ids,
+        overviews = overview_cache.get_many(course_ids, cls.VERSION)
+        uncached_ids = [course_id for course_id in course_ids if course_id not in overviews]
+        if uncached_ids:
+            selected_overviews = list(cls.objects.select_related('image_set').filter(
+                id__in=uncached_ids,
                 version__gte=cls.VERSION
-            )
-        }
+            ))
+            cls._cache_overviews(selected_overviews)
+            overviews.update((overview.id, overview) for overview in selected_overviews)
         for course_id in course_ids:
             if course_id not in overviews:
                 try:
@@ -404,6 +442,23 @@ class CourseOverview(TimeStampedModel):
                     overviews[course_id] = None
         return overviews
 
+    @classmethod
+    def _cache_overviews(cls, course_overviews):
+        """
+        Caches the given CourseOverviews, except those still missing their
+        thumbnail images, which are to be generated on their next load.
+        """
+        if not overview_cache.is_enabled():
+            return
+        images_enabled = CourseOverviewImageConfig.current().enabled
+        overview_cache.set_many(
+            [
+                course_overview for course_overview in course_overviews
+                if hasattr(course_overview, 'image_set') or not images_enabled
+            ],
+            cls.VERSION,
+        )
+
     def clean_id(self, padding_char='='):
         """
         Returns a unique deterministic base32-encoded ID for the course.
@@ -772,89 +827,25 @@ class CourseOverview(TimeStampedModel):
         return urlunparse(('', base_url, path, params, query, fragment))
 
     @cached_property
-    def _original_course(self):
-        """
-        Returns the course from the modulestore.
-        """
-        log.warning('Falling back on modulestore to get course information for %s', self.id)
-        return modulestore().get_course(self.id)
-
-    @property
-    def allow_public_wiki_access(self):
-        """
-        TODO: move this to the model.
-        """
-        return self._original_course.allow_public_wiki_access
-
-    @property
     def textbooks(self):
         """
-        TODO: move this to the model.
+        Returns the course's list of Textbooks.
         """
-        return self._original_course.textbooks
+        return [Textbook(title, book_url) for title, book_url in json.loads(self._textbooks_json)]
 
-    @property
+    @cached_property
     def pdf_textbooks(self):
         """
-        TODO: move this to the model.
+        Returns the course's list of PDF textbook dicts.
         """
-        return self._original_course.pdf_textbooks
+        return json.loads(self._pdf_textbooks_json)
 
-    @property
+    @cached_property
     def html_textbooks(self):
         """
-        TODO: move this to the model.
-        """
-        return self._original_course.html_textbooks
-
-    @property
-    def hide_progress_tab(self):
-        """
-        TODO: move this to the model.
+        Returns the course's list of HTML textbook dicts.
         """
-        return self._original_course.hide_progress_tab
-
-    @property
-    def edxnotes(self):
-        """
-        TODO: move this to the model.
-        """
-        return self._original_course.edxnotes
-
-    @property
-    def enable_ccx(self):
-        """
-        TODO: move this to the model.
-        """
-        return self._original_course.enable_ccx
-
-    @property
-    def course_visibility(self):
-        """
-        TODO: move this to the model.
-        """
-        return self._original_course.course_visibility
-
-    @property
-    def teams_enabled(self):
-        """
-        TODO: move this to the model.
-        """
-        return self._original_course.teams_enabled
-
-    @property
-    def show_calculator(self):
-        """
-        TODO: move this to the model.
-        """
-        return self._original_course.show_calculator
-
-    @property
-    def edxnotes_visibility(self):
-        """
-        TODO: move this to the model.
-        """
-        return self._original_course.edxnotes_visibility
+        return json.loads(self._html_textbooks_json)
 
     def __str__(self):
         """Represent ourselves with the course key."""
@@ -1089,7 +1080,19 @@ def _invalidate_overview_cache(**kwargs):  # pylint: disable=unused-argument
     RequestCache('course_overview').clear()
 
 
-post_save.connect(_invalidate_overview_cache, sender=CourseOverview)
+def _invalidate_cached_overview(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the request cache and the cached copies of the overview that
+    was saved or deleted, or whose thumbnail images were.
+    """
+    RequestCache('course_overview').clear()
+    course_id = instance.id if sender is CourseOverview else instance.course_overview_id
+    overview_cache.delete(course_id, CourseOverview.VERSION)
+
+
+post_save.connect(_invalidate_cached_overview, sender=CourseOverview)
+post_save.connect(_invalidate_cached_overview, sender=CourseOverviewImageSet)
 post_save.connect(_invalidate_overview_cache, sender=CourseOverviewImageConfig)
-post_delete.connect(_invalidate_overview_cache, sender=CourseOverview)
+post_delete.connect(_invalidate_cached_overview, sender=CourseOverview)
+post_delete.connect(_invalidate_cached_overview, sender=CourseOverviewImageSet)
 post_delete.connect(_invalidate_overview_cache, sender=CourseOverviewImageConfig)
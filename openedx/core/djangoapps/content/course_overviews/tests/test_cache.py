@@ -0,0 +1,108 @@
+"""
+Tests for the cache tiers in front of the CourseOverview table.
+"""
+
+
+import mock
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
+from openedx.core.lib.cache_utils import RequestCache
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+from .. import cache as overview_cache
+from ..models import CourseOverview
+
+
+class LocalCourseOverviewCacheTestCase(TestCase):
+    """
+    Tests for LocalCourseOverviewCache.
+    """
+    def test_lru_eviction(self):
+        local_cache = overview_cache.LocalCourseOverviewCache(max_size=2)
+        local_cache.set('a', b'1')
+        local_cache.set('b', b'2')
+        self.assertEqual(local_cache.get('a'), b'1')
+        local_cache.set('c', b'3')
+        self.assertIsNone(local_cache.get('b'))
+        self.assertEqual(local_cache.get('a'), b'1')
+        self.assertEqual(local_cache.get('c'), b'3')
+
+    def test_expiry(self):
+        local_cache = overview_cache.LocalCourseOverviewCache(max_size=2)
+        with mock.patch('time.time', return_value=1000):
+            local_cache.set('a', b'1')
+        with mock.patch('time.time', return_value=1000 + overview_cache.LOCAL_CACHE_TIMEOUT + 1):
+            self.assertIsNone(local_cache.get('a'))
+
+    def test_delete(self):
+        local_cache = overview_cache.LocalCourseOverviewCache(max_size=2)
+        local_cache.set('a', b'1')
+        local_cache.delete('a')
+        self.assertIsNone(local_cache.get('a'))
+
+
+@override_settings(COURSE_OVERVIEW_CACHE_TIMEOUT=60, COURSE_OVERVIEW_LOCAL_CACHE_SIZE=10)
+class CourseOverviewCacheTestCase(ModuleStoreTestCase, CacheIsolationTestCase):
+    """
+    Tests for the caching of CourseOverviews.
+    """
+    ENABLED_CACHES = ['default']
+    ENABLED_SIGNALS = ['course_published']
+
+    def setUp(self):
+        super(CourseOverviewCacheTestCase, self).setUp()
+        self.course = CourseFactory.create(emit_signals=True)
+        self.addCleanup(overview_cache.delete, self.course.id, CourseOverview.VERSION)
+        self.clear_caches()
+
+    def clear_caches(self):
+        """
+        Clears the request cache, and the process-local tier of the cache.
+        """
+        RequestCache('course_overview').clear()
+        overview_cache.get_local_cache().resize(0)
+
+    def test_get_from_id_cached(self):
+        CourseOverview.get_from_id(self.course.id)
+        self.clear_caches()
+        with self.assertNumQueries(0):
+            course_overview = CourseOverview.get_from_id(self.course.id)
+        self.assertEqual(course_overview.id, self.course.id)
+        self.assertEqual(course_overview.display_name, self.course.display_name)
+
+    def test_get_from_ids_cached(self):
+        other_course = CourseFactory.create(emit_signals=True)
+        self.addCleanup(overview_cache.delete, other_course.id, CourseOverview.VERSION)
+        CourseOverview.get_from_id(self.course.id)
+        self.clear_caches()
+
+        with mock.patch.object(CourseOverview, 'load_from_module_store') as mock_load_from_modulestore:
+            overviews = CourseOverview.get_from_ids([self.course.id, other_course.id])
+        self.assertFalse(mock_load_from_modulestore.called)
+        self.assertEqual(overviews[self.course.id].id, self.course.id)
+        self.assertEqual(overviews[other_course.id].id, other_course.id)
+
+        with self.assertNumQueries(0):
+            overviews = CourseOverview.get_from_ids([self.course.id, other_course.id])
+        self.assertEqual(set(overviews), {self.course.id, other_course.id})
+
+    def test_cached_copies_are_independent(self):
+        course_overview = CourseOverview.get_from_id(self.course.id)
+        course_overview.display_name = u'Modified'
+        RequestCache('course_overview').clear()
+        self.assertEqual(CourseOverview.get_from_id(self.course.id).display_name, self.course.display_name)
+
+    def test_invalidated_on_publish(self):
+        CourseOverview.get_from_id(self.course.id)
+        self.course.display_name = u'Republished'
+        self.update_course(self.course, self.user.id)
+        self.assertEqual(CourseOverview.get_from_id(self.course.id).display_name, u'Republished')
+
+    def test_versioned(self):
+        CourseOverview.get_from_id(self.course.id)
+        self.clear_caches()
+        with mock.patch.object(CourseOverview, 'VERSION', CourseOverview.VERSION + 1):
+            self.assertEqual(overview_cache.get_many([self.course.id], CourseOverview.VERSION), {})
@@ -25,6 +25,7 @@ from openedx.core.djangoapps.catalog.tests.mixins import CatalogIntegrationMixin
 from openedx.core.djangoapps.dark_lang.models import DarkLangConfig
 from openedx.core.djangoapps.models.course_details import CourseDetails
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
+from openedx.core.lib.cache_utils import RequestCache
 from openedx.core.lib.courses import course_image_url
 from static_replace.models import AssetBaseUrlConfig
 from xmodule.assetstore.assetmgr import AssetManager
@@ -130,6 +131,15 @@ class CourseOverviewTestCase(CatalogIntegrationMixin, ModuleStoreTestCase, Cache
             'invitation_only',
             'max_student_enrollments_allowed',
             'catalog_visibility',
+            'allow_public_wiki_access',
+            'pdf_textbooks',
+            'html_textbooks',
+            'edxnotes',
+            'edxnotes_visibility',
+            'enable_ccx',
+            'course_visibility',
+            'teams_enabled',
+            'show_calculator',
         ]
         for attribute_name in fields_to_test:
             course_value = getattr(course, attribute_name)
@@ -276,6 +286,34 @@ class CourseOverviewTestCase(CatalogIntegrationMixin, ModuleStoreTestCase, Cache
         course = CourseFactory.create(default_store=modulestore_type, run="TestRun", **kwargs)
         self.check_course_overview_against_course(course)
 
+    def test_course_settings_without_modulestore(self):
+        """
+        Tests that course settings are read from the CourseOverview, without
+        loading the course from the modulestore.
+        """
+        course = CourseFactory.create(
+            textbooks=[['Textbook', 'https://example.com/book/']],
+            pdf_textbooks=[{'tab_title': 'PDF', 'chapters': [{'title': 'Chapter', 'url': '/chapter.pdf'}]}],
+            hide_progress_tab=True,
+            allow_public_wiki_access=True,
+            enable_ccx=True,
+        )
+        CourseOverview.get_from_id(course.id)
+        RequestCache('course_overview').clear()
+
+        with check_mongo_calls_range(max_finds=0):
+            course_overview = CourseOverview.get_from_id(course.id)
+            self.assertEqual(
+                [(textbook.title, textbook.book_url) for textbook in course_overview.textbooks],
+                [('Textbook', 'https://example.com/book/')],
+            )
+            self.assertEqual(course_overview.pdf_textbooks, course.pdf_textbooks)
+            self.assertEqual(course_overview.html_textbooks, [])
+            self.assertTrue(course_overview.hide_progress_tab)
+            self.assertTrue(course_overview.allow_public_wiki_access)
+            self.assertTrue(course_overview.enable_ccx)
+            self.assertFalse(course_overview.teams_enabled)
+
     @ddt.data(True, False)
     def test_language_field(self, catalog_integration_enabled):
         """
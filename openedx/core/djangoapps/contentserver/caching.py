@@ -1,10 +1,26 @@
 """
 Helper functions for caching course assets.
+
+Assets are cached in two separate tiers:
+
+    * The metadata of each asset (digest, length, lock state, content type
+      and last modified date) is small and needed for every request, so it
+      is kept for a long time in the content cache, and for a short time in
+      a bounded, process-local tier in front of it.
+    * The content of small assets, including their data, is kept in the
+      content cache, and only loaded when the data is actually sent.
+
+The contentstore deletes both whenever an asset is saved, deleted or has its
+attributes changed, so that neither tier outlives the asset it describes.
 """
 
 
-import six
+import threading
+import time
+from collections import OrderedDict
 
+import six
+from django.conf import settings
 from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
 from opaque_keys import InvalidKeyError
@@ -19,6 +35,159 @@ except InvalidCacheBackendError:
     pass
 
 
+# Only assets smaller than this are cached with their data. This is the default
+# maximum item size of memcached, and we don't want to do too much buffering in
+# memory when we're serving an actual request.
+MAX_CACHED_CONTENT_LENGTH = 1048576
+
+METADATA_CACHE_TIMEOUT = 24 * 60 * 60
+
+# The process-local tier can't be invalidated by other processes, so a change
+# to an asset's metadata, such as its lock state, takes up to this long to be
+# seen by every process.
+LOCAL_METADATA_CACHE_TIMEOUT = 60
+
+
+class AssetMetadata(object):
+    """
+    The metadata of an asset, which is all that's needed to answer a request
+    for it without sending its data.
+    """
+    def __init__(self, location, content_type, length, locked, content_digest, last_modified_at):
+        self.location = location
+        self.content_type = content_type
+        self.length = length
+        self.locked = locked
+        self.content_digest = content_digest
+        self.last_modified_at = last_modified_at
+
+    @classmethod
+    def from_content(cls, content):
+        """
+        Returns the metadata of the given StaticContent.
+        """
+        return cls(
+            content.location,
+            content.content_type,
+            content.length,
+            getattr(content, 'locked', False),
+            getattr(content, 'content_digest', None),
+            content.last_modified_at,
+        )
+
+
+class LocalMetadataCache(object):
+    """
+    A thread-safe, process-local LRU cache of asset metadata, whose entries
+    expire after LOCAL_METADATA_CACHE_TIMEOUT seconds.
+    """
+    def __init__(self, max_size=0):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the metadata cached for key, or None if it isn't cached or
+        has expired.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[1] < time.time():
+                return None
+            # Re-insert the entry so that it becomes the most recently used.
+            self._entries[key] = entry
+            return entry[0]
+
+    def set(self, key, metadata):
+        """
+        Caches metadata under key.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (metadata, time.time() + LOCAL_METADATA_CACHE_TIMEOUT)
+            self._evict()
+
+    def delete_many(self, keys):
+        """
+        Removes the entries for the given keys.
+        """
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def resize(self, max_size):
+        """
+        Changes the maximum number of entries, evicting entries if necessary.
+        """
+        with self._lock:
+            self.max_size = max_size
+            self._evict()
+
+    def _evict(self):
+        """
+        Evicts least recently used entries until at most max_size remain.
+
+        Must be called with self._lock held.
+        """
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+_LOCAL_METADATA_CACHE = LocalMetadataCache()
+
+
+def get_local_metadata_cache():
+    """
+    Returns the process-local metadata cache, or None if it is disabled.
+
+    The tier is sized by the CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE setting,
+    and is disabled if that setting is missing or 0.
+    """
+    max_size = getattr(settings, 'CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE', 0)
+    if not max_size:
+        return None
+
+    if _LOCAL_METADATA_CACHE.max_size != max_size:
+        _LOCAL_METADATA_CACHE.resize(max_size)
+    return _LOCAL_METADATA_CACHE
+
+
+def set_cached_metadata(metadata):
+    """
+    Stores the given asset metadata in the cache, using its location as the key.
+    """
+    key = _metadata_key(metadata.location)
+    local_cache = get_local_metadata_cache()
+    if local_cache is not None:
+        local_cache.set(key, metadata)
+    CONTENT_CACHE.set(key, metadata, METADATA_CACHE_TIMEOUT, version=STATIC_CONTENT_VERSION)
+
+
+def get_cached_metadata(location):
+    """
+    Retrieves the metadata of the asset at the given location if cached.
+    """
+    key = _metadata_key(location)
+    local_cache = get_local_metadata_cache()
+    if local_cache is not None:
+        metadata = local_cache.get(key)
+        if metadata is not None:
+            return metadata
+
+    metadata = CONTENT_CACHE.get(key, version=STATIC_CONTENT_VERSION)
+    if metadata is not None and local_cache is not None:
+        local_cache.set(key, metadata)
+    return metadata
+
+
+def _metadata_key(location):
+    """
+    Returns the cache key of the metadata of the asset at the given location.
+    """
+    return u'metadata:{}'.format(location).encode('utf-8')
+
+
 def set_cached_content(content):
     """
     Stores the given piece of content in the cache, using its location as the key.
@@ -35,7 +204,7 @@ def get_cached_content(location):
 
 def del_cached_content(location):
     """
-    Delete content for the given location, as well versions of the content without a run.
+    Delete content and metadata for the given location, as well versions of the content without a run.
 
     It's possible that the content could have been cached without knowing the course_key,
     and so without having the run.
@@ -44,11 +213,17 @@ def del_cached_content(location):
         """Force the location to a Unicode string."""
         return six.text_type(loc).encode("utf-8")
 
-    locations = [location_str(location)]
+    locations = [location]
     try:
-        locations.append(location_str(location.replace(run=None)))
+        locations.append(location.replace(run=None))
     except InvalidKeyError:
         # although deprecated keys allowed run=None, new keys don't if there is no version.
         pass
 
-    CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+    metadata_keys = [_metadata_key(loc) for loc in locations]
+    local_cache = get_local_metadata_cache()
+    if local_cache is not None:
+        local_cache.delete_many(metadata_keys)
+    CONTENT_CACHE.delete_many(
+        [location_str(loc) for loc in locations] + metadata_keys, version=STATIC_CONTENT_VERSION
+    )
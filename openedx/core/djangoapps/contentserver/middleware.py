@@ -5,17 +5,22 @@ Middleware to serve assets.
 
 import datetime
 import logging
+import os
+from uuid import uuid4
 
 import six
+from django.conf import settings
 from django.http import (
     HttpResponse,
     HttpResponseBadRequest,
     HttpResponseForbidden,
     HttpResponseNotFound,
     HttpResponseNotModified,
-    HttpResponsePermanentRedirect
+    HttpResponsePermanentRedirect,
+    StreamingHttpResponse
 )
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import parse_etags, quote_etag
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from six import text_type
@@ -23,12 +28,19 @@ from six import text_type
 from openedx.core.djangoapps.header_control import force_header_for_response
 from student.models import CourseEnrollment
 from xmodule.assetstore.assetmgr import AssetManager
-from xmodule.contentstore.content import XASSET_LOCATION_TAG, StaticContent
+from xmodule.contentstore.content import XASSET_LOCATION_TAG, StaticContent, StaticContentStream
 from xmodule.exceptions import NotFoundError
 from xmodule.modulestore import InvalidLocationError
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
-from .caching import get_cached_content, set_cached_content
+from .caching import (
+    MAX_CACHED_CONTENT_LENGTH,
+    AssetMetadata,
+    get_cached_content,
+    get_cached_metadata,
+    set_cached_content,
+    set_cached_metadata
+)
 from .models import CdnUserAgentsConfig, CourseAssetCacheTtlConfig
 
 log = logging.getLogger(__name__)
@@ -43,6 +55,13 @@ except ImportError:
 
 HTTP_DATE_FORMAT = u"%a, %d %b %Y %H:%M:%S GMT"
 
+# Maximum number of byte ranges served from a single request.
+MAX_BYTE_RANGES = 20
+
+# Headers for handing a download off to the web server.
+SENDFILE_X_ACCEL_REDIRECT = 'X-Accel-Redirect'
+SENDFILE_X_SENDFILE = 'X-Sendfile'
+
 
 class StaticContentServer(MiddlewareMixin):
     """
@@ -79,14 +98,14 @@ class StaticContentServer(MiddlewareMixin):
             except (InvalidLocationError, InvalidKeyError):
                 return HttpResponseBadRequest()
 
-            # Attempt to load the asset to make sure it exists, and grab the asset digest
-            # if we're able to load it.
-            actual_digest = None
+            # Attempt to load the asset's metadata to make sure it exists, and grab the asset
+            # digest if we're able to load it.  The content itself is only loaded once we know
+            # that we'll send it.
             try:
-                content = self.load_asset_from_location(loc)
-                actual_digest = getattr(content, "content_digest", None)
+                metadata, content = self.load_asset_metadata_from_location(loc)
             except (ItemNotFoundError, NotFoundError):
                 return HttpResponseNotFound()
+            actual_digest = metadata.content_digest
 
             # If this was a versioned asset, and the digest doesn't match, redirect
             # them to the actual version.
@@ -111,96 +130,205 @@ class StaticContentServer(MiddlewareMixin):
                 newrelic.agent.add_custom_parameter('contentserver.from_cdn', is_from_cdn)
 
                 # Check if this content is locked or not.
-                locked = self.is_content_locked(content)
+                locked = self.is_content_locked(metadata)
                 newrelic.agent.add_custom_parameter('contentserver.locked', locked)
 
             # Check that user has access to the content.
-            if not self.is_user_authorized(request, content, loc):
+            if not self.is_user_authorized(request, metadata, loc):
                 return HttpResponseForbidden('Unauthorized')
 
             # Figure out if the client sent us a conditional request, and let them know
             # if this asset has changed since then.
-            last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
-
-            # *** File streaming within a byte range ***
-            # If a Range is provided, parse Range attribute of the request
-            # Add Content-Range in the response if Range is structurally correct
-            # Request -> Range attribute structure: "Range: bytes=first-[last]"
-            # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
-            # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
-            response = None
-            if request.META.get('HTTP_RANGE'):
-                # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
-                    content = AssetManager.find(loc, as_stream=True)
-
-                header_value = request.META['HTTP_RANGE']
-                try:
-                    unit, ranges = parse_range_header(header_value, content.length)
-                except ValueError as exception:
-                    # If the header field is syntactically invalid it should be ignored.
-                    log.exception(
-                        u"%s in Range header: %s for content: %s",
-                        text_type(exception), header_value, six.text_type(loc)
-                    )
-                else:
-                    if unit != 'bytes':
-                        # Only accept ranges in bytes
-                        log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, text_type(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
-                        log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, text_type(loc)
-                        )
-                    else:
-                        first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
-                            response['Content-Range'] = u'bytes {first}-{last}/{length}'.format(
-                                first=first, last=last, length=content.length
-                            )
-                            response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
-
-                            if newrelic:
-                                newrelic.agent.add_custom_parameter('contentserver.ranged', True)
-                        else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s",
-                                header_value, text_type(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
-
-            # If Range header is absent or syntactically invalid return a full content response.
-            if response is None:
-                response = HttpResponse(content.stream_data())
-                response['Content-Length'] = content.length
+            if self.is_not_modified(request, metadata):
+                response = HttpResponseNotModified()
+                self.set_caching_headers(metadata, response)
+                return response
 
             if newrelic:
-                newrelic.agent.add_custom_parameter('contentserver.content_len', content.length)
-                newrelic.agent.add_custom_parameter('contentserver.content_type', content.content_type)
+                newrelic.agent.add_custom_parameter('contentserver.content_len', metadata.length)
+                newrelic.agent.add_custom_parameter('contentserver.content_type', metadata.content_type)
+
+            # If the asset is mirrored to local disk, let the web server send it, along with
+            # any byte ranges that were requested.
+            response = self.get_sendfile_response(metadata)
+            if response is not None:
+                if newrelic:
+                    newrelic.agent.add_custom_parameter('contentserver.sendfile', True)
+            else:
+                if content is None:
+                    content = self.load_asset_from_location(loc)
+                response = self.get_content_response(request, content, loc)
+                if response.status_code == 416:
+                    return response
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
             response['X-Frame-Options'] = 'ALLOW'
 
             # Set any caching headers, and do any response cleanup needed.  Based on how much
             # middleware we have in place, there's no easy way to use the built-in Django
             # utilities and properly sanitize and modify a response to ensure that it is as
             # cacheable as possible, which is why we do it ourselves.
-            self.set_caching_headers(content, response)
+            self.set_caching_headers(metadata, response)
 
             return response
 
+    def get_content_response(self, request, content, location):
+        """
+        Returns a response streaming the given content, or the byte ranges
+        of it requested by the given request.
+
+        *** File streaming within a byte range ***
+        If a Range is provided, parse Range attribute of the request
+        Add Content-Range in the response if Range is structurally correct
+        Request -> Range attribute structure: "Range: bytes first-[last][, first-[last]...]"
+        Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
+        Multiple satisfiable ranges are sent as a multipart/byteranges message.
+        https://tools.ietf.org/html/rfc7233
+        """
+        header_value = request.META.get('HTTP_RANGE')
+        if header_value:
+            try:
+                unit, ranges = parse_range_header(header_value, content.length)
+            except ValueError as exception:
+                # If the header field is syntactically invalid it should be ignored.
+                log.exception(
+                    u"%s in Range header: %s for content: %s",
+                    text_type(exception), header_value, six.text_type(location)
+                )
+            else:
+                if unit != 'bytes':
+                    # Only accept ranges in bytes
+                    log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, text_type(location))
+                elif len(ranges) > MAX_BYTE_RANGES:
+                    # Don't let a single request make us seek all over the asset; send back the full content.
+                    log.warning(
+                        u"More than %d ranges in Range header: %s for content: %s",
+                        MAX_BYTE_RANGES, header_value, text_type(location)
+                    )
+                else:
+                    ranges = [(first, last) for first, last in ranges if 0 <= first <= last < content.length]
+                    if not ranges:
+                        log.warning(
+                            u"Cannot satisfy ranges in Range header: %s for content: %s",
+                            header_value, text_type(location)
+                        )
+                        return HttpResponse(status=416)  # Requested Range Not Satisfiable
+
+                    if newrelic:
+                        newrelic.agent.add_custom_parameter('contentserver.ranged', True)
+                        newrelic.agent.add_custom_parameter('contentserver.range_count', len(ranges))
+                    if len(ranges) == 1:
+                        return self._get_range_response(content, *ranges[0])
+                    return self._get_multipart_range_response(content, ranges)
+
+        # If Range header is absent or unsatisfiable return a full content response.
+        response = _streaming_response(content, content.stream_data())
+        response['Content-Length'] = content.length
+        response['Content-Type'] = content.content_type
+        return response
+
+    def _get_range_response(self, content, first, last):
+        """
+        Returns a Partial Content response streaming the given byte range of the content.
+        """
+        response = _streaming_response(content, content.stream_data_in_range(first, last))
+        response.status_code = 206  # Partial Content
+        response['Content-Range'] = u'bytes {first}-{last}/{length}'.format(
+            first=first, last=last, length=content.length
+        )
+        response['Content-Length'] = str(last - first + 1)
+        response['Content-Type'] = content.content_type
+        return response
+
+    def _get_multipart_range_response(self, content, ranges):
+        """
+        Returns a Partial Content response streaming the given byte ranges of the content
+        as a multipart/byteranges message.
+        """
+        boundary = uuid4().hex
+        parts = [
+            (
+                (
+                    u'\r\n--{boundary}\r\n'
+                    u'Content-Type: {content_type}\r\n'
+                    u'Content-Range: bytes {first}-{last}/{length}\r\n\r\n'
+                ).format(
+                    boundary=boundary, content_type=content.content_type, first=first, last=last, length=content.length
+                ).encode('utf-8'),
+                first,
+                last,
+            )
+            for first, last in ranges
+        ]
+        closing = u'\r\n--{boundary}--\r\n'.format(boundary=boundary).encode('utf-8')
+
+        def stream_parts():
+            """
+            Streams each part's headers followed by its byte range, then the closing delimiter.
+            """
+            for part_headers, first, last in parts:
+                yield part_headers
+                for chunk in content.stream_data_in_range(first, last):
+                    yield chunk
+            yield closing
+
+        response = _streaming_response(content, stream_parts())
+        response.status_code = 206  # Partial Content
+        response['Content-Length'] = str(
+            sum(len(part_headers) + last - first + 1 for part_headers, first, last in parts) + len(closing)
+        )
+        response['Content-Type'] = u'multipart/byteranges; boundary={}'.format(boundary)
+        return response
+
+    def get_sendfile_response(self, metadata):
+        """
+        Returns an empty response that tells the web server to send the local mirror of
+        the asset with the given metadata, or None if the asset isn't mirrored or sendfile
+        isn't configured.
+
+        Mirrored assets are expected in CONTENTSERVER_SENDFILE['ROOT'], each in a file
+        named by its content digest.
+        """
+        sendfile_settings = getattr(settings, 'CONTENTSERVER_SENDFILE', {})
+        header = sendfile_settings.get('HEADER')
+        root = sendfile_settings.get('ROOT')
+        content_digest = metadata.content_digest
+        if not (header and root and content_digest):
+            return None
+
+        path = os.path.join(root, content_digest)
+        if not os.path.isfile(path):
+            return None
+
+        response = HttpResponse()
+        if header == SENDFILE_X_ACCEL_REDIRECT:
+            response[header] = sendfile_settings.get('URL_PREFIX', '') + content_digest
+        else:
+            response[header] = path
+        response['Content-Type'] = metadata.content_type
+        return response
+
+    @staticmethod
+    def is_not_modified(request, metadata):
+        """
+        Returns whether the conditional request, if any, is for the version of the
+        asset that the client already has.
+
+        If-None-Match takes precedence over If-Modified-Since, and is answered with
+        the weak comparison of the strong ETag derived from the asset's digest.
+        """
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            etag = get_etag(metadata)
+            if etag is None:
+                return False
+            etags = [tag[2:] if tag.startswith('W/') else tag for tag in parse_etags(if_none_match)]
+            return '*' in etags or etag in etags
+
+        if_modified_since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+        return if_modified_since == metadata.last_modified_at.strftime(HTTP_DATE_FORMAT)
+
     def set_caching_headers(self, content, response):
         """
         Sets caching headers based on whether or not the asset is locked.
@@ -227,6 +355,9 @@ class StaticContentServer(MiddlewareMixin):
             response['Cache-Control'] = "private, no-cache, no-store"
 
         response['Last-Modified'] = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+        etag = get_etag(content)
+        if etag is not None:
+            response['ETag'] = etag
 
         # Force the Vary header to only vary responses on Origin, so that XHR and browser requests get cached
         # separately and don't screw over one another. i.e. a browser request that doesn't send Origin, and
@@ -280,6 +411,22 @@ class StaticContentServer(MiddlewareMixin):
 
         return True
 
+    def load_asset_metadata_from_location(self, location):
+        """
+        Loads the metadata of an asset based on its location, either retrieving it
+        from a cache or loading the asset directly from the contentstore.
+
+        Returns the metadata and, if it had to be loaded, the asset's content.
+        """
+        metadata = get_cached_metadata(location)
+        if metadata is not None:
+            return metadata, None
+
+        content = self.load_asset_from_location(location)
+        metadata = AssetMetadata.from_content(content)
+        set_cached_metadata(metadata)
+        return metadata, content
+
     def load_asset_from_location(self, location):
         """
         Loads an asset based on its location, either retrieving it from a cache
@@ -295,16 +442,48 @@ class StaticContentServer(MiddlewareMixin):
             except (ItemNotFoundError, NotFoundError):
                 raise
 
-            # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
-            # because it's the default for memcached and also we don't want to do too much
-            # buffering in memory when we're serving an actual request.
-            if content.length is not None and content.length < 1048576:
+            # Now that we fetched it, let's go ahead and try to cache it, if it's small enough.
+            if content.length is not None and content.length < MAX_CACHED_CONTENT_LENGTH:
                 content = content.copy_to_in_mem()
                 set_cached_content(content)
 
         return content
 
 
+def get_etag(metadata):
+    """
+    Returns the strong ETag of the asset with the given metadata, or None if its
+    digest is unknown.
+    """
+    content_digest = getattr(metadata, 'content_digest', None)
+    if not content_digest:
+        return None
+    return quote_etag(content_digest)
+
+
+def _streaming_response(content, chunks):
+    """
+    Returns a response with the given chunks of the given content as its body.
+
+    Content that is streamed from the contentstore is sent chunk by chunk as it
+    is read, rather than buffered in memory, and is closed once sent.
+    """
+    if not isinstance(content, StaticContentStream):
+        return HttpResponse(chunks)
+
+    def stream_and_close():
+        """
+        Streams the chunks, then closes the content's stream.
+        """
+        try:
+            for chunk in chunks:
+                yield chunk
+        finally:
+            content.close()
+
+    return StreamingHttpResponse(stream_and_close())
+
+
 def parse_range_header(header_value, content_length):
     """
     Returns the unit and a list of (start, end) tuples of ranges.
@@ -4,15 +4,19 @@ Tests for StaticContentServer
 
 
 import copy
+import os
+import shutil
 
 import datetime
 import ddt
 import logging
 import six
 import unittest
+from tempfile import mkdtemp
 from uuid import uuid4
 
 from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
 from django.test import RequestFactory
 from django.test.client import Client
 from django.test.utils import override_settings
@@ -30,7 +34,7 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
 
-from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
+from ..middleware import parse_range_header, HTTP_DATE_FORMAT, MAX_BYTE_RANGES, StaticContentServer
 
 log = logging.getLogger(__name__)
 
@@ -69,6 +73,15 @@ def get_old_style_versioned_asset_url(asset_path):
     return asset_path
 
 
+def get_response_body(response):
+    """
+    Returns the body of the given response, whether streamed or not.
+    """
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
 @ddt.ddt
 @override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
 class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
@@ -240,18 +253,78 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart/byteranges message of the ranges.
         """
-        first_byte = self.length_unlocked / 4
-        last_byte = self.length_unlocked / 2
-        # pylint: disable=unicode-format-string
+        first_byte = self.length_unlocked // 4
+        last_byte = self.length_unlocked // 2
         resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -100'.format(
             first=first_byte, last=last_byte))
 
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
+        self.assertNotIn('Content-Range', resp)
+        content_type, boundary = resp['Content-Type'].split('; boundary=')
+        self.assertEqual(content_type, 'multipart/byteranges')
+
+        body = get_response_body(resp)
+        self.assertEqual(resp['Content-Length'], str(len(body)))
+        parts = body.split(b'--' + boundary.encode('utf-8'))
+        self.assertEqual(parts[-1], b'--\r\n')
+        full_content = get_response_body(self.client.get(self.url_unlocked))
+        for part, (first, last) in zip(parts[1:-1], [(first_byte, last_byte), (self.length_unlocked - 100, None)]):
+            headers, data = part.split(b'\r\n\r\n', 1)
+            last = self.length_unlocked - 1 if last is None else last
+            self.assertIn(
+                u'Content-Range: bytes {}-{}/{}'.format(first, last, self.length_unlocked).encode('utf-8'), headers
+            )
+            self.assertEqual(data, full_content[first:last + 1] + b'\r\n')
+
+    def test_range_request_multiple_ranges_partially_satisfiable(self):
+        """
+        Test that unsatisfiable ranges are ignored if any other range is satisfiable.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9, {first}-'.format(
+            first=self.length_unlocked))
+
+        self.assertEqual(resp.status_code, 206)  # HTTP_206_PARTIAL_CONTENT
+        self.assertEqual(resp['Content-Range'], u'bytes 0-9/{length}'.format(length=self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], '10')
+
+    def test_range_request_too_many_ranges(self):
+        """
+        Test that a request for more than MAX_BYTE_RANGES ranges outputs the full content.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=' + ', '.join(['0-0'] * (MAX_BYTE_RANGES + 1)))
+
         self.assertEqual(resp.status_code, 200)
         self.assertNotIn('Content-Range', resp)
         self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
 
+    @ddt.data(
+        ('X-Accel-Redirect', '/contentserver-mirror/{digest}'),
+        ('X-Sendfile', '{root}/{digest}'),
+    )
+    @ddt.unpack
+    def test_sendfile(self, header, expected_value):
+        """
+        Test that assets mirrored to local disk are handed off to the web server.
+        """
+        root = mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        digest = self.contentstore.find(self.unlocked_asset).content_digest
+        sendfile_settings = {'HEADER': header, 'ROOT': root, 'URL_PREFIX': '/contentserver-mirror/'}
+
+        with override_settings(CONTENTSERVER_SENDFILE=sendfile_settings):
+            resp = self.client.get(self.url_unlocked)
+            self.assertNotIn(header, resp)
+
+            open(os.path.join(root, digest), 'w').close()
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9')
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp[header], expected_value.format(root=root, digest=digest))
+        self.assertEqual(get_response_body(resp), b'')
+        self.assertEqual(resp['Accept-Ranges'], 'bytes')
+
     @ddt.data(
         'bytes 0-',
         'bits=0-',
@@ -293,6 +366,76 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual('Origin', resp['Vary'])
 
+    def test_etag(self):
+        """
+        Tests that the strong ETag of an asset is derived from its digest.
+        """
+        digest = self.contentstore.find(self.unlocked_asset).content_digest
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['ETag'], u'"{}"'.format(digest))
+
+    @ddt.data(
+        (u'"{digest}"', 304),
+        (u'W/"{digest}"', 304),
+        (u'"other", "{digest}"', 304),
+        (u'*', 304),
+        (u'"other"', 200),
+    )
+    @ddt.unpack
+    def test_if_none_match(self, header_value, expected_status_code):
+        """
+        Tests that conditional requests with If-None-Match are answered by comparing ETags.
+        """
+        digest = self.contentstore.find(self.unlocked_asset).content_digest
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=header_value.format(digest=digest))
+        self.assertEqual(resp.status_code, expected_status_code)
+        self.assertEqual(resp['ETag'], u'"{}"'.format(digest))
+
+    def test_if_none_match_precedence(self):
+        """
+        Tests that If-None-Match takes precedence over If-Modified-Since.
+        """
+        resp = self.client.get(self.url_unlocked)
+        resp = self.client.get(
+            self.url_unlocked, HTTP_IF_NONE_MATCH='"other"', HTTP_IF_MODIFIED_SINCE=resp['Last-Modified'],
+        )
+        self.assertEqual(resp.status_code, 200)
+
+    @patch('openedx.core.djangoapps.contentserver.caching.CONTENT_CACHE', LocMemCache('contentserver', {}))
+    def test_conditional_request_uses_cached_metadata(self):
+        """
+        Tests that conditional requests for assets whose metadata is cached are answered
+        without loading the asset.
+        """
+        resp = self.client.get(self.url_unlocked)
+        with patch.object(AssetManager, 'find') as mock_find:
+            with patch('openedx.core.djangoapps.contentserver.middleware.get_cached_content') as mock_get_content:
+                resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 304)
+        self.assertFalse(mock_find.called)
+        self.assertFalse(mock_get_content.called)
+
+    @patch('openedx.core.djangoapps.contentserver.caching.CONTENT_CACHE', LocMemCache('contentserver', {}))
+    @override_settings(CONTENTSERVER_LOCAL_METADATA_CACHE_SIZE=10)
+    def test_saving_asset_invalidates_cached_metadata(self):
+        """
+        Tests that replacing an asset in the contentstore invalidates its cached metadata,
+        so that the new version is served with a new ETag.
+        """
+        asset_key = self.course_key.make_asset_key('asset', 'replaced_{}.txt'.format(uuid4().hex))
+        self.contentstore.save(StaticContent(asset_key, 'replaced.txt', 'text/plain', b'old'))
+        old_etag = self.client.get(six.text_type(asset_key))['ETag']
+
+        self.contentstore.save(StaticContent(asset_key, 'replaced.txt', 'text/plain', b'new'))
+        resp = self.client.get(six.text_type(asset_key), HTTP_IF_NONE_MATCH=old_etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], old_etag)
+
+        self.contentstore.delete(asset_key)
+        resp = self.client.get(six.text_type(asset_key))
+        self.assertEqual(resp.status_code, 404)
+
     @patch('openedx.core.djangoapps.contentserver.models.CourseAssetCacheTtlConfig.get_cache_ttl')
     def test_cache_headers_with_ttl_unlocked(self, mock_get_cache_ttl):
         """
@@ -3,16 +3,31 @@
 
 
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from uuid import uuid4
 
 import requests
 import six
-from django.utils.translation import get_language
+from django.conf import settings
+from django.db import connections
+from django.utils.translation import get_language, override
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .settings import SERVICE_HOST as COMMENTS_SERVICE
 
 log = logging.getLogger(__name__)
 
+_local = threading.local()
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+_executor = None
+_executor_pid = None
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in six.iteritems(dic) if v is not None])
@@ -33,9 +48,7 @@ def extract(dic, keys):
 
 def perform_request(method, url, data_or_params=None, raw=False,
                     metric_action=None, metric_tags=None, paged_results=False):
-    # To avoid dependency conflict
-    from openedx.core.djangoapps.django_comment_common.models import ForumsConfig
-    config = ForumsConfig.current()
+    config = _get_forums_config()
 
     if not config.enabled:
         raise CommentClientMaintenanceError('service disabled')
@@ -63,7 +76,8 @@ def perform_request(method, url, data_or_params=None, raw=False,
         data = None
         params = data_or_params.copy()
         params.update(request_id_dict)
-    response = requests.request(
+    session = get_session()
+    response = (session or requests).request(
         method,
         url,
         data=data,
@@ -102,6 +116,117 @@ def perform_request(method, url, data_or_params=None, raw=False,
             return data
 
 
+def get_session():
+    """
+    Returns the requests.Session of this process, which keeps a pool of
+    connections to the comments service, or None if pooling is disabled.
+    """
+    global _session, _session_pid  # pylint: disable=global-statement
+
+    pool_size = getattr(settings, 'COMMENTS_SERVICE_POOL_SIZE', 0)
+    if not pool_size:
+        return None
+
+    # Pooled connections can't be shared with forked processes.
+    pid = os.getpid()
+    if _session_pid != pid:
+        with _lock:
+            if _session_pid != pid:
+                max_retries = getattr(settings, 'COMMENTS_SERVICE_MAX_RETRIES', 0)
+                # Only connection errors, and read errors of idempotent
+                # requests, are retried.
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=pool_size,
+                    max_retries=Retry(
+                        total=max_retries,
+                        connect=max_retries,
+                        read=max_retries,
+                        backoff_factor=0.1,
+                    ),
+                )
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session, _session_pid = session, pid
+    return _session
+
+
+def perform_concurrently(*calls):
+    """
+    Calls the given functions, which make independent comments service
+    requests, concurrently, and returns the list of their results.
+
+    The functions run in other threads, so they must only make comments
+    service requests: the calling thread's language and ForumsConfig are
+    carried over, but not its database connection or request caches.
+
+    If any function raises an exception, the first one's is raised, once all
+    have returned.
+    """
+    executor = _get_executor()
+    if executor is None or len(calls) < 2:
+        return [call() for call in calls]
+
+    config = _get_forums_config()
+    language = get_language()
+
+    def _call(call):
+        try:
+            with override(language), _forums_config(config):
+                return call()
+        finally:
+            connections.close_all()
+
+    futures = [executor.submit(_call, call) for call in calls]
+    return [future.result() for future in futures]
+
+
+def _get_executor():
+    """
+    Returns the pool of threads of this process making concurrent requests,
+    or None if concurrent requests are disabled.
+    """
+    global _executor, _executor_pid  # pylint: disable=global-statement
+
+    max_workers = getattr(settings, 'COMMENTS_SERVICE_MAX_CONCURRENT_REQUESTS', 0)
+    if max_workers < 2:
+        return None
+
+    # Threads don't survive forks, so each process needs its own.
+    pid = os.getpid()
+    if _executor_pid != pid:
+        with _lock:
+            if _executor_pid != pid:
+                _executor, _executor_pid = ThreadPoolExecutor(max_workers), pid
+    return _executor
+
+
+def _get_forums_config():
+    """
+    Returns the current ForumsConfig, or the one set by _forums_config.
+    """
+    config = getattr(_local, 'forums_config', None)
+    if config is not None:
+        return config
+
+    # To avoid dependency conflict
+    from openedx.core.djangoapps.django_comment_common.models import ForumsConfig
+    return ForumsConfig.current()
+
+
+@contextmanager
+def _forums_config(config):
+    """
+    Makes the requests of this thread use the given ForumsConfig.
+    """
+    _local.forums_config = config
+    try:
+        yield
+    finally:
+        _local.forums_config = None
+
+
 class CommentClientError(Exception):
     pass
 
@@ -7,8 +7,9 @@ import logging
 from config_models.models import ConfigurationModel
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
-from django.db.models.signals import post_save
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import ugettext_noop
@@ -275,6 +276,10 @@ class DiscussionsIdMapping(models.Model):
 
     .. no_pii:
     """
+    # Bump this when the format of the mapping changes, to ignore cached mappings.
+    CACHE_VERSION = 1
+    CACHE_TIMEOUT = 60 * 60 * 24
+
     course_id = CourseKeyField(db_index=True, primary_key=True, max_length=255)
     mapping = JSONField(
         help_text=u"Key/value store mapping discussion IDs to discussion XBlock usage keys.",
@@ -284,6 +289,33 @@ class DiscussionsIdMapping(models.Model):
         # use existing table that was originally created from django_comment_common app
         db_table = 'django_comment_common_discussionsidmapping'
 
+    @classmethod
+    def cache_key(cls, course_key):
+        """
+        Return the key under which the mapping of the course is cached.
+        """
+        return u'discussions_id_mapping.v{}.{}'.format(cls.CACHE_VERSION, course_key)
+
+    @classmethod
+    def get_mapping(cls, course_key):
+        """
+        Return the mapping of discussion IDs to XBlock usage key strings of
+        the course, or None if it hasn't been computed.
+
+        Mappings are cached, including the absence of one.
+        """
+        cache_key = cls.cache_key(course_key)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached.get('mapping')
+
+        try:
+            mapping = cls.objects.get(course_id=course_key).mapping
+        except cls.DoesNotExist:
+            mapping = None
+        cache.set(cache_key, {'mapping': mapping}, cls.CACHE_TIMEOUT)
+        return mapping
+
     @classmethod
     def update_mapping(cls, course_key, discussions_id_map):
         """Update the mapping of discussions IDs to XBlock usage key strings."""
@@ -296,3 +328,14 @@ class DiscussionsIdMapping(models.Model):
         if not created:
             mapping_entry.mapping = discussions_id_map
             mapping_entry.save()
+
+
+@receiver(post_save, sender=DiscussionsIdMapping)
+@receiver(post_delete, sender=DiscussionsIdMapping)
+def invalidate_discussions_id_mapping_cache(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Invalidate the cached mapping of the course, now and once the change is committed.
+    """
+    cache_key = DiscussionsIdMapping.cache_key(instance.course_id)
+    cache.delete(cache_key)
+    transaction.on_commit(lambda: cache.delete(cache_key))
@@ -8,11 +8,12 @@ from opaque_keys.edx.locator import CourseLocator
 from six import text_type
 
 from openedx.core.djangoapps.course_groups.cohorts import CourseCohortsSettings
-from openedx.core.djangoapps.django_comment_common.models import CourseDiscussionSettings, Role
+from openedx.core.djangoapps.django_comment_common.models import CourseDiscussionSettings, DiscussionsIdMapping, Role
 from openedx.core.djangoapps.django_comment_common.utils import (
     get_course_discussion_settings,
     set_course_discussion_settings
 )
+from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 from student.models import CourseEnrollment, User
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
@@ -141,3 +142,30 @@ class CourseDiscussionSettingsTest(ModuleStoreTestCase):
                 text_type(value_error.exception),
                 exception_msg_template.format(field['name'], field['type'].__name__)
             )
+
+
+class DiscussionsIdMappingTest(CacheIsolationTestCase):
+    ENABLED_CACHES = ['default']
+    MAPPING = {'discussion': 'block-v1:edX+X+2020+type@discussion+block@1'}
+
+    def setUp(self):
+        super(DiscussionsIdMappingTest, self).setUp()
+        self.course_key = CourseLocator('edX', 'DiscussionsIdMappingTest', '2020')
+
+    def test_get_mapping_cached(self):
+        DiscussionsIdMapping.update_mapping(self.course_key, self.MAPPING)
+        mapping = DiscussionsIdMapping.get_mapping(self.course_key)
+        with self.assertNumQueries(0):
+            self.assertEqual(DiscussionsIdMapping.get_mapping(self.course_key), mapping)
+
+    def test_missing_mapping_cached(self):
+        self.assertIsNone(DiscussionsIdMapping.get_mapping(self.course_key))
+        with self.assertNumQueries(0):
+            self.assertIsNone(DiscussionsIdMapping.get_mapping(self.course_key))
+
+    def test_cache_invalidated_on_update(self):
+        self.assertIsNone(DiscussionsIdMapping.get_mapping(self.course_key))
+        DiscussionsIdMapping.update_mapping(self.course_key, self.MAPPING)
+        self.assertEqual(DiscussionsIdMapping.get_mapping(self.course_key), self.MAPPING)
+        DiscussionsIdMapping.update_mapping(self.course_key, {})
+        self.assertEqual(DiscussionsIdMapping.get_mapping(self.course_key), {})